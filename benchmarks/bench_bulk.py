@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Compare row-at-a-time CSV reading with the columnar bulk reader
+
+Run from the project root: python benchmarks/bench_bulk.py [rows]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from create_google_cal.bulk import read_events_bulk
+from create_google_cal.pipeline import read_events
+
+def write_csv(path, count):
+    """Roster-like rows: a year of dd-mm-yyyy dates, 12-hour times and a few calendars"""
+    rng = random.Random(42)
+    first = date(2025, 1, 1)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('date,start time,end time,event name,calendar\n')
+        for n in range(count):
+            day = first + timedelta(days=rng.randrange(365))
+            hour = rng.randrange(1, 12)
+            f.write(f"{day.strftime('%d-%m-%Y')},{hour}:00 AM,{hour}:30 PM,Shift {n % 200},team{n % 4}\n")
+
+def bench(reader, path):
+    started = time.perf_counter()
+    items = list(reader(path))
+    return time.perf_counter() - started, items
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'roster.csv')
+        write_csv(path, count)
+        stream_time, stream_items = bench(read_events, path)
+        bulk_time, bulk_items = bench(read_events_bulk, path)
+
+    if stream_items != bulk_items:
+        print("Mismatch between streaming and bulk reader results")
+        return 1
+
+    print(f"rows:   {count}")
+    print(f"stream: {stream_time:.3f}s ({count / stream_time:,.0f} rows/s)")
+    print(f"bulk:   {bulk_time:.3f}s ({count / bulk_time:,.0f} rows/s)")
+    print(f"speedup: {stream_time / bulk_time:.1f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Measure CalendarManager import and delete throughput against a fake Calendar API
+
+Starts FakeCalendarServer in-process, imports a generated CSV of N rows with
+create_events_from_csv, then clears the range with delete_events_in_range,
+and writes rows/sec and events/sec per size as JSON so runs can be compared.
+With --async the same runs use AsyncCalendarManager.
+
+Run from the project root:
+
+    python benchmarks/bench_calendar.py --sizes 100 10000 100000 --output bench.json
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from create_google_cal.async_manager import AsyncCalendarManager
+from create_google_cal.calendar_manager import BATCH_SIZE, WORKERS, CalendarManager
+from create_google_cal.ratelimit import CONCURRENCY
+from fake_calendar_server import FakeCalendarServer, fake_credentials
+
+FIRST_DAY = date(2025, 1, 1)
+DAYS = 365
+SLOTS_PER_DAY = 48
+
+def write_csv(path, rows):
+    """Write a roster of half-hour events spread over a year"""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['date', 'start time', 'end time', 'event name'])
+        for i in range(rows):
+            day = FIRST_DAY + timedelta(days=i % DAYS)
+            slot = (i // DAYS) % SLOTS_PER_DAY
+            start = datetime.combine(day, datetime.min.time()) + timedelta(minutes=30 * slot)
+            end = start + timedelta(minutes=30)
+            writer.writerow([day.strftime('%Y-%m-%d'), start.strftime('%H:%M'), end.strftime('%H:%M'), f"Shift {i}"])
+
+def bench_size(rows, args, workdir):
+    path = os.path.join(workdir, f"bench_{rows}.csv")
+    write_csv(path, rows)
+
+    with FakeCalendarServer(latency=args.latency, error_rate=args.error_rate,
+                            throttle_rate=args.throttle_rate, seed=args.seed,
+                            meeting_metadata=args.meeting_metadata) as server:
+        if args.use_async:
+            manager = AsyncCalendarManager(creds=fake_credentials(), root_url=server.root_url,
+                                           concurrency=args.concurrency, rate=args.rate)
+        else:
+            manager = CalendarManager(creds=fake_credentials(), root_url=server.root_url)
+        # Per-row output would dominate the timings
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            created = manager.create_events_from_csv(path, batch_size=args.batch_size)
+            create_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            deleted = manager.delete_events_in_range(FIRST_DAY, FIRST_DAY + timedelta(days=DAYS),
+                                                     force=True, workers=args.workers)
+            delete_seconds = time.perf_counter() - started
+
+        return {
+            'rows': rows,
+            'created': created,
+            'deleted': deleted,
+            'create_seconds': round(create_seconds, 4),
+            'create_rows_per_sec': round(created / create_seconds, 1) if create_seconds else None,
+            'delete_seconds': round(delete_seconds, 4),
+            'delete_events_per_sec': round(deleted / delete_seconds, 1) if delete_seconds else None,
+            'server': dict(server.api.stats),
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark CalendarManager against a fake Calendar API')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 10000, 100000],
+                        help='Row counts to benchmark')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Batch size for imports')
+    parser.add_argument('--workers', type=int, default=WORKERS, help='Concurrent delete workers')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='Benchmark AsyncCalendarManager instead of CalendarManager')
+    parser.add_argument('--concurrency', type=int, default=CONCURRENCY,
+                        help='Requests in flight with --async')
+    parser.add_argument('--rate', type=float, default=0,
+                        help='Requests per second with --async (0 disables pacing)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds of latency per HTTP request')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of calls failing with 500')
+    parser.add_argument('--throttle-rate', type=float, default=0.0,
+                        help='Fraction of calls failing with 403 rateLimitExceeded')
+    parser.add_argument('--meeting-metadata', action='store_true',
+                        help='Give created events descriptions, attendees and conferencing data')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for error and throttle injection')
+    parser.add_argument('-o', '--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in args.sizes:
+            result = bench_size(rows, args, workdir)
+            results.append(result)
+            print(f"{rows:>8} rows  create {result['create_rows_per_sec']:>10,.1f} rows/s  "
+                  f"delete {result['delete_events_per_sec']:>10,.1f} events/s")
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'settings': {
+            'engine': 'async' if args.use_async else 'threads',
+            'batch_size': args.batch_size,
+            'workers': args.workers,
+            'concurrency': args.concurrency if args.use_async else None,
+            'rate': args.rate if args.use_async else None,
+            'latency': args.latency,
+            'error_rate': args.error_rate,
+            'throttle_rate': args.throttle_rate,
+            'seed': args.seed,
+            'meeting_metadata': args.meeting_metadata,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""Time the overlap checker on a large roster
+
+Run from the project root: python benchmarks/bench_conflicts.py [rows]
+"""
+
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from create_google_cal.conflicts import find_conflicts
+from create_google_cal.pipeline import EventRecord
+
+def roster(count):
+    """Half-hour shifts at random 5-minute slots through a year, spread over 50 calendars"""
+    rng = random.Random(42)
+    first = datetime(2025, 1, 1)
+    records = []
+    for n in range(count):
+        start = first + timedelta(minutes=5 * rng.randrange(365 * 24 * 12))
+        records.append(EventRecord(n + 2, f"Shift {n % 200}", start, start + timedelta(minutes=30),
+                                   f"Shift {n % 200}", f"team{n % 50}", 0, 0))
+    return records
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    records = roster(count)
+    started = time.perf_counter()
+    conflicts = find_conflicts(records)
+    elapsed = time.perf_counter() - started
+
+    print(f"rows:      {count}")
+    print(f"conflicts: {len(conflicts)}")
+    print(f"checked:   {elapsed:.3f}s ({count / elapsed:,.0f} rows/s)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Compare the strptime cascade with the precompiled date/time parser
+
+Run from the project root: python benchmarks/bench_parse.py [rows]
+"""
+
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from create_google_cal.utils import DATETIME_DATE_FORMATS, TIME_FORMATS, DateTimeParser
+
+def legacy_parse_datetime(date_str, time_str):
+    """The original one-strptime-per-attempt implementation"""
+    parsed_date = None
+    for date_format in DATETIME_DATE_FORMATS:
+        try:
+            parsed_date = datetime.strptime(date_str.strip(), date_format).date()
+            break
+        except ValueError:
+            continue
+    if not parsed_date:
+        raise ValueError(f"Could not parse date: {date_str}")
+
+    parsed_time = None
+    for time_format in TIME_FORMATS:
+        try:
+            parsed_time = datetime.strptime(time_str.strip(), time_format).time()
+            break
+        except ValueError:
+            continue
+    if not parsed_time:
+        raise ValueError(f"Could not parse time: {time_str}")
+
+    return datetime.combine(parsed_date, parsed_time)
+
+def make_rows(count):
+    """Roster-like rows: a year of dd-mm-yyyy dates with 12-hour times"""
+    rng = random.Random(42)
+    first = date(2025, 1, 1)
+    rows = []
+    for _ in range(count):
+        day = first + timedelta(days=rng.randrange(365))
+        hour = rng.randrange(1, 13)
+        rows.append((day.strftime('%d-%m-%Y'), f"{hour}:{rng.choice(['00', '30'])} {rng.choice(['AM', 'PM'])}"))
+    return rows
+
+def bench(parse, rows):
+    started = time.perf_counter()
+    results = [parse(date_str, time_str) for date_str, time_str in rows]
+    return time.perf_counter() - started, results
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    rows = make_rows(count)
+
+    legacy_time, legacy_results = bench(legacy_parse_datetime, rows)
+    fast_time, fast_results = bench(DateTimeParser().parse_datetime, rows)
+
+    if legacy_results != fast_results:
+        print("Mismatch between legacy and fast parser results")
+        return 1
+
+    print(f"rows:    {count}")
+    print(f"strptime cascade: {legacy_time:.3f}s ({count / legacy_time:,.0f} rows/s)")
+    print(f"fast parser:      {fast_time:.3f}s ({count / fast_time:,.0f} rows/s)")
+    print(f"speedup:          {legacy_time / fast_time:.1f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Check cold start time of gcal.py commands that never call the Google API
+
+Runs each command under python -X importtime and fails (exit status 1) if
+the Google client stack gets imported or startup exceeds the budget over a
+bare interpreter. tests/test_startup.py runs the same checks under pytest.
+Run from the project root: python benchmarks/bench_startup.py
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+# Milliseconds allowed on top of a bare `python -c pass`
+STARTUP_BUDGET_MS = 150
+RUNS = 5
+HEAVY_MODULES = ('googleapiclient', 'google.', 'google_auth_oauthlib', 'google_auth_httplib2', 'httplib2')
+COMMANDS = [
+    ['gcal.py'],
+    ['gcal.py', '--setup'],
+    ['gcal.py', '--help'],
+]
+
+def run(args):
+    """Run a Python command from src/, returning (seconds, importtime output)"""
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime'] + args, cwd=SRC_DIR,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    return time.perf_counter() - started, result.stderr
+
+def heavy_imports(importtime_output):
+    """Return the heavy modules named in -X importtime output"""
+    found = set()
+    for line in importtime_output.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        module = line.rsplit('|', 1)[1].strip()
+        if module.startswith(HEAVY_MODULES):
+            found.add(module)
+    return sorted(found)
+
+def main():
+    baseline = statistics.median(run(['-c', 'pass'])[0] for _ in range(RUNS))
+    failed = False
+
+    for command in COMMANDS:
+        timings = []
+        heavy = []
+        for _ in range(RUNS):
+            elapsed, output = run(command)
+            timings.append(elapsed)
+            heavy = heavy_imports(output)
+
+        overhead_ms = (statistics.median(timings) - baseline) * 1000
+        status = 'ok'
+        if heavy:
+            status = f"FAIL: imported {', '.join(heavy[:5])}"
+            failed = True
+        elif overhead_ms > STARTUP_BUDGET_MS:
+            status = f"FAIL: over {STARTUP_BUDGET_MS} ms budget"
+            failed = True
+        print(f"{' '.join(command):<20} {overhead_ms:7.1f} ms  {status}")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,372 @@
+"""In-process fake of the Google Calendar v3 HTTP API for benchmarks
+
+Supports events list (with timeMin/timeMax, q and cursor-based pagination,
+and incremental sync through syncToken/nextSyncToken), insert, update,
+delete and multipart batch requests, fields= partial responses and gzip,
+with optional per-request latency and random 500 / 403 rateLimitExceeded
+injection.
+
+    with FakeCalendarServer(latency=0.02, throttle_rate=0.01) as server:
+        manager = CalendarManager(creds=fake_credentials(), root_url=server.root_url)
+"""
+
+import bisect
+import gzip
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+import uuid
+from datetime import datetime, timezone
+from email.parser import Parser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+EVENTS_PATH = re.compile(r'^/calendar/v3/calendars/(?P<calendar>[^/]+)/events(?:/(?P<event>[^/]+))?$')
+BATCH_PATH = '/batch/calendar/v3'
+DEFAULT_PAGE_SIZE = 250
+MAX_PAGE_SIZE = 2500
+
+def fake_credentials():
+    """OAuth credentials that are always valid and never refreshed"""
+    from google.oauth2.credentials import Credentials
+    return Credentials(token='fake-token')
+
+def _utc(when):
+    """Sortable UTC string for an event start/end or an RFC3339 query bound"""
+    if isinstance(when, dict):
+        if 'date' in when:
+            return when['date'] + 'T00:00:00'
+        when = when['dateTime']
+    parsed = datetime.fromisoformat(when.replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.isoformat()
+
+def _parse_fields(spec):
+    """Parse a partial-response mask like 'nextPageToken,items(id,start)' into a tree"""
+    tree = {}
+    stack = []
+    current = tree
+    name = ''
+    for char in spec + ',':
+        if char == '(':
+            current[name.strip()] = {}
+            stack.append(current)
+            current = current[name.strip()]
+            name = ''
+        elif char in ',)':
+            if name.strip():
+                current[name.strip()] = None
+            name = ''
+            if char == ')':
+                current = stack.pop()
+        else:
+            name += char
+    return tree
+
+def _select(value, tree):
+    """Keep only the fields of value named in a parsed mask"""
+    if isinstance(value, list):
+        return [_select(item, tree) for item in value]
+    if not isinstance(value, dict):
+        return value
+    return {key: item if tree[key] is None else _select(item, tree[key])
+            for key, item in value.items() if key in tree}
+
+def _meeting_metadata(event_id):
+    """Description, attendees and conferencing data typical of a busy work calendar"""
+    return {
+        'description': 'Agenda:\n' + '\n'.join(f"{n}. Discuss item {n} and agree on next steps" for n in range(1, 9)),
+        'location': 'Building 4, Room 412',
+        'attendees': [{'email': f"person{n}@example.com", 'displayName': f"Person {n}",
+                       'responseStatus': 'needsAction'} for n in range(12)],
+        'conferenceData': {
+            'conferenceId': event_id[:10],
+            'entryPoints': [{'entryPointType': 'video', 'uri': f"https://meet.example.com/{event_id[:10]}"},
+                            {'entryPointType': 'phone', 'uri': 'tel:+1-555-0100', 'pin': '123456'}],
+            'conferenceSolution': {'name': 'Example Meet', 'key': {'type': 'hangoutsMeet'}},
+        },
+        'reminders': {'useDefault': False, 'overrides': [{'method': 'popup', 'minutes': 10}]},
+        'htmlLink': f"https://calendar.example.com/event?eid={event_id}",
+    }
+
+def _error(status, reason, message):
+    return status, {'error': {'code': status, 'message': message,
+                              'errors': [{'domain': 'global', 'reason': reason, 'message': message}]}}
+
+class FakeCalendar:
+    """Events of one calendar, kept sorted by (start, id) for range listing"""
+
+    def __init__(self):
+        self.events = {}
+        self.order = []
+        # Every change gets the next sequence number; a sync token is the
+        # sync epoch and the number of the last change it has seen
+        self.sequence = 0
+        self.changed = {}
+        # Cancelled copies of deleted events, returned by incremental syncs
+        self.deleted = {}
+        # Sync tokens issued before the last expire_sync_tokens are refused
+        self.sync_epoch = 0
+
+    def _touch(self, event_id):
+        self.sequence += 1
+        self.changed[event_id] = self.sequence
+
+    def add(self, event):
+        key = (_utc(event['start']), event['id'])
+        bisect.insort(self.order, key)
+        self.events[event['id']] = event
+        self.deleted.pop(event['id'], None)
+        self._touch(event['id'])
+
+    def remove(self, event_id):
+        event = self.events.pop(event_id)
+        key = (_utc(event['start']), event_id)
+        del self.order[bisect.bisect_left(self.order, key)]
+        self.deleted[event_id] = {'id': event_id, 'status': 'cancelled'}
+        self._touch(event_id)
+        return event
+
+    def changes_since(self, sequence):
+        """Return (sequence, event) for the events changed after sequence, in the order they changed"""
+        changes = sorted((number, event_id) for event_id, number in self.changed.items() if number > sequence)
+        return [(number, self.events.get(event_id) or self.deleted[event_id]) for number, event_id in changes]
+
+class FakeCalendarApi:
+    """Request handling and storage, independent of the HTTP server"""
+
+    def __init__(self, latency=0.0, error_rate=0.0, throttle_rate=0.0, seed=0, meeting_metadata=False):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        # Give created events the payload of a real meeting
+        self.meeting_metadata = meeting_metadata
+        self.calendars = {}
+        self.lock = threading.Lock()
+        self.rng = random.Random(seed)
+        self.stats = {'requests': 0, 'batches': 0, 'errors_injected': 0, 'throttled': 0, 'bytes_sent': 0}
+
+    def calendar(self, calendar_id):
+        if calendar_id not in self.calendars:
+            self.calendars[calendar_id] = FakeCalendar()
+        return self.calendars[calendar_id]
+
+    def event_count(self, calendar_id='primary'):
+        with self.lock:
+            return len(self.calendar(calendar_id).events)
+
+    def expire_sync_tokens(self, calendar_id='primary'):
+        """Make every sync token issued so far fail with 410 Gone, as the API does after a while"""
+        with self.lock:
+            self.calendar(calendar_id).sync_epoch += 1
+
+    def _inject(self):
+        """Return an injected (status, body) failure, or None"""
+        roll = self.rng.random()
+        if roll < self.throttle_rate:
+            self.stats['throttled'] += 1
+            return _error(403, 'rateLimitExceeded', 'Rate Limit Exceeded')
+        if roll < self.throttle_rate + self.error_rate:
+            self.stats['errors_injected'] += 1
+            return _error(500, 'backendError', 'Backend Error')
+        return None
+
+    def handle(self, method, path, body):
+        """Handle one API call, returning (status, JSON body or None)"""
+        url = urllib.parse.urlsplit(path)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        match = EVENTS_PATH.match(url.path)
+        if not match:
+            return _error(404, 'notFound', f"No such endpoint: {url.path}")
+
+        calendar_id = urllib.parse.unquote(match.group('calendar'))
+        event_id = match.group('event')
+        with self.lock:
+            self.stats['requests'] += 1
+            injected = self._inject()
+            if injected:
+                return injected
+            calendar = self.calendar(calendar_id)
+
+            if event_id is None and method == 'GET':
+                if 'syncToken' in query:
+                    status, result = self._sync_list(calendar, query)
+                    if status != 200:
+                        return status, result
+                else:
+                    result = self._list(calendar, query)
+                return 200, _select(result, _parse_fields(query['fields'])) if 'fields' in query else result
+            if event_id is None and method == 'POST':
+                event = dict(json.loads(body), id=uuid.uuid4().hex, status='confirmed')
+                if self.meeting_metadata:
+                    event = dict(_meeting_metadata(event['id']), **event)
+                calendar.add(event)
+                return 200, event
+            if event_id not in calendar.events:
+                return _error(410 if method == 'DELETE' else 404, 'deleted' if method == 'DELETE' else 'notFound',
+                              'Resource has been deleted' if method == 'DELETE' else 'Not Found')
+            if method == 'GET':
+                return 200, calendar.events[event_id]
+            if method in ('PUT', 'PATCH'):
+                event = calendar.remove(event_id)
+                updated = json.loads(body) if method == 'PUT' else dict(event, **json.loads(body))
+                updated = dict(updated, id=event_id, status='confirmed')
+                calendar.add(updated)
+                return 200, updated
+            if method == 'DELETE':
+                calendar.remove(event_id)
+                return 204, None
+        return _error(405, 'badRequest', f"Unsupported method {method}")
+
+    def _list(self, calendar, query):
+        page_size = min(int(query.get('maxResults', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        time_min = _utc(query['timeMin']) if 'timeMin' in query else None
+        time_max = _utc(query['timeMax']) if 'timeMax' in query else None
+        text = query.get('q', '').lower()
+
+        position = 0
+        if 'pageToken' in query:
+            start, event_id = json.loads(query['pageToken'])
+            position = bisect.bisect_right(calendar.order, (start, event_id))
+
+        items = []
+        last_key = None
+        while position < len(calendar.order) and len(items) < page_size:
+            key = calendar.order[position]
+            position += 1
+            if time_max is not None and key[0] >= time_max:
+                position = len(calendar.order)
+                break
+            event = calendar.events[key[1]]
+            if time_min is not None and _utc(event.get('end', event['start'])) <= time_min:
+                continue
+            if text and not any(text in event.get(field, '').lower()
+                                for field in ('summary', 'description', 'location')):
+                continue
+            items.append(event)
+            last_key = key
+
+        result = {'kind': 'calendar#events', 'items': items}
+        if position < len(calendar.order) and last_key is not None:
+            result['nextPageToken'] = json.dumps(list(last_key))
+        else:
+            result['nextSyncToken'] = f"{calendar.sync_epoch}:{calendar.sequence}"
+        return result
+
+    def _sync_list(self, calendar, query):
+        """List the changes since a sync token, including cancelled events, returning (status, body)"""
+        epoch, sequence = map(int, query['syncToken'].split(':'))
+        if epoch != calendar.sync_epoch:
+            return _error(410, 'fullSyncRequired', 'Sync token is no longer valid, a full sync is required.')
+        page_size = min(int(query.get('maxResults', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        # Pages continue after the last change returned, up to the change
+        # that was last when the first page was listed
+        cursor, last = json.loads(query['pageToken']) if 'pageToken' in query \
+            else (sequence, calendar.sequence)
+        changes = [(number, event) for number, event in calendar.changes_since(cursor) if number <= last]
+        page = changes[:page_size]
+        result = {'kind': 'calendar#events', 'items': [event for _, event in page]}
+        if len(changes) > page_size:
+            result['nextPageToken'] = json.dumps([page[-1][0], last])
+        else:
+            result['nextSyncToken'] = f"{epoch}:{last}"
+        return 200, result
+
+    def handle_batch(self, content_type, body):
+        """Handle a multipart/mixed batch request, returning (content type, body)"""
+        with self.lock:
+            self.stats['batches'] += 1
+        message = Parser().parsestr(f"Content-Type: {content_type}\r\n\r\n" + body)
+        boundary = uuid.uuid4().hex
+        parts = []
+        for part in message.get_payload():
+            request_line, rest = part.get_payload().split('\n', 1)
+            method, path, _ = request_line.split(' ', 2)
+            inner = Parser().parsestr(rest)
+            status, payload = self.handle(method, path, inner.get_payload() or None)
+            content = json.dumps(payload) if payload is not None else ''
+            # Long Content-IDs arrive folded over several lines
+            content_id = ' '.join(part['Content-ID'].split())
+            parts.append(
+                f"--{boundary}\r\n"
+                f"Content-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id[1:-1]}>\r\n\r\n"
+                f"HTTP/1.1 {status} {'OK' if status < 300 else 'Error'}\r\n"
+                f"Content-Type: application/json; charset=UTF-8\r\n"
+                f"Content-Length: {len(content.encode('utf-8'))}\r\n\r\n"
+                f"{content}\r\n")
+        return f"multipart/mixed; boundary={boundary}", ''.join(parts) + f"--{boundary}--\r\n"
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; avoid Nagle/delayed-ACK stalls
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _respond(self, status, content_type, body):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        if data and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            data = gzip.compress(data, compresslevel=6)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        api = self.server.api
+        with api.lock:
+            api.stats['bytes_sent'] += len(data)
+
+    def _handle(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length).decode('utf-8') if length else None
+        api = self.server.api
+        if api.latency:
+            time.sleep(api.latency)
+
+        if self.path.split('?')[0] == BATCH_PATH:
+            content_type, content = api.handle_batch(self.headers['Content-Type'], body)
+            self._respond(200, content_type, content)
+            return
+
+        status, payload = api.handle(self.command, self.path, body)
+        self._respond(status, 'application/json; charset=UTF-8', json.dumps(payload) if payload is not None else '')
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _handle
+
+class _Server(ThreadingHTTPServer):
+    # Async clients open many connections at once; the default backlog of 5
+    # drops their SYNs and stalls them for a retransmit timeout
+    request_queue_size = 1024
+
+class FakeCalendarServer:
+    """Run FakeCalendarApi on a local port in a background thread"""
+
+    def __init__(self, host='127.0.0.1', port=0, **options):
+        self.api = FakeCalendarApi(**options)
+        self.httpd = _Server((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.api = self.api
+        self.root_url = f"http://{host}:{self.httpd.server_address[1]}/"
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='fake-calendar', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
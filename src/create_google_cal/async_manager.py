@@ -0,0 +1,371 @@
+import asyncio
+import json
+import os
+import time
+import urllib.parse
+from datetime import datetime
+from .auth import get_credentials
+from .bulk import read_events_bulk
+from .calendar_manager import (COMMIT_INTERVAL, LIST_FIELDS, PAGE_SIZE, PREVIEW_LIMIT, PROGRESS_INTERVAL,
+                               _confirm, _describe, event_body)
+from .import_index import index_row
+from .metrics import Metrics
+from .pipeline import RowError, read_events
+from .ratelimit import CONCURRENCY, RATE, TokenBucket
+from .retry import MAX_RETRIES, backoff_delay, is_retryable_response
+
+try:
+    import httpx
+except ImportError:  # The async extra is not installed
+    httpx = None
+
+ROOT_URL = 'https://www.googleapis.com/'
+# Seconds before a stalled request is abandoned
+TIMEOUT = 60
+# Printed when --async is used without httpx
+INSTALL_HINT = "--async needs httpx; install the async extra with: uv sync --extra async"
+
+class ApiError(Exception):
+    """A Calendar API call that failed with an HTTP error status"""
+
+    def __init__(self, status, content):
+        self.status = status
+        self.content = content
+        try:
+            message = json.loads(content)['error']['message']
+        except (ValueError, KeyError, TypeError):
+            message = content[:200].decode('utf-8', 'replace')
+        super().__init__(f"HTTP {status}: {message}")
+
+class HttpxClient:
+    """Async HTTP client over httpx, with HTTP/2 when h2 is installed
+
+    request() returns (status, decoded body bytes); connections are kept
+    alive and shared by every request in flight.
+    """
+
+    def __init__(self, concurrency):
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        try:
+            self.client = httpx.AsyncClient(timeout=TIMEOUT, limits=limits, http2=True)
+        except ImportError:
+            self.client = httpx.AsyncClient(timeout=TIMEOUT, limits=limits)
+
+    async def request(self, method, url, headers, body=None):
+        response = await self.client.request(method, url, headers=headers, content=body)
+        return response.status_code, response.content
+
+    async def close(self):
+        await self.client.aclose()
+
+def new_client(concurrency=CONCURRENCY):
+    if httpx is None:
+        raise ImportError(INSTALL_HINT)
+    return HttpxClient(concurrency)
+
+class AsyncCalendarManager:
+    """Calendar operations run as coroutines on a single event loop
+
+    Up to concurrency requests are in flight at once, and a token bucket
+    paces them to rate requests per second (0 disables pacing) so a large
+    import or delete runs at the API quota without threads. Requests are
+    sent to the REST API directly, as googleapiclient requests cannot be
+    awaited. Rate limits and server errors are retried with backoff.
+
+    create_events_from_csv and delete_events_in_range take the same
+    arguments as CalendarManager's and run their coroutines to completion.
+    """
+
+    def __init__(self, creds=None, root_url=None, concurrency=CONCURRENCY, rate=RATE, metrics=None, quiet=False):
+        self.creds = creds or get_credentials()
+        self.root_url = root_url or ROOT_URL
+        self.concurrency = max(1, concurrency)
+        self.bucket = TokenBucket(rate) if rate else None
+        self.metrics = metrics or Metrics()
+        self.quiet = quiet
+        # Created on the running loop by open()
+        self._client = None
+        self._slots = None
+        self._refresh_lock = None
+
+    async def open(self):
+        self._client = new_client(self.concurrency)
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._refresh_lock = asyncio.Lock()
+        return self
+
+    async def close(self):
+        await self._client.close()
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _row(self, message):
+        """Print a per-row progress line unless quiet"""
+        if not self.quiet:
+            print(message)
+
+    def _events_url(self, calendar_id, event_id=None, params=None):
+        url = f"{self.root_url}calendar/v3/calendars/{urllib.parse.quote(calendar_id, safe='')}/events"
+        if event_id is not None:
+            url += '/' + urllib.parse.quote(event_id, safe='')
+        if params:
+            url += '?' + urllib.parse.urlencode({name: value for name, value in params.items() if value is not None})
+        return url
+
+    async def _refresh(self, stale_token):
+        """Refresh the access token once for all tasks that saw stale_token"""
+        async with self._refresh_lock:
+            if self.creds.token != stale_token and self.creds.valid:
+                return
+            from google.auth.transport.requests import Request
+            await asyncio.get_running_loop().run_in_executor(None, self.creds.refresh, Request())
+
+    async def _call(self, operation, method, url, body=None):
+        """Send one API request, retrying throttling and server errors, and return its JSON"""
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        attempt = 0
+        refreshed = False
+        while True:
+            if not self.creds.valid:
+                await self._refresh(self.creds.token)
+            token = self.creds.token
+            headers = {'Authorization': f"Bearer {token}"}
+            if data is not None:
+                headers['Content-Type'] = 'application/json'
+            if self.bucket is not None:
+                await self.bucket.acquire()
+
+            status = None
+            content = b''
+            started = time.perf_counter()
+            async with self._slots:
+                try:
+                    status, content = await self._client.request(method, url, headers, data)
+                except Exception as e:
+                    error = e
+                else:
+                    error = None
+                finally:
+                    self.metrics.record_call(operation, time.perf_counter() - started, status,
+                                             len(data or b''), len(content))
+
+            if error is None and status == 401 and not refreshed:
+                refreshed = True
+                await self._refresh(token)
+                continue
+            if error is None and status >= 400:
+                error = ApiError(status, content)
+            retryable = error is not None and (status is None or is_retryable_response(status, content))
+            if retryable and attempt < MAX_RETRIES:
+                self.metrics.retry(operation)
+                # Back off without holding a slot, so other requests keep going
+                await asyncio.sleep(backoff_delay(attempt))
+                attempt += 1
+                continue
+
+            self.metrics.record_request(operation, error)
+            if error is not None:
+                raise error
+            return json.loads(content) if content else None
+
+    async def insert_event(self, calendar_id, event):
+        return await self._call('insert', 'POST', self._events_url(calendar_id), event)
+
+    async def update_event(self, calendar_id, event_id, event):
+        return await self._call('update', 'PUT', self._events_url(calendar_id, event_id), event)
+
+    async def delete_event(self, calendar_id, event_id):
+        """Delete an event; one that is already gone (404/410) counts as deleted"""
+        try:
+            await self._call('delete', 'DELETE', self._events_url(calendar_id, event_id))
+        except ApiError as e:
+            if e.status not in (404, 410):
+                raise
+
+    async def list_events(self, start_date, end_date, calendar_id='primary', page_size=PAGE_SIZE,
+                          fields=LIST_FIELDS, query=None, match=None):
+        """Yield events in the date range page by page, like CalendarManager.iter_events"""
+        params = {
+            'timeMin': datetime.combine(start_date, datetime.min.time()).isoformat() + 'Z',
+            'timeMax': datetime.combine(end_date, datetime.max.time()).isoformat() + 'Z',
+            'singleEvents': 'true',
+            'orderBy': 'startTime',
+            'maxResults': page_size,
+            'q': query,
+            'fields': fields,
+        }
+        while True:
+            result = await self._call('list', 'GET', self._events_url(calendar_id, params=params))
+            for event in result.get('items', []):
+                if match is None or match.search(event.get('summary', '')):
+                    yield event
+            params['pageToken'] = result.get('nextPageToken')
+            if not params['pageToken']:
+                return
+
+    async def _bounded(self, tasks, coroutine):
+        """Start coroutine as a task once fewer than twice concurrency tasks are pending"""
+        while len(tasks) >= self.concurrency * 2:
+            _, tasks_left = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            tasks.intersection_update(tasks_left)
+        tasks.add(asyncio.create_task(coroutine))
+
+    async def import_csv(self, filename, index=None, calendars=None, default_calendar='primary', journal=None,
+                         resume=False, bulk=False):
+        """Coroutine behind create_events_from_csv"""
+        source = os.path.abspath(filename)
+        stats = {'created': 0, 'updated': 0, 'unchanged': 0, 'removed': 0, 'failed': 0}
+        occurrences = {}
+        tasks = set()
+
+        start_offset = None
+        start_row = 0
+        if journal is not None:
+            start_offset, start_row = journal.begin(resume, occurrences)
+
+        async def save(record, event, key, fingerprint, existing, group):
+            try:
+                if existing:
+                    response = await self.update_event(record.calendar_id, existing[1], event)
+                else:
+                    response = await self.insert_event(record.calendar_id, event)
+            except Exception as e:
+                stats['failed'] += 1
+                print(f"Error creating event for row {record.row_num}: {e}")
+                if existing and getattr(e, 'status', None) in (404, 410):
+                    # The event was removed outside this tool; recreate it next run
+                    index.remove(key)
+                return
+            if index is not None:
+                index.record(key, fingerprint, response['id'], record.calendar_id, source)
+            if journal is not None:
+                journal.record(record, response['id'], group)
+            self.metrics.count('rows')
+            if existing:
+                stats['updated'] += 1
+                self._row(f"Updated: {record.label}")
+            else:
+                stats['created'] += 1
+                self._row(f"Created: {record.label}")
+
+        reader = read_events_bulk if bulk else read_events
+        try:
+            for record in reader(filename, calendars, default_calendar, start_offset, start_row):
+                done = journal is not None and journal.is_done(record.offset)
+                if isinstance(record, RowError):
+                    if not done:
+                        print(f"Error creating event for row {record.row_num}: {record.message}")
+                        if journal is not None:
+                            journal.record(record)
+                    continue
+
+                event = event_body(record)
+                key = fingerprint = existing = group = None
+                if index is not None:
+                    key, fingerprint, group = index_row(source, record.calendar_id, event, occurrences)
+                    if done:
+                        continue
+                    existing = index.lookup(key)
+                    if existing and existing[0] == fingerprint:
+                        stats['unchanged'] += 1
+                        if journal is not None:
+                            journal.record(record, existing[1], group)
+                        continue
+                    if record.row_num % COMMIT_INTERVAL == 0:
+                        index.commit()
+                elif done:
+                    continue
+                await self._bounded(tasks, save(record, event, key, fingerprint, existing, group))
+        finally:
+            if tasks:
+                await asyncio.wait(tasks)
+
+        print(f"\nTotal events created: {stats['created']}")
+        if index is not None:
+            index.commit()
+            print(f"Updated: {stats['updated']}, unchanged: {stats['unchanged']}, removed: {stats['removed']}")
+        if journal is not None:
+            journal.finish(stats['failed'])
+        return stats['created']
+
+    async def delete_range(self, start_date, end_date, force=False, calendar_id='primary', query=None, match=None):
+        """Coroutine behind delete_events_in_range"""
+        print(f"Searching for events in {calendar_id} between {start_date} and {end_date}...")
+        if not force:
+            total = 0
+            async for event in self.list_events(start_date, end_date, calendar_id, query=query, match=match):
+                total += 1
+                if total <= PREVIEW_LIMIT:
+                    print(f"  - {_describe(event)}")
+            if not total:
+                print("No events found in the specified date range.")
+                return 0
+            if total > PREVIEW_LIMIT:
+                print(f"  ... and {total - PREVIEW_LIMIT} more")
+            if not _confirm(f"\nAre you sure you want to delete these {total} events? (y/N): "):
+                print("Deletion cancelled.")
+                return 0
+
+        deleted = []
+        failed_ids = set()
+
+        async def delete(event):
+            try:
+                await self.delete_event(calendar_id, event['id'])
+            except Exception as e:
+                failed_ids.add(event['id'])
+                print(f"Error deleting event {event.get('summary', 'No title')}: {e}")
+                return
+            deleted.append(event['id'])
+            self.metrics.count('deleted')
+            if len(deleted) <= PREVIEW_LIMIT:
+                self._row(f"Deleted: {event.get('summary', 'No title')}")
+            elif len(deleted) % PROGRESS_INTERVAL == 0:
+                self._row(f"Deleted {len(deleted)} events so far...")
+
+        # As in CalendarManager, rescan until a pass finds nothing left
+        while True:
+            before = len(deleted)
+            tasks = set()
+            try:
+                async for event in self.list_events(start_date, end_date, calendar_id, query=query, match=match):
+                    if event['id'] not in failed_ids:
+                        await self._bounded(tasks, delete(event))
+            finally:
+                if tasks:
+                    await asyncio.wait(tasks)
+            if len(deleted) == before:
+                break
+
+        found = len(deleted) + len(failed_ids)
+        if not found:
+            print("No events found in the specified date range.")
+            return 0
+        print(f"\nTotal events deleted: {len(deleted)} of {found}")
+        return len(deleted)
+
+    async def _run(self, coroutine):
+        async with self:
+            return await coroutine
+
+    def create_events_from_csv(self, filename, index=None, calendars=None, default_calendar='primary',
+                               journal=None, resume=False, bulk=False, **options):
+        """Import a CSV file on a new event loop; see import_csv
+
+        Batching, compression and pruning are CalendarManager features;
+        passing them enabled raises ValueError.
+        """
+        unsupported = [name for name in ('prune', 'compress') if options.get(name)]
+        if unsupported:
+            raise ValueError(f"{', '.join(unsupported)} is not supported by the async engine")
+        return asyncio.run(self._run(self.import_csv(filename, index, calendars, default_calendar, journal,
+                                                     resume, bulk)))
+
+    def delete_events_in_range(self, start_date, end_date, force=False, workers=None, calendar_id='primary',
+                               query=None, match=None):
+        """Delete events in a date range on a new event loop; workers is ignored for concurrency"""
+        return asyncio.run(self._run(self.delete_range(start_date, end_date, force, calendar_id, query, match)))
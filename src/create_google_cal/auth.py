@@ -1,8 +1,5 @@
 import os.path
 import json
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
 
 SCOPES = ['https://www.googleapis.com/auth/calendar']
 
@@ -54,15 +51,24 @@ def setup_credentials_help():
     print("       └── gcal.py")
     print("\n" + "="*60)
 
-def get_credentials():
-    """Get valid Google API credentials"""
+def get_credentials(refresh_ahead=True):
+    """Get valid Google API credentials
+    
+    With refresh_ahead, a background thread refreshes the token before it
+    expires, so long imports never run into an expired token.
+    """
+    # The Google auth stack is slow to import; only load it when authenticating
+    from google.auth.transport.requests import Request
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from .shared_credentials import SharedCredentials
+    
     creds = None
     
     # Check if token.json exists (saved credentials)
     token_path = os.path.join('..', 'config', 'token.json')
     if os.path.exists(token_path):
         try:
-            creds = Credentials.from_authorized_user_file(token_path, SCOPES)
+            creds = SharedCredentials.load(token_path, SCOPES)
         except Exception as e:
             print(f"Warning: Could not load existing token ({e}). Will create new one.")
             # Remove corrupted token file
@@ -71,8 +77,9 @@ def get_credentials():
     
     # If no valid credentials, get new ones
     if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
+        if creds and creds.refresh_token:
             try:
+                # Adopts the token if another gcal process just refreshed it
                 creds.refresh(Request())
             except Exception as e:
                 print(f"Warning: Could not refresh token ({e}). Will create new one.")
@@ -94,6 +101,7 @@ def get_credentials():
                 flow = InstalledAppFlow.from_client_secrets_file(
                     credentials_path, SCOPES)
                 creds = flow.run_local_server(port=0)
+                creds = SharedCredentials.from_info(json.loads(creds.to_json()), token_path, SCOPES)
                 print("✅ Authorization successful!")
             except Exception as e:
                 print(f"❌ Authorization failed: {e}")
@@ -103,8 +111,9 @@ def get_credentials():
                 print("   - Verify your email is added as a test user in OAuth consent screen")
                 raise
         
-        # Save credentials for next run
-        with open(token_path, 'w') as token:
-            token.write(creds.to_json())
+            # Save credentials for next run
+            creds.save()
     
+    if refresh_ahead:
+        creds.start_refresher()
     return creds
\ No newline at end of file
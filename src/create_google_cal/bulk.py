@@ -0,0 +1,246 @@
+import csv
+import gc
+from contextlib import contextmanager
+from datetime import datetime
+from functools import partial
+from itertools import accumulate, chain, islice
+from operator import itemgetter
+from .pipeline import EventRecord, RowError, header_columns
+from .utils import DateTimeParser
+
+# Bytes read from the CSV file at a time
+BLOCK_BYTES = 1 << 20
+# Rows converted together, column by column
+CHUNK_ROWS = 50000
+
+# Builds an EventRecord from a tuple of its fields without a Python-level call
+_make_record = partial(tuple.__new__, EventRecord)
+
+def _numpy():
+    """Return the numpy module, or None when it is not installed"""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+@contextmanager
+def _gc_paused():
+    """Suspend the cyclic garbage collector
+
+    Building a chunk allocates hundreds of thousands of tuples, each pass
+    of the collector over them costs more than the conversion itself, and
+    none of them form reference cycles.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+def _block_lines(csvfile, ends):
+    """Yield the lines of a binary file as text, reading it in large blocks
+
+    Appends the byte offset where each line ends to ends, whose first item
+    is the offset reading started at.
+    """
+    while True:
+        data = csvfile.read(BLOCK_BYTES)
+        if not data:
+            return
+        if not data.endswith(b'\n'):
+            # Finish the last line; a newline byte never splits a UTF-8 character
+            data += csvfile.readline()
+        lines = data.decode('utf-8').split('\n')
+        tail = lines.pop()
+        lines = [line + '\n' for line in lines]
+        if tail:
+            lines.append(tail)
+        if data.isascii():
+            sizes = map(len, lines)
+        else:
+            sizes = (len(line.encode('utf-8')) for line in lines)
+        ends.extend(map(ends[-1].__add__, accumulate(sizes)))
+        yield from lines
+
+def _row_chunks(csvfile, start_offset=None, start_row=0):
+    """Read the header of a CSV file opened in binary mode and return (columns, chunks)
+
+    chunks yields (rows, row_nums, offsets, next_offsets) lists for up to
+    CHUNK_ROWS non-blank rows at a time, with the same row numbers and byte
+    ranges as pipeline.read_events. Returns None for an empty file.
+    """
+    ends = [0]
+    reader = csv.reader(_block_lines(csvfile, ends))
+    header = next(reader, None)
+    if header is None:
+        return None
+    columns = header_columns(header)
+
+    line = reader.line_num
+    first_row = 0
+    if start_offset is not None:
+        csvfile.seek(start_offset)
+        ends = [start_offset]
+        reader = csv.reader(_block_lines(csvfile, ends))
+        line = 0
+        first_row = start_row
+
+    def chunks():
+        first = line
+        # ends[i] is the offset after line number trimmed + i
+        trimmed = 0
+        offset = ends[first]
+        while True:
+            rows = list(islice(reader, CHUNK_ROWS))
+            if not rows:
+                return
+            last = reader.line_num
+            if last - first == len(rows):
+                row_nums = list(range(first_row + first + 1, first_row + last + 1))
+                next_offsets = ends[first + 1 - trimmed:last + 1 - trimmed]
+            else:
+                # Quoted fields spanning several lines keep their newlines
+                row_lines = list(accumulate((1 + sum(field.count('\n') for field in row) for row in rows),
+                                            initial=first))[1:]
+                row_nums = [first_row + row_line for row_line in row_lines]
+                next_offsets = [ends[row_line - trimmed] for row_line in row_lines]
+
+            if all(rows):
+                offsets = [offset] + next_offsets[:-1]
+                offset = next_offsets[-1]
+            else:
+                # Blank lines are folded into the row after them
+                kept = []
+                for row, row_num, next_offset in zip(rows, row_nums, next_offsets):
+                    if row:
+                        kept.append((row, row_num, offset, next_offset))
+                        offset = next_offset
+                rows, row_nums, offsets, next_offsets = (list(column) for column in zip(*kept)) if kept else ([],) * 4
+
+            del ends[:last - trimmed]
+            trimmed = first = last
+            if rows:
+                yield rows, row_nums, offsets, next_offsets
+
+    return columns, chunks()
+
+def _factorize(values):
+    """Return (distinct values in first-seen order, code of each value)"""
+    distinct = list(dict.fromkeys(values))
+    index = {value: code for code, value in enumerate(distinct)}
+    return distinct, list(map(index.__getitem__, values))
+
+def _column(values):
+    """Return (distinct stripped values, code of each row's value) for one column"""
+    distinct, codes = _factorize(values)
+    return [value.strip() for value in distinct], codes
+
+def _parse_distinct(values, parse):
+    """Parse each distinct value once, returning (results, error messages)"""
+    results = []
+    errors = []
+    for value in values:
+        try:
+            results.append(parse(value))
+            errors.append(None)
+        except ValueError as e:
+            results.append(None)
+            errors.append(str(e))
+    return results, errors
+
+def _combine(numpy, dates, date_codes, times, time_codes):
+    """Build each row's datetime from distinct dates and times and per-row codes
+
+    Rows whose date or time failed to parse get None.
+    """
+    if numpy is not None:
+        days = numpy.array([day if day is not None else 'NaT' for day in dates], dtype='datetime64[us]')
+        seconds = numpy.array([t.hour * 3600 + t.minute * 60 + t.second if t is not None else 0 for t in times],
+                              dtype='int64').astype('timedelta64[s]')
+        parsed = numpy.array([t is not None for t in times], dtype=bool)
+        time_index = numpy.asarray(time_codes, dtype=numpy.intp)
+        stamps = days[numpy.asarray(date_codes, dtype=numpy.intp)] + seconds[time_index]
+        stamps[~parsed[time_index]] = numpy.datetime64('NaT')
+        # datetime64[us] values convert to datetime.datetime, NaT to None
+        return stamps.tolist()
+
+    # Rosters repeat the same date and time pairs, so combine each pair once
+    pairs, pair_codes = _factorize(list(zip(date_codes, time_codes)))
+    combine = datetime.combine
+    combined = [combine(dates[d], times[t]) if dates[d] is not None and times[t] is not None else None
+                for d, t in pairs]
+    return list(map(combined.__getitem__, pair_codes))
+
+def _convert_chunk(chunk, columns, parser, calendar_ids, default_calendar, numpy):
+    """Convert a chunk from _row_chunks into EventRecord and RowError items, in row order"""
+    rows, row_nums, offsets, next_offsets = chunk
+    date_col, start_col, end_col, name_col, calendar_col, width = columns
+    needed = max(col for col in columns[:5] if col is not None) + 1
+    if min(map(len, rows)) < needed:
+        complete = [i for i, row in enumerate(rows) if len(row) >= needed]
+        converted = []
+        if complete:
+            converted = _convert_chunk([[part[i] for i in complete] for part in chunk],
+                                       columns, parser, calendar_ids, default_calendar, numpy)
+        short = [RowError(row_num, f"expected {width} fields, found {len(row)}", offset, next_offset)
+                 for row, row_num, offset, next_offset in zip(*chunk) if len(row) < needed]
+        return sorted(chain(converted, short), key=itemgetter(0))
+
+    # Transposing stops at the shortest row, which has every needed field
+    fields = list(zip(*rows))
+    dates, date_codes = _column(fields[date_col])
+    start_times, start_codes = _column(fields[start_col])
+    end_times, end_codes = _column(fields[end_col])
+    parsed_dates, date_errors = _parse_distinct(dates, parser.dates.parse)
+    parsed_starts, start_errors = _parse_distinct(start_times, parser.times.parse)
+    parsed_ends, end_errors = _parse_distinct(end_times, parser.times.parse)
+    starts = _combine(numpy, parsed_dates, date_codes, parsed_starts, start_codes)
+    ends = _combine(numpy, parsed_dates, date_codes, parsed_ends, end_codes)
+
+    names = list(map(str.strip, fields[name_col]))
+    if calendar_col is None:
+        calendars = [default_calendar] * len(rows)
+    else:
+        distinct, codes = _column(fields[calendar_col])
+        resolved = [calendar_ids.get(value, value) or default_calendar for value in distinct]
+        calendars = list(map(resolved.__getitem__, codes))
+    labels = [f"{name} on {date} from {start} to {end}"
+              for name, date, start, end in zip(names, map(dates.__getitem__, date_codes),
+                                                map(start_times.__getitem__, start_codes),
+                                                map(end_times.__getitem__, end_codes))]
+    records = list(map(_make_record, zip(row_nums, names, starts, ends, labels, calendars, offsets, next_offsets)))
+    if not any(date_errors) and not any(start_errors) and not any(end_errors):
+        return records
+
+    # Report the first failure in the order parse_datetime meets them
+    messages = [date_errors[d] or start_errors[s] or end_errors[e]
+                for d, s, e in zip(date_codes, start_codes, end_codes)]
+    return [record if message is None else RowError(record.row_num, message, record.offset, record.next_offset)
+            for record, message in zip(records, messages)]
+
+def read_events_bulk(filename, calendars=None, default_calendar='primary', start_offset=None, start_row=0):
+    """Yield the same items as pipeline.read_events, converting CHUNK_ROWS rows at a time
+
+    The file is read in large blocks and each chunk of rows is split into
+    columns. Every distinct date and time string is parsed once, and start
+    and end datetimes are built with NumPy datetime64 arithmetic when NumPy
+    is installed, or once per distinct date and time pair otherwise.
+    """
+    calendars = calendars or {}
+    parser = DateTimeParser()
+    numpy = _numpy()
+    with open(filename, 'rb') as csvfile:
+        opened = _row_chunks(csvfile, start_offset, start_row)
+        if opened is None:
+            return
+        columns, chunks = opened
+        while True:
+            with _gc_paused():
+                chunk = next(chunks, None)
+                if chunk is None:
+                    return
+                items = _convert_chunk(chunk, columns, parser, calendars, default_calendar, numpy)
+            yield from items
@@ -1,106 +1,1058 @@
 import csv
 import os
-from datetime import datetime
-from googleapiclient.discovery import build
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from itertools import islice
+from zoneinfo import ZoneInfo
 from .auth import get_credentials
-from .utils import parse_datetime
+from .bulk import read_events_bulk
+from .conflicts import Interval, csv_rows, find_conflicts, report_conflicts
+from .import_index import covering_series, index_row, row_fingerprint, series_key
+from .metrics import Metrics, request_operation
+from .pipeline import REQUIRED_COLUMNS, RowError, prefetch, read_events
+from .recurrence import find_series, recurrence_lines, series_pattern
+from .retry import MAX_RETRIES, backoff_delay, error_status, execute_with_retry, is_daily_limit, is_retryable
+from .transport import HttpPool, build_service
+
+# The Calendar API accepts at most 50 calls in a single batch request
+BATCH_SIZE = 50
+# Events per events().list page (the API maximum is 2500)
+PAGE_SIZE = 250
+# Exports fetch the largest pages to make the fewest round trips
+EXPORT_PAGE_SIZE = 2500
+# Bytes buffered before an export writes to its CSV file
+EXPORT_BUFFER = 1 << 20
+# Partial response for range scans; descriptions, attendees and
+# conferencing data are never downloaded
+LIST_FIELDS = 'nextPageToken,items(id,summary,start,end)'
+# Events listed individually before switching to a count summary
+PREVIEW_LIMIT = 20
+PROGRESS_INTERVAL = 100
+# Concurrent delete requests; throttling is handled by retry backoff
+WORKERS = 4
+# Seconds a calendar's queue waits for a full batch before sending a partial one
+BATCH_WAIT = 0.05
+# Rows between import index commits
+COMMIT_INTERVAL = 500
+# Rows a worker process parses at a time when importing several files
+PARSE_CHUNK_ROWS = 50000
+# Time zone of the times in CSV files
+TIME_ZONE = 'America/Los_Angeles'  # Change to your timezone
+
+def _matches_query(event, query):
+    """Approximate the API's q= free-text filter for cached events"""
+    query = query.lower()
+    return any(query in event.get(field, '').lower() for field in ('summary', 'description', 'location'))
+
+def _describe(event):
+    """Return a one-line 'summary (start)' description of an event"""
+    start = event['start'].get('dateTime', event['start'].get('date'))
+    return f"{event.get('summary', 'No title')} ({start})"
+
+def _local_time(when):
+    """Return an API event start/end as a naive datetime in TIME_ZONE, or None for all-day events"""
+    if 'dateTime' not in when:
+        return None
+    parsed = datetime.fromisoformat(when['dateTime'].replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(ZoneInfo(TIME_ZONE)).replace(tzinfo=None)
+    return parsed
+
+def _event_key(event):
+    """Return the (start, end, summary) key an API event is matched to CSV rows by"""
+    return (_local_time(event['start']), _local_time(event['end']), event.get('summary', ''))
+
+def event_body(record):
+    """Build the API event body for an EventRecord"""
+    return {
+        'summary': record.summary,
+        'start': {
+            'dateTime': record.start.isoformat(),
+            'timeZone': TIME_ZONE,
+        },
+        'end': {
+            'dateTime': record.end.isoformat(),
+            'timeZone': TIME_ZONE,
+        },
+    }
+
+def _clock(when):
+    """Format a time as HH:MM, or HH:MM:SS when it has seconds"""
+    return when.strftime('%H:%M:%S' if when.second else '%H:%M')
+
+def _confirm(prompt):
+    """Ask a yes/no question, defaulting to no"""
+    answer = input(prompt)
+    return answer.lower() in ['y', 'yes']
+
+def _parse_chunk(filename, calendars=None, default_calendar='primary', bulk=False, start_offset=None, start_row=0,
+                 limit=PARSE_CHUNK_ROWS):
+    """Read and validate up to limit rows of a CSV file in a worker process
+    
+    Returns the rows and whether the file has more after them.
+    """
+    reader = read_events_bulk if bulk else read_events
+    items = list(islice(reader(filename, calendars, default_calendar, start_offset, start_row), limit + 1))
+    return items[:limit], len(items) > limit
 
 class CalendarManager:
-    def __init__(self):
-        self.creds = get_credentials()
-        self.service = build('calendar', 'v3', credentials=self.creds)
+    def __init__(self, cache=None, creds=None, root_url=None, metrics=None, quiet=False, scheduler=None):
+        self.creds = creds or get_credentials()
+        # Optional ratelimit.QuotaScheduler pacing every request to the API quota
+        self.scheduler = scheduler
+        # Latency, retries, bytes and row counts of every API call
+        self.metrics = metrics or Metrics()
+        # Skip the per-row "Created:"/"Deleted:" lines
+        self.quiet = quiet
+        self.service = build_service(self.creds, root_url=root_url, metrics=self.metrics)
+        # Building a Resource regenerates every method from the discovery
+        # document, so build the events collection once and reuse it
+        self._events = self.service.events()
+        # Transports for worker threads, reused across operations
+        self.http_pool = HttpPool(self.creds, self.metrics)
+        # Optional EventCache answering range scans locally
+        self.cache = cache
+        self._synced_calendars = set()
+    
+    def _row(self, message):
+        """Print a per-row progress line unless quiet"""
+        if not self.quiet:
+            print(message)
+    
+    def _execute(self, request, http=None):
+        """Execute a request with execute_with_retry, recording it and its retries in metrics
+        
+        With a scheduler, a request refused for the daily quota is sent
+        again once the next quota day starts, as in _flush.
+        """
+        operation = request_operation(request)
+        while True:
+            if self.scheduler is not None:
+                self.scheduler.acquire()
+            try:
+                response = execute_with_retry(request, http=http,
+                                              on_retry=lambda error: self.metrics.retry(operation))
+            except Exception as e:
+                if self.scheduler is not None and is_daily_limit(e):
+                    # acquire() waits for the next quota day
+                    self.scheduler.hold()
+                    continue
+                self.metrics.record_request(operation, e)
+                raise
+            self.metrics.record_request(operation)
+            return response
+    
+    def _delete_event(self, event, calendar_id='primary', http=None):
+        """Delete a single event, retrying on rate limits and server errors"""
+        request = self._events.delete(calendarId=calendar_id, eventId=event['id'])
+        self._execute(request, http=http)
     
-    def delete_events_in_range(self, start_date, end_date, force=False):
-        """Delete all events in the specified date range"""
+    def _delete_stream(self, events, calendar_id='primary', workers=1):
+        """Delete events from an iterable, yielding (event, error) as each finishes
+        
+        With more than one worker, deletes run on a bounded thread pool that
+        never holds more than two requests per worker in flight.
+        """
+        if workers <= 1:
+            for event in events:
+                try:
+                    self._delete_event(event, calendar_id)
+                    yield event, None
+                except Exception as e:
+                    yield event, e
+            return
+        
+        def delete_in_worker(event):
+            with self.http_pool.connection() as http:
+                self._delete_event(event, calendar_id, http=http)
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            in_flight = {}
+            for event in events:
+                in_flight[executor.submit(delete_in_worker, event)] = event
+                if len(in_flight) >= workers * 2:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield in_flight.pop(future), future.exception()
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield in_flight.pop(future), future.exception()
+    
+    def sync_cache(self, calendar_id='primary'):
+        """Fetch changes since the last sync into the event cache"""
+        changed = self.cache.sync(self.service, calendar_id, execute=self._execute)
+        self._synced_calendars.add(calendar_id)
+        print(f"Event cache for {calendar_id} synced ({changed} changes)")
+        return changed
+    
+    def iter_events(self, start_date, end_date, page_size=PAGE_SIZE, calendar_id='primary',
+                    fields=LIST_FIELDS, query=None, match=None):
+        """Yield events in the date range, fetching one page at a time
+        
+        Only the fields in the partial-response mask are downloaded. query
+        is passed to the API as a q= free-text filter, and match is a
+        compiled regex that event titles must match, checked as events
+        stream in. With an event cache, the cache is synced once per run
+        and the range is read locally instead.
+        """
+        if match is not None:
+            events = self.iter_events(start_date, end_date, page_size, calendar_id, fields, query)
+            yield from (event for event in events if match.search(event.get('summary', '')))
+            return
+        
         # Convert dates to RFC3339 format for API
         start_datetime = datetime.combine(start_date, datetime.min.time())
         end_datetime = datetime.combine(end_date, datetime.max.time())
         
+        if self.cache is not None:
+            if calendar_id not in self._synced_calendars:
+                self.sync_cache(calendar_id)
+            events = self.cache.events_in_range(start_datetime, end_datetime, calendar_id)
+            if query:
+                events = (event for event in events if _matches_query(event, query))
+            yield from events
+            return
+        
         start_rfc = start_datetime.isoformat() + 'Z'
         end_rfc = end_datetime.isoformat() + 'Z'
         
-        print(f"Searching for events between {start_date} and {end_date}...")
-        
-        # Get events in the date range
-        events_result = self.service.events().list(
-            calendarId='primary',
-            timeMin=start_rfc,
-            timeMax=end_rfc,
-            singleEvents=True,
-            orderBy='startTime'
-        ).execute()
+        page_token = None
+        while True:
+            events_result = self._execute(self._events.list(
+                calendarId=calendar_id,
+                timeMin=start_rfc,
+                timeMax=end_rfc,
+                singleEvents=True,
+                orderBy='startTime',
+                maxResults=page_size,
+                pageToken=page_token,
+                q=query,
+                fields=fields
+            ))
+            
+            yield from events_result.get('items', [])
+            
+            page_token = events_result.get('nextPageToken')
+            if not page_token:
+                return
+    
+    def export_csv(self, start_date, end_date, filename, calendar_id='primary', query=None, match=None):
+        """Write the events in a date range to a CSV file that create_events_from_csv reads back
         
-        events = events_result.get('items', [])
+        Rows are written as each page of events arrives, so memory use does
+        not grow with the range. Times are in TIME_ZONE. All-day events and
+        events ending on a later day have no row in the CSV format and are
+        skipped. query and match narrow the events exported (see
+        iter_events). Returns the number of events written.
+        """
+        written = 0
+        skipped = 0
+        with open(filename, 'w', newline='', encoding='utf-8', buffering=EXPORT_BUFFER) as f:
+            writer = csv.writer(f)
+            writer.writerow(REQUIRED_COLUMNS)
+            for event in self.iter_events(start_date, end_date, EXPORT_PAGE_SIZE, calendar_id, query=query,
+                                          match=match):
+                start, end, summary = _event_key(event)
+                if start is None or end is None or end.date() != start.date():
+                    skipped += 1
+                    continue
+                writer.writerow((start.date().isoformat(), _clock(start), _clock(end), summary))
+                written += 1
+                self.metrics.count('exported')
         
-        if not events:
-            print("No events found in the specified date range.")
-            return 0
+        print(f"Exported {written} events from {calendar_id} to {filename}")
+        if skipped:
+            print(f"Skipped {skipped} all-day or multi-day events")
+        return written
+    
+    def delete_events_in_range(self, start_date, end_date, force=False, workers=WORKERS, calendar_id='primary',
+                               query=None, match=None):
+        """Delete all events in the specified date range
         
-        print(f"Found {len(events)} events to delete:")
-        for event in events:
-            start = event['start'].get('dateTime', event['start'].get('date'))
-            print(f"  - {event.get('summary', 'No title')} ({start})")
+        Events are streamed page by page, so memory use does not grow with
+        the size of the range. Without force, a preview pass counts the
+        events before asking for confirmation. Deletes run on up to
+        workers threads. query and match narrow the events deleted (see
+        iter_events).
+        """
+        print(f"Searching for events in {calendar_id} between {start_date} and {end_date}...")
+        if query:
+            print(f"  containing text: {query}")
+        if match is not None:
+            print(f"  with titles matching: {match.pattern}")
         
         # Ask for confirmation unless force flag is used
         if not force:
-            confirm = input(f"\nAre you sure you want to delete these {len(events)} events? (y/N): ")
-            if confirm.lower() not in ['y', 'yes']:
+            total = 0
+            for event in self.iter_events(start_date, end_date, calendar_id=calendar_id, query=query, match=match):
+                total += 1
+                if total <= PREVIEW_LIMIT:
+                    print(f"  - {_describe(event)}")
+            
+            if not total:
+                print("No events found in the specified date range.")
+                return 0
+            
+            if total > PREVIEW_LIMIT:
+                print(f"  ... and {total - PREVIEW_LIMIT} more")
+            print(f"Found {total} events to delete.")
+            
+            if not _confirm(f"\nAre you sure you want to delete these {total} events? (y/N): "):
                 print("Deletion cancelled.")
                 return 0
         
-        # Delete events
+        # Delete events as each page arrives. Page tokens are not guaranteed
+        # to be stable while events are removed behind them, so rescan until
+        # a pass finds nothing left to delete.
         deleted_count = 0
-        for event in events:
-            try:
-                self.service.events().delete(calendarId='primary', eventId=event['id']).execute()
-                print(f"Deleted: {event.get('summary', 'No title')}")
+        failed_ids = set()
+        while True:
+            pass_deleted = 0
+            events = (event for event in self.iter_events(start_date, end_date, calendar_id=calendar_id,
+                                                          query=query, match=match)
+                      if event['id'] not in failed_ids)
+            for event, error in self._delete_stream(events, calendar_id, workers=workers):
+                if error is not None:
+                    failed_ids.add(event['id'])
+                    print(f"Error deleting event {event.get('summary', 'No title')}: {error}")
+                    continue
                 deleted_count += 1
-            except Exception as e:
-                print(f"Error deleting event {event.get('summary', 'No title')}: {e}")
+                pass_deleted += 1
+                self.metrics.count('deleted')
+                if self.cache is not None:
+                    self.cache.remove(event['id'], calendar_id)
+                if deleted_count <= PREVIEW_LIMIT:
+                    self._row(f"Deleted: {event.get('summary', 'No title')}")
+                elif deleted_count % PROGRESS_INTERVAL == 0:
+                    self._row(f"Deleted {deleted_count} events so far...")
+            if not pass_deleted:
+                break
+        
+        if self.cache is not None:
+            self.cache.commit()
+        
+        found_count = deleted_count + len(failed_ids)
+        if not found_count:
+            print("No events found in the specified date range.")
+            return 0
         
-        print(f"\nTotal events deleted: {deleted_count}")
+        print(f"\nTotal events deleted: {deleted_count} of {found_count}")
         return deleted_count
     
-    def create_events_from_csv(self, filename):
-        """Create events from CSV file"""
-        events_created = 0
+    def _execute_requests(self, requests, batch_size=BATCH_SIZE, http=None):
+        """Execute (request_id, request) pairs, in batches when batch_size > 1
         
-        with open(filename, 'r', newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            
-            for row in reader:
+        Returns {request_id: (response, error)} so every sub-response can be
+        mapped back to the row that produced it.
+        """
+        results = {}
+        if batch_size <= 1:
+            for request_id, request in requests:
+                if self.scheduler is not None:
+                    self.scheduler.acquire()
                 try:
-                    # Parse the CSV data
-                    date = row['date'].strip()
-                    start_time = row['start time'].strip()
-                    end_time = row['end time'].strip()
-                    event_name = row['event name'].strip()
-                    
-                    # Convert to datetime objects
-                    start_datetime = parse_datetime(date, start_time)
-                    end_datetime = parse_datetime(date, end_time)
-                    
-                    # Create the event
-                    event = {
-                        'summary': event_name,
-                        'start': {
-                            'dateTime': start_datetime.isoformat(),
-                            'timeZone': 'America/Los_Angeles',  # Change to your timezone
-                        },
-                        'end': {
-                            'dateTime': end_datetime.isoformat(),
-                            'timeZone': 'America/Los_Angeles',  # Change to your timezone
-                        },
-                    }
-                    
-                    # Insert the event
-                    created_event = self.service.events().insert(calendarId='primary', body=event).execute()
-                    print(f"Created: {event_name} on {date} from {start_time} to {end_time}")
-                    events_created += 1
-                    
+                    results[request_id] = (request.execute(http=http), None)
                 except Exception as e:
-                    print(f"Error creating event for row {row}: {e}")
+                    results[request_id] = (None, e)
+            return results
+        
+        def callback(request_id, response, exception):
+            results[request_id] = (response, exception)
+        
+        batch = self.service.new_batch_http_request(callback=callback)
+        for request_id, request in requests:
+            batch.add(request, request_id=request_id)
+        if self.scheduler is not None:
+            # Every call in a batch counts against the quota
+            self.scheduler.acquire(len(requests))
+        
+        try:
+            batch.execute(http=http)
+        except Exception as e:
+            # The whole batch failed to send, so every request in it failed
+            return {request_id: (None, e) for request_id, _ in requests}
+        
+        for request_id, _ in requests:
+            results.setdefault(request_id, (None, Exception("no response in batch")))
+        return results
+    
+    def _flush(self, pending, batch_size, http=None):
+        """Execute pending (request_id, request, handler) entries and call each handler
+        
+        Requests rejected for rate limits or server errors are resent with
+        exponential backoff before their handlers see the error. With a
+        scheduler, requests refused for the daily quota are resent once the
+        next quota day starts.
+        """
+        attempt = 0
+        while pending:
+            results = self._execute_requests([(request_id, request) for request_id, request, _ in pending],
+                                             batch_size, http=http)
+            retry = []
+            deferred = []
+            for entry in pending:
+                response, error = results[entry[0]]
+                if error is not None and self.scheduler is not None and is_daily_limit(error):
+                    self.scheduler.hold()
+                    deferred.append(entry)
                     continue
+                if error is not None and is_retryable(error) and attempt < MAX_RETRIES:
+                    retry.append(entry)
+                    self.metrics.retry(request_operation(entry[1]))
+                    continue
+                self.metrics.record_request(request_operation(entry[1]), error)
+                try:
+                    entry[2](response, error)
+                except Exception as e:
+                    print(f"Error handling result of request {entry[0]}: {e}")
+            if retry:
+                time.sleep(backoff_delay(attempt))
+                attempt += 1
+            pending = retry + deferred
+    
+    def create_events_from_csv(self, filename, batch_size=BATCH_SIZE, index=None, prune=False,
+                               calendars=None, default_calendar='primary', journal=None, resume=False,
+                               compress=False, bulk=False):
+        """Create events from CSV file
+        
+        Requests are grouped into batch requests of up to batch_size calls;
+        a batch_size of 1 sends one request per row. With an ImportIndex,
+        unchanged rows are skipped, changed rows update their existing event
+        and, with prune, events for rows removed from the file are deleted.
+        
+        Rows are routed to calendars by the CSV's calendar column (see
+        pipeline.read_events). Each calendar has its own queue and thread,
+        so calendars are filled in parallel while the CSV is read and
+        validated on a background thread.
+        
+        With an ImportJournal, every finished row is logged so an interrupted
+        import can be resumed: with resume, reading starts at the first
+        unfinished row of the loaded journal and later rows that already
+        finished are skipped. The journal is deleted once every row is done.
+        
+        With compress, the whole file is read first and rows forming a
+        regular series (see recurrence.find_series) are created as one
+        recurring event with an RRULE and EXDATEs.
+        
+        With bulk, rows are parsed column by column in large chunks (see
+        bulk.read_events_bulk), which is faster for files of many rows.
+        """
+        pool = _SubmissionPool(self, max(1, min(batch_size, BATCH_SIZE)))
+        try:
+            finish = self._queue_import(filename, pool, index, prune, calendars, default_calendar, journal,
+                                        resume, compress, bulk)
+        finally:
+            pool.close()
+        return finish()['created']
+    
+    def create_events_from_rows(self, filename, items, batch_size=BATCH_SIZE, index=None, calendars=None,
+                                default_calendar='primary', occurrences=None):
+        """Create events for rows already read from filename, such as the rows appended since the last import
+        
+        items are pipeline.read_events items. With an index, occurrences
+        counts the rows of each (calendar, date, title) earlier in the file,
+        so appended rows get the same index keys as in a full import; it is
+        updated in place. Returns the stats of the import, including
+        'failed' for rows the API refused.
+        """
+        pool = _SubmissionPool(self, max(1, min(batch_size, BATCH_SIZE)))
+        try:
+            finish = self._queue_import(filename, pool, index, calendars=calendars,
+                                        default_calendar=default_calendar, items=items, occurrences=occurrences)
+        finally:
+            pool.close()
+        return finish()
+    
+    def create_events_from_files(self, filenames, batch_size=BATCH_SIZE, index=None, prune=False,
+                                 calendars=None, default_calendar='primary', journals=None, resume=False,
+                                 compress=False, bulk=False, processes=None):
+        """Create events from several CSV files through one set of calendar queues
         
-        print(f"\nTotal events created: {events_created}")
-        return events_created
\ No newline at end of file
+        Files are parsed on a pool of up to processes worker processes, in
+        chunks of PARSE_CHUNK_ROWS rows, and each chunk's rows are queued as
+        soon as it is parsed, so requests for every file share the same
+        batches and connections. While a file is queued a worker parses its
+        next chunk, and the other workers start on the first chunks of the
+        next files, so at most about processes + 1 chunks are held in memory
+        however long the files are. With compress, each file is still read
+        whole. Options are as for create_events_from_csv; journals maps a
+        file name to its ImportJournal. Prints a summary per file and
+        returns {filename: stats}.
+        """
+        # Importing multiprocessing slows every start of the CLI, so only do it here
+        from concurrent.futures import ProcessPoolExecutor
+        journals = journals or {}
+        processes = processes or min(len(filenames), os.cpu_count() or 1)
+        pool = _SubmissionPool(self, max(1, min(batch_size, BATCH_SIZE)))
+        finishes = {}
+        try:
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                def parse(filename, start_offset=None, start_row=0):
+                    return executor.submit(_parse_chunk, filename, calendars, default_calendar, bulk,
+                                           start_offset, start_row, PARSE_CHUNK_ROWS)
+                
+                def rows(filename, future, counted):
+                    # Ask for the next chunk before queuing this one, so a
+                    # worker parses it while this one's requests are sent
+                    while future is not None:
+                        items, more = future.result()
+                        future = parse(filename, items[-1].next_offset, items[-1].row_num) if more else None
+                        counted[0] += len(items)
+                        yield from items
+                
+                waiting = list(filenames)
+                started = {parse(filename): filename for filename in waiting[:processes]}
+                del waiting[:processes]
+                while started:
+                    done, _ = wait(started, return_when=FIRST_COMPLETED)
+                    future = done.pop()
+                    filename = started.pop(future)
+                    if waiting:
+                        next_file = waiting.pop(0)
+                        started[parse(next_file)] = next_file
+                    counted = [0]
+                    try:
+                        finishes[filename] = self._queue_import(filename, pool, index, prune, calendars,
+                                                                default_calendar, journals.get(filename), resume,
+                                                                compress, bulk, items=rows(filename, future, counted),
+                                                                tag=f"{filenames.index(filename)}:")
+                    except Exception as e:
+                        # Rows queued before the error are still sent; nothing is pruned
+                        print(f"Error reading {filename}: {e}")
+                        continue
+                    print(f"Queued {counted[0]} rows from {filename}")
+        finally:
+            pool.close()
+        
+        results = {}
+        for filename in filenames:
+            if filename in finishes:
+                print(f"\n== {filename} ==", end='')
+                results[filename] = finishes[filename]()
+        
+        totals = {name: sum(stats[name] for stats in results.values())
+                  for name in ('created', 'updated', 'unchanged', 'removed', 'failed', 'invalid')}
+        print(f"\n{len(results)} of {len(filenames)} files imported: {totals['created']} created, "
+              f"{totals['updated']} updated, {totals['unchanged']} unchanged, {totals['removed']} removed, "
+              f"{totals['failed']} failed, {totals['invalid']} invalid rows")
+        return results
+    
+    def _queue_import(self, filename, pool, index=None, prune=False, calendars=None, default_calendar='primary',
+                      journal=None, resume=False, compress=False, bulk=False, items=None, tag='',
+                      occurrences=None):
+        """Queue the requests for one CSV file on a _SubmissionPool
+        
+        items are the file's already parsed rows; by default the file is
+        read on a background thread. Returns a function to call once the
+        pool is closed, which prints the file's summary, finishes its
+        journal and returns its stats.
+        """
+        source = os.path.abspath(filename)
+        stats = {'created': 0, 'updated': 0, 'unchanged': 0, 'removed': 0, 'submitted': 0, 'series': 0,
+                 'replaced': 0, 'failed': 0, 'invalid': 0}
+        seen_keys = set()
+        # (event_id, calendar_id, series key or None) of events from earlier
+        # runs whose rows are now imported in another event
+        superseded = []
+        if occurrences is None:
+            occurrences = {}
+        calendars_used = set()
+        lock = pool.lock
+        
+        start_offset = None
+        start_row = 0
+        if journal is not None:
+            # Parsed items start at the first row, so finished rows are
+            # skipped one by one instead of by seeking
+            start_offset, start_row = journal.begin(resume, occurrences, seek=items is None)
+        
+        def submit(calendar_id, request_id, request, handler):
+            stats['submitted'] += 1
+            calendars_used.add(calendar_id)
+            pool.submit(calendar_id, tag + request_id, request, handler)
+        
+        def cover(covered_keys, series, event_id, calendar_id):
+            """Point the index entries of a series' rows at its event, noting the events they had before"""
+            for row_key in covered_keys:
+                entry = index.lookup(row_key)
+                if entry and entry[1] != event_id:
+                    superseded.append((entry[1], calendar_id, covering_series(entry[0])))
+                index.cover(row_key, series, event_id, calendar_id, source)
+        
+        def on_saved(record, key=None, fingerprint=None, updating=False, group=None, covered=None,
+                     covered_keys=()):
+            def handler(response, error):
+                with lock:
+                    if error is not None:
+                        print(f"Error creating event for row {record.row_num}: {error}")
+                        stats['failed'] += 1
+                        if updating and error_status(error) in (404, 410):
+                            # The event was removed outside this tool; recreate it next run
+                            index.remove(key)
+                        return
+                    if index is not None:
+                        index.record(key, fingerprint, response['id'], record.calendar_id, source)
+                        cover(covered_keys, key, response['id'], record.calendar_id)
+                    if journal is not None:
+                        for row in covered or (record,):
+                            journal.record(row, response['id'], group)
+                    self.metrics.count('rows', len(covered) if covered else 1)
+                    if updating:
+                        self._row(f"Updated: {record.label}")
+                        stats['updated'] += 1
+                    else:
+                        self._row(f"Created: {record.label}")
+                        stats['created'] += 1
+            return handler
+        
+        def save(record, event, key=None, fingerprint=None, group=None, covered=None, covered_keys=()):
+            """Insert or update the event for a row or series, or skip it if the index has it unchanged
+            
+            covered_keys are the row keys of a series' rows.
+            """
+            existing = None
+            if index is not None:
+                with lock:
+                    existing = index.lookup(key)
+                    if existing and covering_series(existing[0]) is not None:
+                        # Imported in a recurring series before; the row gets an
+                        # event of its own and the series goes if it is not imported
+                        superseded.append((existing[1], record.calendar_id, covering_series(existing[0])))
+                        existing = None
+                if existing and existing[0] == fingerprint:
+                    stats['unchanged'] += 1
+                    with lock:
+                        cover(covered_keys, key, existing[1], record.calendar_id)
+                        if journal is not None:
+                            for row in covered or (record,):
+                                journal.record(row, existing[1], group)
+                    return
+            
+            if existing:
+                request = self._events.update(calendarId=record.calendar_id, eventId=existing[1], body=event)
+            else:
+                request = self._events.insert(calendarId=record.calendar_id, body=event)
+            submit(record.calendar_id, str(record.row_num), request,
+                   on_saved(record, key, fingerprint, bool(existing), group, covered, covered_keys))
+        
+        def on_removed(key):
+            def handler(response, error):
+                with lock:
+                    if error is not None and error_status(error) not in (404, 410):
+                        print(f"Error deleting removed row's event: {error}")
+                        return
+                    index.remove(key)
+                    stats['removed'] += 1
+            return handler
+        
+        if items is None:
+            # Rows are read and validated on a background thread while requests are sent
+            reader = read_events_bulk if bulk else read_events
+            items = prefetch(reader(filename, calendars, default_calendar, start_offset, start_row))
+        keys = {}
+        if compress:
+            items = list(items)
+            if index is not None:
+                # Rows are keyed in file order as without compress, so turning
+                # compress on or off between runs finds the same rows
+                for item in items:
+                    if not isinstance(item, RowError):
+                        keys[item.row_num] = index_row(source, item.calendar_id, event_body(item), occurrences)
+            pending = [item for item in items if not isinstance(item, RowError)
+                       and not (journal is not None and journal.is_done(item.offset))]
+            series, singles = find_series(pending)
+            in_series = {record.row_num for item in series for record in item.records}
+            items = [item for item in items if item.row_num not in in_series]
+            for item in series:
+                event = event_body(item.records[0])
+                event['recurrence'] = recurrence_lines(item, TIME_ZONE)
+                key = fingerprint = None
+                covered_keys = ()
+                if index is not None:
+                    key = series_key(source, item.calendar_id, event, series_pattern(item))
+                    fingerprint = row_fingerprint(item.calendar_id, event)
+                    covered_keys = [keys[record.row_num][0] for record in item.records]
+                    seen_keys.add(key)
+                    seen_keys.update(covered_keys)
+                stats['series'] += 1
+                save(item, event, key, fingerprint, covered=item.records, covered_keys=covered_keys)
+        
+        for record in items:
+            done = journal is not None and journal.is_done(record.offset)
+            if isinstance(record, RowError):
+                if not done:
+                    print(f"Error creating event for row {record.row_num}: {record.message}")
+                    stats['invalid'] += 1
+                    if journal is not None:
+                        with lock:
+                            journal.record(record)
+                continue
+            
+            row_num = record.row_num
+            calendar_id = record.calendar_id
+            event = event_body(record)
+            
+            if index is None:
+                if not done:
+                    save(record, event)
+                continue
+            
+            if compress:
+                key, fingerprint, group = keys[row_num]
+            else:
+                key, fingerprint, group = index_row(source, calendar_id, event, occurrences)
+            seen_keys.add(key)
+            if done:
+                continue
+            
+            save(record, event, key, fingerprint, group)
+            if row_num % COMMIT_INTERVAL == 0:
+                with lock:
+                    index.commit()
+        
+        rows_submitted = stats['submitted']
+        if index is not None and prune:
+            with lock:
+                stale = list(index.stale(source, seen_keys))
+            for key, event_id, event_calendar in stale:
+                request = self._events.delete(calendarId=event_calendar, eventId=event_id)
+                submit(event_calendar, key, request, on_removed(key))
+        
+        def finish():
+            # Delete the row events now covered by a series, and the series
+            # broken up into rows, once their replacements are saved
+            replaced = {}
+            for event_id, calendar_id, series in superseded:
+                if series is None or series not in seen_keys:
+                    replaced.setdefault(calendar_id, {})[event_id] = series
+            for calendar_id, events in replaced.items():
+                def on_deleted(event_id, events=events):
+                    if events[event_id] is not None:
+                        index.remove(events[event_id])
+                stats['replaced'] += self._delete_ids(list(events), calendar_id, pool.batch_size, on_deleted)
+            
+            print(f"\nTotal events created: {stats['created']}")
+            if index is not None:
+                index.commit()
+                print(f"Updated: {stats['updated']}, unchanged: {stats['unchanged']}, removed: {stats['removed']}")
+            if stats['replaced']:
+                print(f"Replaced by recurring or single events after a change of --compress: {stats['replaced']}")
+            if compress:
+                print(f"Recurring events: {stats['series']}")
+            if len(calendars_used) > 1:
+                print(f"Calendars: {len(calendars_used)}")
+            if stats['failed'] or stats['invalid']:
+                print(f"Failed: {stats['failed']}, invalid rows: {stats['invalid']}")
+            if journal is not None:
+                journal.finish(rows_submitted - stats['created'] - stats['updated'])
+            return stats
+        return finish
+    
+    def _send(self, entries, batch_size):
+        """Send (request_id, request, handler) entries in batches of batch_size"""
+        for i in range(0, len(entries), batch_size):
+            self._flush(entries[i:i + batch_size], batch_size)
+    
+    def _delete_ids(self, event_ids, calendar_id, batch_size, on_deleted=None, missing=None):
+        """Delete events by ID in batch requests, returning how many are gone
+        
+        Events already deleted (404/410) count as deleted, unless a missing
+        list is given: their IDs are then added to it and not counted.
+        """
+        deleted = []
+        
+        def on_result(event_id):
+            def handler(response, error):
+                if error is not None and error_status(error) not in (404, 410):
+                    print(f"Error deleting event {event_id}: {error}")
+                    return
+                if error is not None and missing is not None:
+                    missing.append(event_id)
+                else:
+                    deleted.append(event_id)
+                    self.metrics.count('deleted')
+                if self.cache is not None:
+                    self.cache.remove(event_id, calendar_id)
+                if on_deleted is not None:
+                    on_deleted(event_id)
+            return handler
+        
+        self._send([(event_id, self._events.delete(calendarId=calendar_id, eventId=event_id), on_result(event_id))
+                    for event_id in event_ids], batch_size)
+        if self.cache is not None:
+            self.cache.commit()
+        return len(deleted)
+    
+    def delete_events_by_id(self, event_ids, calendar_id='primary', batch_size=BATCH_SIZE, force=False):
+        """Delete the events with the given IDs, without scanning a date range"""
+        event_ids = list(dict.fromkeys(event_ids))
+        if not event_ids:
+            print("No event IDs given.")
+            return 0
+        batch_size = max(1, min(batch_size, BATCH_SIZE))
+        if not force and not _confirm(f"Are you sure you want to delete {len(event_ids)} events "
+                                      f"from {calendar_id}? (y/N): "):
+            print("Deletion cancelled.")
+            return 0
+        
+        missing = []
+        deleted = self._delete_ids(event_ids, calendar_id, batch_size, missing=missing)
+        if missing:
+            print(f"Not found (already deleted or wrong calendar): {len(missing)}")
+            for event_id in missing:
+                print(f"  {event_id}")
+        print(f"\nTotal events deleted: {deleted} of {len(event_ids)}")
+        return deleted
+    
+    def _events_by_key(self, calendar_id, start_date, end_date):
+        """List a calendar's timed events around a date range, grouped by _event_key
+        
+        The API's range bounds are in UTC, so a day either side is listed
+        and callers pick out the events they need by local time. All-day
+        events are left out.
+        """
+        events = {}
+        for event in self.iter_events(start_date - timedelta(days=1), end_date + timedelta(days=1),
+                                      calendar_id=calendar_id):
+            key = _event_key(event)
+            if key[0] is not None and key[1] is not None:
+                events.setdefault(key, []).append(event)
+        return events
+    
+    def check_conflicts(self, filename, calendars=None, default_calendar='primary', bulk=False):
+        """Report CSV rows that end before they start or overlap another row or an existing event
+        
+        Existing events are listed once per calendar for the window the rows
+        cover; an event with exactly a row's start, end and title is that
+        row imported before, not a conflict. Returns the conflicts found.
+        """
+        records, errors = csv_rows(filename, calendars, default_calendar, bulk)
+        if errors:
+            print(f"{errors} rows could not be read and were not checked")
+        
+        rows_by_calendar = {}
+        for record in records:
+            rows_by_calendar.setdefault(record.calendar_id, []).append(record)
+        existing = []
+        for calendar_id, rows in rows_by_calendar.items():
+            imported = Counter((row.start, row.end, row.summary) for row in rows)
+            start_date = min(min(row.start, row.end) for row in rows).date()
+            end_date = max(max(row.start, row.end) for row in rows).date()
+            for key, events in self._events_by_key(calendar_id, start_date, end_date).items():
+                for event in events[imported[key]:]:
+                    existing.append(Interval(None, key[2], key[0], key[1], _describe(event), calendar_id))
+        
+        conflicts = find_conflicts(records + existing)
+        report_conflicts(conflicts)
+        return conflicts
+    
+    def reconcile_csv(self, filename, start_date=None, end_date=None, calendars=None, default_calendar='primary',
+                      batch_size=BATCH_SIZE, force=False, dry_run=False, bulk=False):
+        """Make the calendars match a CSV file within a date window
+        
+        The CSV is the desired state: events in the window are matched to
+        rows by (start, end, title), and only rows without an event are
+        created and events without a row deleted, so a roster that changed
+        three shifts out of 500 costs about six API calls. Duplicates are
+        matched one to one. The window defaults to the dates of the CSV
+        rows; all-day events are left alone. Without force, deletions are
+        confirmed first, and dry_run only prints the changes.
+        
+        Returns {'created', 'deleted', 'unchanged'} counts.
+        """
+        batch_size = max(1, min(batch_size, BATCH_SIZE))
+        stats = {'created': 0, 'deleted': 0, 'unchanged': 0}
+        reader = read_events_bulk if bulk else read_events
+        records = []
+        errors = 0
+        for item in reader(filename, calendars, default_calendar):
+            if isinstance(item, RowError):
+                print(f"Row {item.row_num}: {item.message}")
+                errors += 1
+            else:
+                records.append(item)
+        if errors:
+            # A row that failed to parse would have its event deleted
+            print(f"\nNot reconciling: {errors} rows could not be read; fix them first")
+            return stats
+        if start_date is None:
+            if not records:
+                print("No rows to reconcile; give --start and --end to clear a window")
+                return stats
+            start_date = min(record.start for record in records).date()
+            end_date = max(record.end for record in records).date()
+        
+        def in_window(start):
+            return start is not None and start_date <= start.date() <= end_date
+        
+        outside = sum(1 for record in records if not in_window(record.start))
+        if outside:
+            print(f"Ignoring {outside} rows outside {start_date} to {end_date}")
+        
+        wanted = {}
+        for record in records:
+            if in_window(record.start):
+                calendar = wanted.setdefault(record.calendar_id, {})
+                calendar.setdefault((record.start, record.end, record.summary), []).append(record)
+        if not wanted:
+            wanted[default_calendar] = {}
+        
+        plans = []
+        for calendar_id, rows in wanted.items():
+            # Keep the events starting in the window in TIME_ZONE
+            actual = {key: events for key, events in self._events_by_key(calendar_id, start_date, end_date).items()
+                      if in_window(key[0])}
+            
+            inserts = []
+            deletes = []
+            for key, matching in rows.items():
+                existing = actual.get(key, [])
+                inserts.extend(matching[len(existing):])
+                stats['unchanged'] += min(len(matching), len(existing))
+            for key, events in actual.items():
+                deletes.extend(events[len(rows.get(key, ())):])
+            inserts.sort(key=lambda record: record.row_num)
+            plans.append((calendar_id, inserts, deletes))
+            
+            print(f"{calendar_id}: {len(inserts)} to create, {len(deletes)} to delete "
+                  f"({start_date} to {end_date})")
+            for record in inserts[:PREVIEW_LIMIT]:
+                print(f"  + {record.label}")
+            for event in deletes[:PREVIEW_LIMIT]:
+                print(f"  - {_describe(event)}")
+            hidden = max(len(inserts) - PREVIEW_LIMIT, 0) + max(len(deletes) - PREVIEW_LIMIT, 0)
+            if hidden:
+                print(f"  ... and {hidden} more changes")
+        
+        to_delete = sum(len(deletes) for _, _, deletes in plans)
+        if dry_run:
+            print(f"\nDry run: {stats['unchanged']} events already match; nothing was changed")
+            return stats
+        if to_delete and not force and not _confirm(f"\nDelete {to_delete} events not in the CSV? (y/N): "):
+            print("Reconcile cancelled.")
+            return stats
+        
+        def on_created(record):
+            def handler(response, error):
+                if error is not None:
+                    print(f"Error creating event for row {record.row_num}: {error}")
+                    return
+                stats['created'] += 1
+                self.metrics.count('rows')
+                self._row(f"Created: {record.label}")
+            return handler
+        
+        for calendar_id, inserts, deletes in plans:
+            self._send([(str(record.row_num), self._events.insert(calendarId=calendar_id,
+                                                                   body=event_body(record)),
+                         on_created(record)) for record in inserts], batch_size)
+            stats['deleted'] += self._delete_ids([event['id'] for event in deletes], calendar_id, batch_size)
+        
+        print(f"\nCreated: {stats['created']}, deleted: {stats['deleted']}, unchanged: {stats['unchanged']}")
+        return stats
+
+class _SubmissionPool:
+    """The per-calendar _SubmissionQueues shared by every file of an import
+    
+    Handlers run on the queue threads and take lock before touching
+    shared state such as the index.
+    """
+    
+    def __init__(self, manager, batch_size):
+        self.manager = manager
+        self.batch_size = batch_size
+        self.queues = {}
+        self.lock = threading.Lock()
+    
+    def submit(self, calendar_id, request_id, request, handler):
+        if calendar_id not in self.queues:
+            self.queues[calendar_id] = _SubmissionQueue(self.manager, calendar_id, self.batch_size)
+        self.queues[calendar_id].put(request_id, request, handler)
+    
+    def close(self):
+        for submission_queue in self.queues.values():
+            submission_queue.close()
+
+class _SubmissionQueue:
+    """Bounded queue of requests for one calendar, sent in batches on its own thread
+    
+    Each calendar backs off independently when it is throttled, so one busy
+    calendar does not hold up the others.
+    """
+    
+    def __init__(self, manager, calendar_id, batch_size):
+        self.manager = manager
+        self.batch_size = batch_size
+        self.queue = queue.Queue(maxsize=batch_size * 4)
+        self.thread = threading.Thread(target=self._run, name=f'submit-{calendar_id}', daemon=True)
+        self.thread.start()
+    
+    def put(self, request_id, request, handler):
+        self.queue.put((request_id, request, handler))
+    
+    def close(self):
+        """Send everything still queued and wait for the thread to finish"""
+        self.queue.put(None)
+        self.thread.join()
+    
+    def _run(self):
+        pending = []
+        closed = False
+        try:
+            with self.manager.http_pool.connection() as http:
+                while True:
+                    try:
+                        # Wait briefly for a full batch, then send what we have
+                        item = self.queue.get(timeout=BATCH_WAIT) if pending else self.queue.get()
+                    except queue.Empty:
+                        self.manager._flush(pending, self.batch_size, http=http)
+                        pending = []
+                        continue
+                    if item is None:
+                        closed = True
+                        break
+                    pending.append(self._once(item))
+                    if len(pending) >= self.batch_size:
+                        self.manager._flush(pending, self.batch_size, http=http)
+                        pending = []
+                if pending:
+                    self.manager._flush(pending, self.batch_size, http=http)
+        except Exception as e:
+            # Report the failure for every request left, and keep draining so
+            # the producer is never blocked on a full queue
+            print(f"Error sending requests: {e}")
+            for entry in pending:
+                self._fail(entry, e)
+            while not closed:
+                item = self.queue.get()
+                closed = item is None
+                if not closed:
+                    self._fail(item, e)
+    
+    @staticmethod
+    def _once(item):
+        """Wrap an entry's handler so it runs at most once
+        
+        A batch that fails part way through may already have called some of
+        its handlers before the rest are failed.
+        """
+        request_id, request, handler = item
+        called = []
+        
+        def once(response, error):
+            if not called:
+                called.append(True)
+                handler(response, error)
+        return request_id, request, once
+    
+    def _fail(self, entry, error):
+        self.manager.metrics.record_request(request_operation(entry[1]), error)
+        try:
+            entry[2](None, error)
+        except Exception as e:
+            print(f"Error handling result of request {entry[0]}: {e}")
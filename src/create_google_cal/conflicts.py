@@ -0,0 +1,86 @@
+from collections import namedtuple
+from itertools import islice
+from operator import attrgetter
+from .bulk import read_events_bulk
+from .pipeline import RowError, read_events
+
+# Conflicts listed individually before switching to a count
+PREVIEW_LIMIT = 20
+
+# An existing calendar event, with the EventRecord fields the checker reads
+Interval = namedtuple('Interval', ['row_num', 'summary', 'start', 'end', 'label', 'calendar_id'])
+# kind is 'inverted' (second is None) or 'overlap', where first starts no later than second
+Conflict = namedtuple('Conflict', ['kind', 'first', 'second'])
+
+_start = attrgetter('start')
+
+def csv_rows(filename, calendars=None, default_calendar='primary', bulk=False):
+    """Return the EventRecords of a CSV file's valid rows and the number of rows that failed to parse"""
+    reader = read_events_bulk if bulk else read_events
+    records = []
+    errors = 0
+    for item in reader(filename, calendars, default_calendar):
+        if isinstance(item, RowError):
+            errors += 1
+        else:
+            records.append(item)
+    return records, errors
+
+def find_conflicts(intervals):
+    """Find inverted intervals and overlaps with one sweep per calendar
+
+    intervals are EventRecords and Intervals, whose row_num is None. Each
+    calendar's intervals are sorted by start and swept once, keeping the
+    earlier interval that reaches furthest. Each interval starting before
+    that one ends is reported once, paired with it, so k rows that all
+    overlap give k - 1 conflicts rather than every pair. Intervals that
+    only touch do not overlap, and overlaps between two existing events
+    are not reported. Runs in O(n log n).
+    """
+    conflicts = []
+    by_calendar = {}
+    for interval in intervals:
+        if interval.end < interval.start:
+            if interval.row_num is not None:
+                conflicts.append(Conflict('inverted', interval, None))
+        else:
+            by_calendar.setdefault(interval.calendar_id, []).append(interval)
+
+    for group in by_calendar.values():
+        group.sort(key=_start)
+        reach = group[0]
+        reach_end = reach.end
+        for interval in islice(group, 1, None):
+            if interval.start >= reach_end:
+                reach = interval
+                reach_end = interval.end
+                continue
+            if interval.row_num is not None or reach.row_num is not None:
+                conflicts.append(Conflict('overlap', reach, interval))
+            if interval.end > reach_end:
+                reach = interval
+                reach_end = interval.end
+    return conflicts
+
+def _name(interval):
+    return 'existing event' if interval.row_num is None else f"row {interval.row_num}"
+
+def describe_conflict(conflict):
+    """Return e.g. 'Row 14 overlaps row 12: Shift B on ... / Shift A on ...'"""
+    first, second = conflict.first, conflict.second
+    if conflict.kind == 'inverted':
+        return f"Row {first.row_num} ends before it starts: {first.label}"
+    # Name the CSV row first
+    if second.row_num is None:
+        first, second = second, first
+    return f"{_name(second).capitalize()} overlaps {_name(first)}: {second.label} / {first.label}"
+
+def report_conflicts(conflicts):
+    """Print conflicts, the first PREVIEW_LIMIT in full, and return how many there are"""
+    for conflict in conflicts[:PREVIEW_LIMIT]:
+        print(describe_conflict(conflict))
+    if len(conflicts) > PREVIEW_LIMIT:
+        print(f"... and {len(conflicts) - PREVIEW_LIMIT} more")
+    inverted = sum(1 for conflict in conflicts if conflict.kind == 'inverted')
+    print(f"\n{len(conflicts) - inverted} overlaps, {inverted} rows ending before they start")
+    return len(conflicts)
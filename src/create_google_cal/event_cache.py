@@ -0,0 +1,146 @@
+import json
+import os
+import sqlite3
+from datetime import datetime, timezone
+from .retry import error_status, execute_with_retry
+
+CACHE_PATH = os.path.join('..', 'config', 'event_cache.db')
+SYNC_PAGE_SIZE = 2500
+
+def _utc_key(when):
+    """Normalize an event start/end to a sortable UTC 'YYYY-MM-DDTHH:MM:SS' string"""
+    if 'dateTime' in when:
+        parsed = datetime.fromisoformat(when['dateTime'].replace('Z', '+00:00'))
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed.isoformat(timespec='seconds')
+    # All-day events carry only a date
+    return when['date'] + 'T00:00:00'
+
+class EventCache:
+    """Local mirror of calendar events kept current with incremental sync tokens
+
+    The first sync downloads every event; later syncs only fetch what
+    changed since the stored syncToken. Range queries are then answered
+    from an index on start time without calling the API.
+    """
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS events (
+                calendar_id TEXT NOT NULL,
+                event_id TEXT NOT NULL,
+                start_utc TEXT NOT NULL,
+                end_utc TEXT NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (calendar_id, event_id)
+            );
+            CREATE INDEX IF NOT EXISTS events_start ON events (calendar_id, start_utc);
+            CREATE TABLE IF NOT EXISTS sync_state (
+                calendar_id TEXT PRIMARY KEY,
+                sync_token TEXT NOT NULL
+            );
+        ''')
+        self.conn.commit()
+
+    def sync_token(self, calendar_id='primary'):
+        row = self.conn.execute(
+            'SELECT sync_token FROM sync_state WHERE calendar_id = ?', (calendar_id,)).fetchone()
+        return row[0] if row else None
+
+    def invalidate(self, calendar_id='primary'):
+        """Drop every cached event and the sync token so the next sync is a full one"""
+        with self.conn:
+            self.conn.execute('DELETE FROM events WHERE calendar_id = ?', (calendar_id,))
+            self.conn.execute('DELETE FROM sync_state WHERE calendar_id = ?', (calendar_id,))
+
+    def sync(self, service, calendar_id='primary', execute=execute_with_retry):
+        """Bring the cache up to date, returning the number of changed events
+
+        Each list request is sent with execute, such as a CalendarManager's
+        _execute so sync calls are paced and counted like the others.
+        Falls back to a full resync when the API reports the sync token
+        has expired (410 Gone).
+        """
+        token = self.sync_token(calendar_id)
+        try:
+            return self._sync(service, calendar_id, token, execute)
+        except Exception as e:
+            if token is None or error_status(e) != 410:
+                raise
+        print("Event cache sync token expired, running a full resync...")
+        self.invalidate(calendar_id)
+        return self._sync(service, calendar_id, None, execute)
+
+    def _sync(self, service, calendar_id, token, execute):
+        changed = 0
+        page_token = None
+        # Apply every page in one transaction so a failed sync keeps the old state
+        with self.conn:
+            if token is None:
+                self.conn.execute('DELETE FROM events WHERE calendar_id = ?', (calendar_id,))
+            while True:
+                result = execute(service.events().list(
+                    calendarId=calendar_id,
+                    singleEvents=True,
+                    maxResults=SYNC_PAGE_SIZE,
+                    syncToken=token,
+                    pageToken=page_token
+                ))
+
+                for event in result.get('items', []):
+                    self._apply(calendar_id, event)
+                    changed += 1
+
+                page_token = result.get('nextPageToken')
+                if not page_token:
+                    break
+
+            self.conn.execute(
+                'INSERT OR REPLACE INTO sync_state (calendar_id, sync_token) VALUES (?, ?)',
+                (calendar_id, result['nextSyncToken']))
+        return changed
+
+    def _apply(self, calendar_id, event):
+        if event.get('status') == 'cancelled' or 'start' not in event:
+            self.remove(event['id'], calendar_id)
+            return
+        self.conn.execute(
+            'INSERT OR REPLACE INTO events (calendar_id, event_id, start_utc, end_utc, data) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (calendar_id, event['id'], _utc_key(event['start']), _utc_key(event.get('end', event['start'])),
+             json.dumps(event)))
+
+    def remove(self, event_id, calendar_id='primary'):
+        self.conn.execute(
+            'DELETE FROM events WHERE calendar_id = ? AND event_id = ?', (calendar_id, event_id))
+
+    def events_in_range(self, time_min, time_max, calendar_id='primary', chunk_size=SYNC_PAGE_SIZE):
+        """Yield cached events overlapping [time_min, time_max), ordered by start
+
+        time_min and time_max are naive UTC datetimes, matching the window
+        events().list would return for the same timeMin/timeMax. Rows are read
+        in keyset-paginated chunks, so callers may remove events while iterating.
+        """
+        last = ('', '')
+        while True:
+            rows = self.conn.execute(
+                'SELECT start_utc, event_id, data FROM events '
+                'WHERE calendar_id = ? AND start_utc < ? AND end_utc > ? AND (start_utc, event_id) > (?, ?) '
+                'ORDER BY start_utc, event_id LIMIT ?',
+                (calendar_id, time_max.isoformat(), time_min.isoformat(), last[0], last[1], chunk_size)
+            ).fetchall()
+            for start_utc, event_id, data in rows:
+                yield json.loads(data)
+            if len(rows) < chunk_size:
+                return
+            last = (rows[-1][0], rows[-1][1])
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
@@ -0,0 +1,127 @@
+import hashlib
+import os
+import sqlite3
+
+INDEX_PATH = os.path.join('..', 'config', 'import_index.db')
+# PRAGMA user_version of an index whose keys include the source file
+SCHEMA_VERSION = 1
+# Fingerprint prefix of a row imported as part of a recurring series; the
+# series key follows it and the event ID is the series' event
+COVERED = 'series:'
+
+def _digest(*parts):
+    return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+def row_key(source, calendar_id, event, occurrence):
+    """Identify a CSV row by source file, calendar, day, title and repeat number within the file
+
+    Two rows with the same title on the same day are told apart by their
+    occurrence, so changing a row's times updates the event instead of
+    creating a new one. Rows of different files never share a key, even
+    when their calendar, day and title match.
+    """
+    day = event['start']['dateTime'][:10]
+    return _digest(source, _digest(calendar_id, day, event['summary'], str(occurrence)))
+
+def series_key(source, calendar_id, event, pattern):
+    """Identify a recurring series by source file, calendar, title, time of day and repeat pattern
+
+    The dates are left out, so a series whose first or last date moves
+    updates the existing event.
+    """
+    return _digest(source, _digest(calendar_id, 'series', event['summary'], event['start']['dateTime'][11:],
+                                   pattern))
+
+def index_row(source, calendar_id, event, occurrences):
+    """Count a row in occurrences and return its (row key, fingerprint, group)
+
+    group is the row's (calendar, day, title); occurrences maps each group
+    to the rows of it read so far, which numbers repeated rows.
+    """
+    group = (calendar_id, event['start']['dateTime'][:10], event['summary'])
+    occurrences[group] = occurrences.get(group, 0) + 1
+    return row_key(source, calendar_id, event, occurrences[group]), row_fingerprint(calendar_id, event), group
+
+def covering_series(fingerprint):
+    """Return the key of the series a row's index entry points to, or None for a row imported on its own"""
+    return fingerprint[len(COVERED):] if fingerprint.startswith(COVERED) else None
+
+def row_fingerprint(calendar_id, event):
+    """Content hash of everything that is sent to the API for a row or recurring series"""
+    return _digest(calendar_id, event['start']['dateTime'], event['end']['dateTime'],
+                   event['start'].get('timeZone', ''), event['summary'], *event.get('recurrence', ()))
+
+class ImportIndex:
+    """On-disk map from imported CSV rows to the events created for them
+
+    The connection may be used from submission threads; callers serialize
+    access to it.
+    """
+
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS events (
+                row_key TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                event_id TEXT NOT NULL,
+                calendar_id TEXT NOT NULL,
+                source TEXT NOT NULL
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS events_source ON events (source)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS events_fingerprint ON events (fingerprint)')
+        self._migrate()
+        self.conn.commit()
+
+    def _migrate(self):
+        """Add the source file to the keys of an index written before keys included it
+
+        Old keys are the inner digest of row_key and series_key, so each
+        row is rekeyed from its own key and source.
+        """
+        if self.conn.execute('PRAGMA user_version').fetchone()[0] >= SCHEMA_VERSION:
+            return
+        rows = self.conn.execute('SELECT row_key, source FROM events').fetchall()
+        self.conn.executemany('UPDATE events SET row_key = ? WHERE row_key = ?',
+                              [(_digest(source, key), key) for key, source in rows])
+        self.conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    def lookup(self, key):
+        """Return (fingerprint, event_id) for a row key, or None"""
+        return self.conn.execute(
+            'SELECT fingerprint, event_id FROM events WHERE row_key = ?', (key,)).fetchone()
+
+    def record(self, key, fingerprint, event_id, calendar_id, source):
+        self.conn.execute(
+            'INSERT OR REPLACE INTO events (row_key, fingerprint, event_id, calendar_id, source) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (key, fingerprint, event_id, calendar_id, source))
+
+    def cover(self, key, series, event_id, calendar_id, source):
+        """Record a row as imported in the event of the series with key series"""
+        self.record(key, COVERED + series, event_id, calendar_id, source)
+
+    def remove(self, key):
+        """Forget a row or series, and for a series the rows it covers"""
+        self.conn.execute('DELETE FROM events WHERE row_key = ? OR fingerprint = ?', (key, COVERED + key))
+
+    def stale(self, source, seen_keys):
+        """Yield (row_key, event_id, calendar_id) for rows and series of source not in seen_keys
+
+        Rows covered by a series are left out; they go with their series.
+        """
+        cursor = self.conn.execute(
+            'SELECT row_key, event_id, calendar_id FROM events WHERE source = ? AND fingerprint NOT LIKE ?',
+            (source, COVERED + '%'))
+        for key, event_id, calendar_id in cursor.fetchall():
+            if key not in seen_keys:
+                yield key, event_id, calendar_id
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+from .pipeline import data_offset
+
+JOURNAL_DIR = os.path.join('..', 'config', 'journals')
+# Rows between fsyncs; after a power loss at most this many rows are sent again
+SYNC_INTERVAL = 50
+
+class ImportJournal:
+    """Append-only log of finished CSV rows, used to resume an interrupted import
+
+    The first line identifies the CSV file by path, size and modification
+    time. Each following line records a finished row's byte range, row
+    number and the event created for it. Lines are flushed as they are
+    written, so a killed process loses nothing, and fsynced every
+    SYNC_INTERVAL rows.
+    """
+
+    def __init__(self, source, directory=JOURNAL_DIR):
+        self.source = os.path.abspath(source)
+        name = hashlib.sha256(self.source.encode('utf-8')).hexdigest()[:16]
+        self.path = os.path.join(directory, f"{name}.jsonl")
+        # Finished rows from an earlier run, by byte offset
+        self.done = {}
+        self.file = None
+        self._unsynced = 0
+
+    def _signature(self):
+        stat = os.stat(self.source)
+        return {'source': self.source, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self):
+        """Read the rows finished by an earlier run and return how many there are
+
+        Raises ValueError if the CSV file changed since the journal was
+        written. A last line cut off by a crash is ignored.
+        """
+        with open(self.path, 'r', encoding='utf-8') as f:
+            try:
+                header = json.loads(f.readline())
+            except ValueError:
+                raise ValueError(f"Import journal {self.path} is unreadable")
+            if header != self._signature():
+                raise ValueError(f"{self.source} changed since the interrupted import")
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                self.done[entry['offset']] = entry
+        return len(self.done)
+
+    def resume_point(self, offset):
+        """Follow finished rows from offset to the first unfinished one
+
+        Returns that row's byte offset and the finished entries before it,
+        in file order.
+        """
+        chain = []
+        while offset in self.done:
+            entry = self.done[offset]
+            chain.append(entry)
+            offset = entry['next_offset']
+        return offset, chain
+
+    def is_done(self, offset):
+        return offset in self.done
+
+    def begin(self, resume=False, occurrences=None, seek=True):
+        """Open the journal for an import and return the (byte offset, row number) to read from
+
+        When resuming with seek, reading starts at the first unfinished row,
+        and the groups of the finished rows before it are counted into
+        occurrences (see import_index.index_row) so later rows get the same
+        keys as in a full import. Otherwise reading starts at the first
+        row, (None, 0), and finished rows are skipped as they are read.
+        """
+        start = (None, 0)
+        if resume and seek:
+            offset, chain = self.resume_point(data_offset(self.source))
+            for entry in chain:
+                if 'group' in entry and occurrences is not None:
+                    group = tuple(entry['group'])
+                    occurrences[group] = occurrences.get(group, 0) + 1
+            if chain:
+                start = (offset, chain[-1]['row'])
+            print(f"Resuming after row {start[1]}: {len(self.done)} rows already done")
+        self.open(resume)
+        return start
+
+    def finish(self, unfinished):
+        """Keep the journal for --resume if any rows are unfinished, or delete it"""
+        if unfinished:
+            self.close()
+            print(f"{unfinished} rows were not imported; rerun with --resume to retry them")
+        else:
+            self.discard()
+
+    def open(self, resume=False):
+        """Start a new journal, or append to the loaded one when resuming"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if resume:
+            self.file = open(self.path, 'a', encoding='utf-8')
+        else:
+            self.done = {}
+            self.file = open(self.path, 'w', encoding='utf-8')
+            self._write(self._signature())
+
+    def record(self, record, event_id=None, group=None):
+        """Log a finished EventRecord or RowError
+
+        group is the row's (calendar, day, title), which a resumed import
+        needs to number repeated rows the same way.
+        """
+        entry = {'offset': record.offset, 'next_offset': record.next_offset,
+                 'row': record.row_num, 'event_id': event_id}
+        if group is not None:
+            entry['group'] = list(group)
+        self._write(entry)
+
+    def _write(self, entry):
+        self.file.write(json.dumps(entry) + '\n')
+        self.file.flush()
+        self._unsynced += 1
+        if self._unsynced >= SYNC_INTERVAL:
+            self.sync()
+
+    def sync(self):
+        if self.file is not None and self._unsynced:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self._unsynced = 0
+
+    def close(self):
+        if self.file is not None:
+            self.sync()
+            self.file.close()
+            self.file = None
+
+    def discard(self):
+        """Close and delete the journal once every row has been imported"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -12,6 +12,13 @@ def main():
     parser.add_argument('--force', action='store_true', help='Skip confirmation prompt')
     
     args = parser.parse_args()
+    
+    if not (args.delete or args.file):
+        print("Usage examples:")
+        print("  Create events from CSV: python -m create_google_cal.main -f july28.csv")
+        print("  Delete events in range: python -m create_google_cal.main --delete -s 28-7-2025 -e 1-8-2025")
+        return
+    
     calendar_manager = CalendarManager()
     
     if args.delete:
@@ -46,11 +53,6 @@ def main():
                 return
         
         calendar_manager.create_events_from_csv(file_path)
-    
-    else:
-        print("Usage examples:")
-        print("  Create events from CSV: python -m create_google_cal.main -f july28.csv")
-        print("  Delete events in range: python -m create_google_cal.main --delete -s 28-7-2025 -e 1-8-2025")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
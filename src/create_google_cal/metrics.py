@@ -0,0 +1,233 @@
+import json
+import sys
+import threading
+import time
+import urllib.parse
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float('inf'))
+# Seconds between redraws of the live progress line
+PROGRESS_INTERVAL = 1.0
+
+def request_operation(request):
+    """Return the operation of a googleapiclient request, e.g. 'insert' for calendar.events.insert"""
+    method_id = getattr(request, 'methodId', None) or 'other'
+    return method_id.rsplit('.', 1)[-1]
+
+def http_operation(method, uri):
+    """Return the operation of a Calendar API HTTP call from its method and URL"""
+    path = urllib.parse.urlsplit(uri).path
+    if path.startswith('/batch/'):
+        return 'batch'
+    if path.endswith('/events'):
+        return {'GET': 'list', 'POST': 'insert'}.get(method, 'other')
+    if '/events/' in path:
+        return {'GET': 'get', 'PUT': 'update', 'PATCH': 'update', 'DELETE': 'delete'}.get(method, 'other')
+    return 'other'
+
+def _body_size(body):
+    if body is None:
+        return 0
+    return len(body.encode('utf-8') if isinstance(body, str) else body)
+
+class Histogram:
+    """Latency histogram with fixed buckets"""
+
+    def __init__(self, bounds=LATENCY_BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, milliseconds):
+        for i, bound in enumerate(self.bounds):
+            if milliseconds <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.total += milliseconds
+        self.max = max(self.max, milliseconds)
+
+    def percentile(self, fraction):
+        """Return the upper bound of the bucket holding the given fraction of samples"""
+        if not self.count:
+            return None
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= fraction * self.count:
+                return bound if bound != float('inf') else self.max
+        return self.max
+
+    def report(self):
+        return {
+            'mean_ms': round(self.total / self.count, 2) if self.count else None,
+            'max_ms': round(self.max, 2),
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'histogram_ms': {('+Inf' if bound == float('inf') else str(bound)): count
+                             for bound, count in zip(self.bounds, self.counts)},
+        }
+
+class Metrics:
+    """Thread-safe counters and per-operation latency for a run
+
+    Every HTTP call (see InstrumentedHttp), every sub-request of a batch,
+    every retry and every counted row is recorded here. Hooks are called
+    with each event as a dict, so the numbers can be forwarded to another
+    metrics system as they happen.
+    """
+
+    def __init__(self, hooks=()):
+        self.started = time.monotonic()
+        self.hooks = list(hooks)
+        self.calls = {}
+        self.requests = {}
+        self.retries = {}
+        self.counters = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self._lock = threading.Lock()
+        self._progress = None
+
+    def add_hook(self, hook):
+        """Call hook(event) for every recorded event"""
+        self.hooks.append(hook)
+
+    def _emit(self, event):
+        for hook in list(self.hooks):
+            try:
+                hook(event)
+            except Exception as e:
+                self.hooks.remove(hook)
+                print(f"Warning: Metrics hook failed and was removed: {e}")
+
+    def record_call(self, operation, seconds, status=None, bytes_sent=0, bytes_received=0):
+        """Record one HTTP call; status is None when no response arrived"""
+        with self._lock:
+            call = self.calls.get(operation)
+            if call is None:
+                call = self.calls[operation] = {'calls': 0, 'errors': 0, 'histogram': Histogram()}
+            call['calls'] += 1
+            if status is None or status >= 400:
+                call['errors'] += 1
+            call['histogram'].add(seconds * 1000)
+            self.bytes_sent += bytes_sent
+            self.bytes_received += bytes_received
+        if self.hooks:
+            self._emit({'type': 'call', 'operation': operation, 'seconds': seconds, 'status': status,
+                        'bytes_sent': bytes_sent, 'bytes_received': bytes_received})
+
+    def record_request(self, operation, error=None):
+        """Record the outcome of one API request, sent alone or inside a batch"""
+        with self._lock:
+            request = self.requests.setdefault(operation, {'count': 0, 'errors': 0})
+            request['count'] += 1
+            if error is not None:
+                request['errors'] += 1
+        if self.hooks:
+            self._emit({'type': 'request', 'operation': operation, 'ok': error is None})
+
+    def retry(self, operation):
+        with self._lock:
+            self.retries[operation] = self.retries.get(operation, 0) + 1
+        if self.hooks:
+            self._emit({'type': 'retry', 'operation': operation})
+
+    def count(self, name, value=1):
+        """Add to a named counter such as 'rows' or 'deleted'"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+        if self.hooks:
+            self._emit({'type': 'count', 'name': name, 'value': value})
+
+    def report(self):
+        """Return a JSON-serializable summary of the run so far"""
+        with self._lock:
+            elapsed = time.monotonic() - self.started
+            operations = {}
+            for operation, call in sorted(self.calls.items()):
+                operations[operation] = dict({'calls': call['calls'], 'errors': call['errors'],
+                                              'retries': self.retries.get(operation, 0)},
+                                             **call['histogram'].report())
+            return {
+                'elapsed_seconds': round(elapsed, 3),
+                'operations': operations,
+                'requests': {operation: dict(request, retries=self.retries.get(operation, 0))
+                             for operation, request in sorted(self.requests.items())},
+                'counters': {name: {'count': value, 'per_second': round(value / elapsed, 1) if elapsed else None}
+                             for name, value in sorted(self.counters.items())},
+                'bytes_sent': self.bytes_sent,
+                'bytes_received': self.bytes_received,
+            }
+
+    def write_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+            f.write('\n')
+
+    def progress_line(self):
+        """Return a one-line summary like 'rows 1,200 (310/s) | calls 30 | retries 0 | 0.4 MB'"""
+        with self._lock:
+            elapsed = max(time.monotonic() - self.started, 1e-9)
+            parts = [f"{name} {value:,} ({value / elapsed:,.0f}/s)" for name, value in sorted(self.counters.items())]
+            calls = sum(call['calls'] for call in self.calls.values())
+            errors = sum(call['errors'] for call in self.calls.values())
+            retries = sum(self.retries.values())
+            transferred = (self.bytes_sent + self.bytes_received) / 1e6
+        parts += [f"calls {calls:,}", f"errors {errors:,}", f"retries {retries:,}", f"{transferred:.1f} MB",
+                  f"{elapsed:.0f}s"]
+        return ' | '.join(parts)
+
+    def start_progress(self, stream=None, interval=PROGRESS_INTERVAL):
+        """Redraw the progress line on stream (stderr by default) until stop_progress"""
+        stream = stream or sys.stderr
+        stopped = threading.Event()
+
+        def run():
+            while not stopped.wait(interval):
+                stream.write('\r' + self.progress_line() + '\033[K')
+                stream.flush()
+
+        thread = threading.Thread(target=run, name='progress', daemon=True)
+        self._progress = (thread, stopped, stream)
+        thread.start()
+
+    def stop_progress(self):
+        if self._progress is None:
+            return
+        thread, stopped, stream = self._progress
+        self._progress = None
+        stopped.set()
+        thread.join()
+        stream.write('\r' + self.progress_line() + '\033[K\n')
+        stream.flush()
+
+class InstrumentedHttp:
+    """Wrap an httplib2-style transport to time every call and count its bytes
+
+    Response sizes are of the decoded body, after gzip is undone.
+    """
+
+    def __init__(self, http, metrics):
+        self.http = http
+        self.metrics = metrics
+
+    def request(self, uri, method='GET', body=None, headers=None, *args, **kwargs):
+        operation = http_operation(method, uri)
+        started = time.perf_counter()
+        status = None
+        content = b''
+        try:
+            response, content = self.http.request(uri, method, body, headers, *args, **kwargs)
+            status = int(response.status)
+            return response, content
+        finally:
+            self.metrics.record_call(operation, time.perf_counter() - started, status,
+                                     _body_size(body), _body_size(content))
+
+    def __getattr__(self, name):
+        # credentials, timeout, close() and the rest come from the wrapped transport
+        return getattr(self.http, name)
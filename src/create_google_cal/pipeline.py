@@ -0,0 +1,197 @@
+import csv
+import json
+import queue
+import threading
+from collections import namedtuple
+from .utils import DateTimeParser
+
+REQUIRED_COLUMNS = ['date', 'start time', 'end time', 'event name']
+# Optional column naming the calendar a row belongs to
+CALENDAR_COLUMN = 'calendar'
+# Parsed records buffered between the reader thread and API submission
+QUEUE_SIZE = 1000
+
+# offset and next_offset are the byte range of the row in the CSV file
+EventRecord = namedtuple('EventRecord', ['row_num', 'summary', 'start', 'end', 'label', 'calendar_id',
+                                         'offset', 'next_offset'])
+RowError = namedtuple('RowError', ['row_num', 'message', 'offset', 'next_offset'])
+
+def load_calendar_map(path):
+    """Load a JSON object mapping calendar names used in CSVs to calendar IDs"""
+    with open(path, 'r', encoding='utf-8') as f:
+        mapping = json.load(f)
+    if not isinstance(mapping, dict):
+        raise ValueError(f"Calendar map {path} must be a JSON object of name: calendar ID")
+    return mapping
+
+def _decoded_lines(f, position):
+    """Yield the lines of a binary file as text, keeping position[0] at the byte offset read up to
+
+    csv.reader pulls one line at a time, so after each row position[0] is
+    the offset where the next row starts.
+    """
+    for line in f:
+        position[0] += len(line)
+        yield line.decode('utf-8')
+
+def data_offset(filename):
+    """Return the byte offset of the first row after the CSV header"""
+    position = [0]
+    with open(filename, 'rb') as f:
+        next(csv.reader(_decoded_lines(f, position)), None)
+    return position[0]
+
+def header_columns(header):
+    """Return the indexes of the required columns, the calendar column (or None) and the header width
+
+    Raises ValueError if the header is missing a required column.
+    """
+    missing = [column for column in REQUIRED_COLUMNS if column not in header]
+    if missing:
+        raise ValueError(f"CSV file is missing column(s): {', '.join(missing)}")
+    calendar_col = header.index(CALENDAR_COLUMN) if CALENDAR_COLUMN in header else None
+    return tuple(header.index(column) for column in REQUIRED_COLUMNS) + (calendar_col, len(header))
+
+def _open_rows(csvfile, start_offset=None, start_row=0):
+    """Read the header of a CSV file opened in binary mode and return (columns, rows)
+
+    columns is as returned by header_columns. rows yields (row_num, offset,
+    next_offset, fields) for each non-blank row. Returns None for an empty
+    file and raises ValueError if the header is missing a required column.
+    """
+    position = [0]
+    reader = csv.reader(_decoded_lines(csvfile, position))
+    header = next(reader, None)
+    if header is None:
+        return None
+    columns = header_columns(header)
+
+    first_row = 0
+    if start_offset is not None:
+        csvfile.seek(start_offset)
+        position[0] = start_offset
+        reader = csv.reader(_decoded_lines(csvfile, position))
+        first_row = start_row
+
+    def rows():
+        # Blank lines are folded into the row after them, so row byte
+        # ranges are contiguous
+        offset = position[0]
+        for row in reader:
+            if not row:
+                continue
+            next_offset = position[0]
+            yield first_row + reader.line_num, offset, next_offset, row
+            offset = next_offset
+
+    return columns, rows()
+
+def read_events(filename, calendars=None, default_calendar='primary', start_offset=None, start_row=0):
+    """Stream a CSV file as EventRecord items, or RowError items for bad rows
+
+    Row numbers are the CSV line numbers reported by the csv module. Rows
+    go to default_calendar unless the CSV has a calendar column; its values
+    are looked up in the calendars mapping and otherwise used as calendar IDs.
+    With start_offset, reading skips straight to that byte offset (a row
+    boundary) and numbers rows on from start_row.
+    Raises ValueError if the header is missing a required column.
+    """
+    calendars = calendars or {}
+    parser = DateTimeParser()
+    with open(filename, 'rb') as csvfile:
+        opened = _open_rows(csvfile, start_offset, start_row)
+        if opened is None:
+            return
+        (date_col, start_col, end_col, name_col, calendar_col, width), rows = opened
+
+        for row_num, offset, next_offset, row in rows:
+            try:
+                date = row[date_col].strip()
+                start_time = row[start_col].strip()
+                end_time = row[end_col].strip()
+                event_name = row[name_col].strip()
+                calendar = row[calendar_col].strip() if calendar_col is not None else ''
+            except IndexError:
+                yield RowError(row_num, f"expected {width} fields, found {len(row)}", offset, next_offset)
+                continue
+
+            try:
+                start = parser.parse_datetime(date, start_time)
+                end = parser.parse_datetime(date, end_time)
+            except ValueError as e:
+                yield RowError(row_num, str(e), offset, next_offset)
+                continue
+
+            label = f"{event_name} on {date} from {start_time} to {end_time}"
+            calendar_id = calendars.get(calendar, calendar) or default_calendar
+            yield EventRecord(row_num, event_name, start, end, label, calendar_id, offset, next_offset)
+
+def validate_csv(filename, bulk=False):
+    """Check every row of a CSV file without calling the API
+
+    Prints each bad row and returns (valid_count, error_count). With bulk,
+    rows are parsed by bulk.read_events_bulk.
+    """
+    reader = read_events
+    if bulk:
+        from .bulk import read_events_bulk as reader
+    valid_count = 0
+    error_count = 0
+    for item in reader(filename):
+        if isinstance(item, RowError):
+            print(f"Row {item.row_num}: {item.message}")
+            error_count += 1
+        else:
+            valid_count += 1
+
+    print(f"\n{valid_count} valid rows, {error_count} invalid rows")
+    return valid_count, error_count
+
+_DONE = object()
+
+def prefetch(iterable, maxsize=QUEUE_SIZE):
+    """Consume an iterable on a background thread through a bounded queue
+
+    Lets CSV reading and parsing run ahead while the caller waits on the
+    API. Exceptions raised by the iterable are re-raised in the caller.
+    """
+    items = queue.Queue(maxsize)
+    stop = threading.Event()
+    errors = []
+
+    def produce():
+        try:
+            for item in iterable:
+                while not stop.is_set():
+                    try:
+                        items.put(item, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+        except Exception as e:
+            errors.append(e)
+        finally:
+            items.put(_DONE)
+
+    thread = threading.Thread(target=produce, name='csv-reader', daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is _DONE:
+                break
+            yield item
+    finally:
+        stop.set()
+        # Unblock a producer waiting on a full queue
+        while thread.is_alive():
+            try:
+                items.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        thread.join()
+
+    if errors:
+        raise errors[0]
@@ -0,0 +1,122 @@
+import os
+from .calendar_manager import BATCH_SIZE, TIME_ZONE, event_body
+from .import_index import covering_series, index_row, row_fingerprint, series_key
+from .pipeline import RowError, read_events
+from .ratelimit import QUOTA_PER_MINUTE, format_duration
+from .recurrence import find_series, recurrence_lines, series_pattern
+
+def plan_import(filename, calendars=None, default_calendar='primary', index=None, prune=False, compress=False,
+                batch_size=BATCH_SIZE, bulk=False):
+    """Count the API requests an import of a CSV file would send, without calling the API
+
+    Mirrors CalendarManager.create_events_from_csv: with compress, series
+    become one request each, and with an ImportIndex, unchanged rows cost
+    nothing, changed rows an update and, with prune, removed rows a
+    delete, as does each event replaced after compress was turned on or
+    off. Returns a dict of counts, including 'requests' (each call in
+    a batch counts against the quota) and 'batches' (HTTP calls).
+    """
+    reader = read_events
+    if bulk:
+        from .bulk import read_events_bulk as reader
+    items = list(reader(filename, calendars, default_calendar))
+    records = [item for item in items if not isinstance(item, RowError)]
+    plan = {'rows': len(records), 'invalid': len(items) - len(records), 'series': 0, 'covered': 0,
+            'inserts': 0, 'updates': 0, 'unchanged': 0, 'deletes': 0}
+    per_calendar = {}
+    seen_keys = set()
+    source = os.path.abspath(filename)
+    keys = {}
+    if index is not None:
+        # Rows are keyed in file order, with or without compress, as by the import
+        occurrences = {}
+        for record in records:
+            keys[record.row_num] = index_row(source, record.calendar_id, event_body(record), occurrences)
+    # Events an import deletes as replaced: {event_id: calendar_id}, and the
+    # series some rows were imported in, deleted unless imported again
+    replaced = {}
+    broken = {}
+
+    def count(calendar_id, key=None, fingerprint=None):
+        """Count the request for a row or series and return its index entry, if it keeps it"""
+        existing = index.lookup(key) if index is not None else None
+        if existing and covering_series(existing[0]) is not None:
+            broken[covering_series(existing[0])] = (existing[1], calendar_id)
+            existing = None
+        if existing and existing[0] == fingerprint:
+            plan['unchanged'] += 1
+            return existing
+        plan['updates' if existing else 'inserts'] += 1
+        per_calendar[calendar_id] = per_calendar.get(calendar_id, 0) + 1
+        return existing
+
+    singles = records
+    if compress:
+        series, singles = find_series(records)
+        plan['series'] = len(series)
+        plan['covered'] = len(records) - len(singles)
+        for item in series:
+            if index is None:
+                count(item.calendar_id)
+                continue
+            event = event_body(item.records[0])
+            event['recurrence'] = recurrence_lines(item, TIME_ZONE)
+            key = series_key(source, item.calendar_id, event, series_pattern(item))
+            seen_keys.add(key)
+            existing = count(item.calendar_id, key, row_fingerprint(item.calendar_id, event))
+            for record in item.records:
+                seen_keys.add(keys[record.row_num][0])
+                entry = index.lookup(keys[record.row_num][0])
+                if entry is None or (existing and entry[1] == existing[1]):
+                    continue
+                if covering_series(entry[0]) is None:
+                    replaced[entry[1]] = item.calendar_id
+                else:
+                    broken[covering_series(entry[0])] = (entry[1], item.calendar_id)
+
+    for record in singles:
+        if index is None:
+            count(record.calendar_id)
+            continue
+        key, fingerprint, _ = keys[record.row_num]
+        seen_keys.add(key)
+        count(record.calendar_id, key, fingerprint)
+
+    for key, (event_id, calendar_id) in broken.items():
+        if key not in seen_keys:
+            replaced[event_id] = calendar_id
+    for event_id, calendar_id in replaced.items():
+        plan['deletes'] += 1
+        per_calendar[calendar_id] = per_calendar.get(calendar_id, 0) + 1
+
+    if index is not None and prune:
+        for key, event_id, calendar_id in index.stale(source, seen_keys):
+            plan['deletes'] += 1
+            per_calendar[calendar_id] = per_calendar.get(calendar_id, 0) + 1
+
+    batch_size = max(1, min(batch_size, BATCH_SIZE))
+    plan['requests'] = sum(per_calendar.values())
+    # Each calendar's queue sends full batches, then one partial batch
+    plan['batches'] = sum(-(-requests // batch_size) for requests in per_calendar.values())
+    return plan
+
+def print_plan(plan, scheduler):
+    """Print a plan from plan_import and how long a QuotaScheduler would take to send it"""
+    print(f"\nAPI plan: {plan['rows']} valid rows, {plan['invalid']} invalid")
+    if plan['series']:
+        print(f"  {plan['series']} recurring events cover {plan['covered']} rows")
+    print(f"  {plan['inserts']} inserts, {plan['updates']} updates, {plan['deletes']} deletes, "
+          f"{plan['unchanged']} unchanged")
+    print(f"  {plan['requests']} requests in {plan['batches']} HTTP calls")
+    if not plan['requests']:
+        return
+    seconds = scheduler.estimate(plan['requests'])
+    limits = [f"{scheduler.per_minute or QUOTA_PER_MINUTE:,g} requests/minute"]
+    if scheduler.per_day:
+        limits.append(f"{scheduler.per_day:,} requests/day, {scheduler.used:,} used today")
+    print(f"  ETA at {' and '.join(limits)}: {format_duration(seconds)}")
+    left_today = scheduler.per_day - scheduler.used if scheduler.per_day else plan['requests']
+    if plan['requests'] > left_today:
+        days = 1 + -(-(plan['requests'] - max(left_today, 0)) // scheduler.per_day)
+        print(f"  Spans {days} quota days; with --daily-quota {scheduler.per_day} the import waits for "
+              f"each new day instead of failing")
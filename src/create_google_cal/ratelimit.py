@@ -0,0 +1,206 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+# Default Calendar API quota: queries per minute per user
+QUOTA_PER_MINUTE = 600
+# Default Calendar API quota: queries per day per project
+DAILY_QUOTA = 1000000
+# Daily quotas reset at midnight Pacific time
+QUOTA_TIME_ZONE = 'America/Los_Angeles'
+# Requests sent in the current quota day, shared by every run
+QUOTA_STATE = os.path.join('..', 'config', 'quota_usage.json')
+# Requests counted between saves of the quota state
+SAVE_INTERVAL = 100
+# Requests per second the async engine is paced to by default
+RATE = QUOTA_PER_MINUTE / 60
+# Requests the async engine keeps in flight at once
+CONCURRENCY = 100
+
+class TokenBucket:
+    """Pace requests to rate per second, allowing bursts of up to capacity
+
+    reserve() takes tokens immediately, letting the balance go negative,
+    and returns how long the caller must wait before using them. Callers
+    are therefore served in the order they asked, and the bucket can be
+    shared by threads and by tasks on an event loop.
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens=1):
+        """Take tokens and return the seconds to wait before they are available"""
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= tokens
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def wait(self, tokens=1):
+        """Block the calling thread until tokens are available"""
+        delay = self.reserve(tokens)
+        if delay:
+            time.sleep(delay)
+
+    async def acquire(self, tokens=1):
+        """Wait on the event loop until tokens are available"""
+        import asyncio
+        delay = self.reserve(tokens)
+        if delay:
+            await asyncio.sleep(delay)
+
+def format_duration(seconds):
+    """Return e.g. '45s', '12m 30s', '3h 05m' or '2d 4h'"""
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    if seconds < 86400:
+        return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+    return f"{seconds // 86400}d {seconds % 86400 // 3600}h"
+
+class QuotaScheduler:
+    """Pace requests to a per-minute quota and hold them once a daily quota is spent
+
+    Requests are spaced by a TokenBucket at per_minute / 60 per second.
+    The requests sent in each quota day, which starts at midnight Pacific
+    time, are counted in a state file shared by every run, including runs
+    at the same time (see _save). Once per_day
+    of them have been sent, or the API reports its daily limit (see
+    hold), acquire() sleeps until the next quota day, so a job larger
+    than a day's quota runs unattended. Either limit may be None. sleep
+    defaults to time.sleep.
+    """
+
+    def __init__(self, per_minute=QUOTA_PER_MINUTE, per_day=None, state_path=QUOTA_STATE, sleep=None):
+        self.sleep = sleep or time.sleep
+        self.per_minute = per_minute
+        self.per_day = per_day
+        self.state_path = state_path
+        self.bucket = TokenBucket(per_minute / 60) if per_minute else None
+        self.day, self.used = self._load()
+        # A day whose quota the API reported as spent
+        self.held_day = None
+        self._unsaved = 0
+        self._lock = threading.Lock()
+
+    def _now(self):
+        return datetime.now(ZoneInfo(QUOTA_TIME_ZONE))
+
+    def _read(self):
+        """Return the (day, used) saved in the state file, or None if there is none or it is unreadable"""
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            return state['day'], int(state['used'])
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Warning: Could not read {self.state_path} ({e}); ignoring the requests it counted")
+            return None
+
+    def _load(self):
+        today = self._now().date().isoformat()
+        saved = self._read()
+        return today, saved[1] if saved and saved[0] == today else 0
+
+    def _save(self):
+        """Add the requests counted since the last save to the state file
+
+        The file is read, updated and atomically replaced under a lock
+        file, so runs at the same time add up their requests instead of
+        overwriting each other's, and each takes up the others' in used.
+        """
+        # Importing the auth libraries slows every start of the CLI, so only do it here
+        from .shared_credentials import _file_lock
+        directory = os.path.dirname(self.state_path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        with _file_lock(self.state_path):
+            saved = self._read()
+            if saved and saved[0] > self.day:
+                # Another run has started the next quota day
+                self._unsaved = 0
+                return
+            if saved and saved[0] == self.day:
+                self.used = saved[1] + self._unsaved
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.quota-', suffix='.json')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump({'day': self.day, 'used': self.used}, f)
+                os.replace(temp_path, self.state_path)
+            except Exception:
+                os.remove(temp_path)
+                raise
+        self._unsaved = 0
+
+    def seconds_to_next_day(self):
+        """Return the seconds until the next quota day starts"""
+        now = self._now()
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), now.tzinfo)
+        return (midnight - now).total_seconds()
+
+    def _wait_for_next_day(self, reason):
+        delay = self.seconds_to_next_day() + 1
+        resume = (self._now() + timedelta(seconds=delay)).astimezone()
+        print(f"{reason}; waiting {format_duration(delay)} for the next quota day (until {resume:%Y-%m-%d %H:%M})")
+        self._save()
+        self.sleep(delay)
+
+    def acquire(self, requests=1):
+        """Wait until requests more API calls are allowed, then count them"""
+        with self._lock:
+            while True:
+                today = self._now().date().isoformat()
+                if today != self.day:
+                    # Requests not yet saved counted against the day that ended
+                    self.day, self.used, self._unsaved = today, 0, 0
+                if self.held_day == today:
+                    self._wait_for_next_day("The API reported the daily quota as used")
+                elif self.per_day and self.used and self.used + requests > self.per_day:
+                    self._wait_for_next_day(f"Daily quota of {self.per_day:,} requests used")
+                else:
+                    break
+            self.used += requests
+            self._unsaved += requests
+            if self._unsaved >= SAVE_INTERVAL:
+                self._save()
+        if self.bucket is not None:
+            self.bucket.wait(requests)
+
+    def hold(self):
+        """Send nothing more until the next quota day, after the API refused a request for its daily limit"""
+        with self._lock:
+            self.held_day = self._now().date().isoformat()
+
+    def estimate(self, requests):
+        """Return the seconds requests more API calls would take from now, including waits for later quota days"""
+        # Without pacing, the API's own per-minute quota sets the pace
+        rate = (self.per_minute or QUOTA_PER_MINUTE) / 60
+        left = requests
+        seconds = 0.0
+        if self.per_day and requests > self.per_day - self.used:
+            # Finish today's quota, then use whole days until the rest fits in one
+            left = requests - max(self.per_day - self.used, 0)
+            seconds = self.seconds_to_next_day()
+            while left > self.per_day:
+                left -= self.per_day
+                seconds += 86400
+        return seconds + left / rate
+
+    def close(self):
+        """Save the day's usage"""
+        with self._lock:
+            if self._unsaved:
+                self._save()
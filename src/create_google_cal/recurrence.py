@@ -0,0 +1,137 @@
+from collections import Counter, namedtuple
+from datetime import date, datetime
+from .bulk import read_events_bulk
+from .pipeline import RowError, read_events
+
+# Fewest dates worth turning into a recurring event
+MIN_OCCURRENCES = 3
+# Largest share of a series' dates that may be missing (sent as EXDATEs)
+MAX_EXCEPTION_RATIO = 0.25
+WEEKDAYS = ('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU')
+
+# One recurring event standing in for records; count includes the
+# exdates, as RRULE COUNT does. row_num, label and calendar_id mirror
+# EventRecord so a Series can be reported like a row.
+Series = namedtuple('Series', ['row_num', 'label', 'calendar_id', 'records', 'freq', 'interval',
+                               'count', 'exdates'])
+
+def _detect(group, min_occurrences, max_exception_ratio):
+    """Find the regular series in records sharing a calendar, title, time and duration
+
+    Returns (Series or None, records left over as single events).
+    """
+    by_day = {}
+    leftovers = []
+    for record in group:
+        day = record.start.date().toordinal()
+        if day in by_day:
+            leftovers.append(record)
+        else:
+            by_day[day] = record
+    if len(by_day) < min_occurrences:
+        return None, group
+
+    days = sorted(by_day)
+    gaps = Counter(later - earlier for earlier, later in zip(days, days[1:]))
+    # The most common gap is the step; prefer the shorter of equally common gaps
+    step = max(gaps, key=lambda gap: (gaps[gap], -gap))
+    residue = Counter(day % step for day in days).most_common(1)[0][0]
+    aligned = [day for day in days if day % step == residue]
+    count = (aligned[-1] - aligned[0]) // step + 1
+    missing = count - len(aligned)
+    if len(aligned) < min_occurrences or missing > count * max_exception_ratio:
+        return None, group
+
+    records = [by_day[day] for day in aligned]
+    leftovers.extend(by_day[day] for day in days if day % step != residue)
+    present = set(aligned)
+    exdates = [datetime.combine(date.fromordinal(day), records[0].start.time())
+               for day in range(aligned[0], aligned[-1] + 1, step) if day not in present]
+    if step % 7 == 0:
+        freq, interval = 'WEEKLY', step // 7
+    else:
+        freq, interval = 'DAILY', step
+    first = records[0]
+    series = Series(first.row_num, None, first.calendar_id, records, freq, interval, count, exdates)
+    return series._replace(label=describe_series(series)), leftovers
+
+def find_series(records, min_occurrences=MIN_OCCURRENCES, max_exception_ratio=MAX_EXCEPTION_RATIO):
+    """Split EventRecords into recurring series and single events
+
+    Records with the same calendar, title, start time and duration that
+    fall on dates a fixed number of days apart (daily, weekly, every N
+    days or every N weeks) form a series; missing dates become exceptions.
+    Rows left over are tried again per weekday.
+    Returns (series, singles) with singles in file order.
+    """
+    groups = {}
+    for record in records:
+        key = (record.calendar_id, record.summary, record.start.time(), record.end - record.start)
+        groups.setdefault(key, []).append(record)
+
+    series = []
+    singles = []
+    for group in groups.values():
+        found, leftovers = _detect(group, min_occurrences, max_exception_ratio)
+        if found is not None:
+            series.append(found)
+        # An event held on several weekdays, such as every Monday and
+        # Thursday, is one weekly series per weekday
+        by_weekday = {}
+        for record in leftovers:
+            by_weekday.setdefault(record.start.weekday(), []).append(record)
+        for weekday_group in by_weekday.values():
+            found, rest = _detect(weekday_group, min_occurrences, max_exception_ratio)
+            if found is not None:
+                series.append(found)
+            singles.extend(rest)
+    series.sort(key=lambda item: item.row_num)
+    singles.sort(key=lambda record: record.row_num)
+    return series, singles
+
+def series_pattern(series):
+    """Return the repeat pattern of a series independent of its dates, e.g. 'WEEKLY;2;MO'"""
+    weekday = WEEKDAYS[series.records[0].start.weekday()] if series.freq == 'WEEKLY' else ''
+    return f"{series.freq};{series.interval};{weekday}"
+
+def recurrence_lines(series, time_zone):
+    """Return the RRULE and EXDATE lines of a series for an event's recurrence field"""
+    interval = f";INTERVAL={series.interval}" if series.interval > 1 else ''
+    lines = [f"RRULE:FREQ={series.freq}{interval};COUNT={series.count}"]
+    if series.exdates:
+        dates = ','.join(exdate.strftime('%Y%m%dT%H%M%S') for exdate in series.exdates)
+        lines.append(f"EXDATE;TZID={time_zone}:{dates}")
+    return lines
+
+def describe_series(series):
+    """Return e.g. 'Standup at 09:00, weekly on Monday from 2025-01-06 (52 times, 2 exceptions)'"""
+    first = series.records[0]
+    if series.freq == 'WEEKLY':
+        every = 'weekly' if series.interval == 1 else f"every {series.interval} weeks"
+        every += f" on {first.start.strftime('%A')}"
+    else:
+        every = 'daily' if series.interval == 1 else f"every {series.interval} days"
+    exceptions = f", {len(series.exdates)} exceptions" if series.exdates else ''
+    return (f"{first.summary} at {first.start.strftime('%H:%M')}, {every} from "
+            f"{first.start.date()} ({len(series.records)} times{exceptions})")
+
+def compression_report(filename, calendars=None, default_calendar='primary', bulk=False):
+    """Print the recurring series found in a CSV file without calling the API
+
+    Returns (valid_rows, events), where events is the number of events an
+    import with compression would create.
+    """
+    reader = read_events_bulk if bulk else read_events
+    records = [item for item in reader(filename, calendars, default_calendar)
+               if not isinstance(item, RowError)]
+    series, singles = find_series(records)
+    for item in series:
+        print(f"Row {item.row_num}: {item.label}")
+
+    covered = len(records) - len(singles)
+    events = len(series) + len(singles)
+    print(f"\n{len(records)} valid rows: {len(series)} recurring events covering {covered} rows, "
+          f"{len(singles)} single events")
+    if events:
+        print(f"Compression: {len(records)} rows -> {events} events ({len(records) / events:.1f}x)")
+    return len(records), events
@@ -0,0 +1,76 @@
+import json
+import random
+import time
+
+MAX_RETRIES = 5
+BASE_DELAY = 1.0
+MAX_DELAY = 32.0
+RATE_LIMIT_REASONS = ('rateLimitExceeded', 'userRateLimitExceeded')
+# Quota exhausted until the next day; retrying sooner only fails again
+DAILY_LIMIT_REASONS = ('dailyLimitExceeded', 'quotaExceeded')
+
+def response_reasons(content):
+    """Return the 'reason' strings from the body of a Google API error response"""
+    try:
+        if isinstance(content, bytes):
+            content = content.decode('utf-8')
+        details = json.loads(content).get('error', {})
+    except (TypeError, ValueError, AttributeError):
+        return []
+    return [item.get('reason') for item in details.get('errors', []) if item.get('reason')]
+
+def error_reasons(error):
+    """Return the 'reason' strings from a Google API error"""
+    return response_reasons(getattr(error, 'content', None))
+
+def error_status(error):
+    """Return the HTTP status of a Google API error, or None for other errors"""
+    from googleapiclient.errors import HttpError
+    if not isinstance(error, HttpError):
+        return None
+    return int(error.resp.status)
+
+def is_retryable_response(status, content=None):
+    """Check whether an HTTP status and error body mean throttling or a transient server error"""
+    if status == 429 or status >= 500:
+        return True
+    if status == 403:
+        return any(reason in RATE_LIMIT_REASONS for reason in response_reasons(content))
+    return False
+
+def is_retryable(error):
+    """Check whether an HttpError is a throttling or transient server error"""
+    status = error_status(error)
+    if status is None:
+        return False
+    return is_retryable_response(status, error.content)
+
+def is_daily_limit(error):
+    """Check whether an API error means the daily quota is spent"""
+    return any(reason in DAILY_LIMIT_REASONS for reason in error_reasons(error))
+
+def backoff_delay(attempt, base=BASE_DELAY, cap=MAX_DELAY, rng=None):
+    """Exponential backoff with up to one second of random jitter"""
+    rng = rng or random.random
+    return min(base * (2 ** attempt) + rng(), cap)
+
+def execute_with_retry(request, http=None, max_retries=MAX_RETRIES, sleep=None, rng=None, on_retry=None):
+    """Execute a googleapiclient request, backing off on rate limits and 5xx errors
+
+    sleep and rng default to time.sleep and random.random and can be
+    replaced to make retry timing deterministic. on_retry(error) is called
+    before each retry.
+    """
+    from googleapiclient.errors import HttpError
+    sleep = sleep or time.sleep
+    attempt = 0
+    while True:
+        try:
+            return request.execute(http=http)
+        except HttpError as e:
+            if attempt >= max_retries or not is_retryable(e):
+                raise
+            if on_retry is not None:
+                on_retry(e)
+            sleep(backoff_delay(attempt, rng=rng))
+            attempt += 1
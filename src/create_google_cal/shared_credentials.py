@@ -0,0 +1,132 @@
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+
+try:
+    import fcntl
+except ImportError:  # Windows: refreshes are still serialized within a process
+    fcntl = None
+
+# Refresh this long before the access token expires
+REFRESH_MARGIN = timedelta(minutes=10)
+# Seconds between attempts after a background refresh fails
+RETRY_INTERVAL = 30
+
+def _utcnow():
+    # Credentials.expiry is a naive UTC datetime
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+@contextmanager
+def _file_lock(path):
+    """Hold an exclusive lock on path + '.lock' across processes"""
+    with open(path + '.lock', 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+class SharedCredentials(Credentials):
+    """User credentials refreshed ahead of expiry and shared through token.json
+
+    Refreshes are serialized between threads and, through a lock file next
+    to token.json, between gcal processes: a process that finds a newer
+    token on disk adopts it instead of refreshing again. token.json is
+    replaced atomically, so readers never see a partly written file.
+    """
+
+    token_path = None
+
+    @classmethod
+    def load(cls, token_path, scopes):
+        with open(token_path, 'r') as f:
+            return cls.from_info(json.load(f), token_path, scopes)
+
+    @classmethod
+    def from_info(cls, info, token_path, scopes):
+        creds = cls.from_authorized_user_info(info, scopes)
+        creds.token_path = token_path
+        creds._lock = threading.Lock()
+        creds._stopped = threading.Event()
+        return creds
+
+    def _due(self):
+        return self.expiry is None or self.expiry - _utcnow() < REFRESH_MARGIN
+
+    def refresh(self, request):
+        """Refresh the access token, or adopt one another thread or process already got
+
+        Also called by the transport after a 401, so a token that is not
+        close to expiry is still replaced unless it changed meanwhile.
+        """
+        stale_token = self.token
+        with self._lock, _file_lock(self.token_path):
+            if self.token != stale_token and not self._due():
+                return
+            if self._adopt_saved(stale_token):
+                return
+            super().refresh(request)
+            self.save()
+
+    def _adopt_saved(self, stale_token):
+        """Take the token from token.json if another process refreshed it"""
+        try:
+            with open(self.token_path, 'r') as f:
+                saved = Credentials.from_authorized_user_info(json.load(f), self.scopes)
+        except (OSError, ValueError):
+            return False
+        if saved.token in (None, stale_token) or saved.expiry is None:
+            return False
+        if saved.expiry - _utcnow() < REFRESH_MARGIN:
+            return False
+        self.token = saved.token
+        self.expiry = saved.expiry
+        return True
+
+    def save(self):
+        """Write token.json atomically through a temporary file in the same directory"""
+        directory = os.path.dirname(self.token_path) or '.'
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.token-', suffix='.json')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(self.to_json())
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.token_path)
+        except Exception:
+            os.remove(temp_path)
+            raise
+
+    def start_refresher(self):
+        """Refresh in a background thread REFRESH_MARGIN before each expiry"""
+        thread = threading.Thread(target=self._refresh_ahead, name='token-refresh', daemon=True)
+        thread.start()
+        return thread
+
+    def stop_refresher(self):
+        self._stopped.set()
+
+    def _refresh_ahead(self):
+        request = Request()
+        while True:
+            if self.expiry is None:
+                return
+            wait = (self.expiry - REFRESH_MARGIN - _utcnow()).total_seconds()
+            if self._stopped.wait(max(wait, 0)):
+                return
+            if not self._due():
+                continue
+            try:
+                self.refresh(request)
+            except Exception as e:
+                print(f"Warning: Could not refresh token ({e}); retrying in {RETRY_INTERVAL}s")
+                if self._stopped.wait(RETRY_INTERVAL):
+                    return
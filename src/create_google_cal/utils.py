@@ -1,43 +1,140 @@
-from datetime import datetime
+import re
+from datetime import date, datetime, time
+from functools import lru_cache
 
-def parse_date(date_str):
-    """Parse date string in various formats"""
-    date_formats = ['%d-%m-%Y', '%m-%d-%Y', '%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%Y/%m/%d']
-    
-    for date_format in date_formats:
+# Format order decides ambiguous values such as 05/07/2025: the first match wins
+DATE_FORMATS = ['%d-%m-%Y', '%m-%d-%Y', '%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%Y/%m/%d']
+DATETIME_DATE_FORMATS = ['%m/%d/%Y', '%Y-%m-%d', '%m-%d-%Y', '%d/%m/%Y', '%d-%m-%Y']
+TIME_FORMATS = ['%H:%M', '%I:%M %p', '%H:%M:%S', '%I:%M:%S %p']
+
+# Rows used to detect which formats a file uses
+SAMPLE_SIZE = 20
+# Distinct strings memoized per column; rosters repeat the same dates and times
+CACHE_SIZE = 4096
+
+# The same patterns datetime.strptime uses for each directive (C locale)
+_DIRECTIVES = {
+    'd': r'(?P<d>3[0-1]|[1-2]\d|0[1-9]|[1-9]| [1-9])',
+    'm': r'(?P<m>1[0-2]|0[1-9]|[1-9])',
+    'Y': r'(?P<Y>\d\d\d\d)',
+    'H': r'(?P<H>2[0-3]|[0-1]\d|\d)',
+    'I': r'(?P<I>1[0-2]|0[1-9]|[1-9])',
+    'M': r'(?P<M>[0-5]\d|\d)',
+    'S': r'(?P<S>6[0-1]|[0-5]\d|\d)',
+    'p': r'(?P<p>am|pm)',
+}
+
+def _date_from_match(match):
+    return date(int(match.group('Y')), int(match.group('m')), int(match.group('d')))
+
+def _time_from_match(match):
+    fields = match.groupdict()
+    if fields.get('I') is not None:
+        hour = int(fields['I']) % 12
+        if fields['p'].lower() == 'pm':
+            hour += 12
+    else:
+        hour = int(fields['H'])
+    second = int(fields['S']) if fields.get('S') is not None else 0
+    return time(hour, int(fields['M']), second)
+
+class _Format:
+    """A strptime format compiled once into a regex and a converter"""
+
+    def __init__(self, fmt, convert):
+        self.fmt = fmt
+        self.convert = convert
+
+        pattern = []
+        # Formats whose skeletons differ can never match the same string
+        skeleton = []
+        chars = iter(fmt)
+        for char in chars:
+            if char == '%':
+                directive = next(chars)
+                pattern.append(_DIRECTIVES[directive])
+                skeleton.append({'Y': 'Y', 'p': 'p'}.get(directive, 'n'))
+            elif char.isspace():
+                pattern.append(r'\s+')
+                skeleton.append(' ')
+            else:
+                pattern.append(re.escape(char))
+                skeleton.append(char)
+        self.regex = re.compile(''.join(pattern), re.IGNORECASE)
+        self.skeleton = ''.join(skeleton)
+
+    def parse(self, value):
+        """Return the parsed value, or None where strptime would raise"""
+        match = self.regex.match(value)
+        if match is None or match.end() != len(value):
+            return None
         try:
-            return datetime.strptime(date_str.strip(), date_format).date()
+            return self.convert(match)
         except ValueError:
-            continue
-    
-    raise ValueError(f"Could not parse date: {date_str}")
+            return None
+
+class ColumnParser:
+    """Parse one date or time column against an ordered list of formats
+
+    Gives the same results as calling datetime.strptime with each format in
+    turn. After the first sample_size values, only formats sharing a skeleton
+    with the formats seen so far are tried first; the rest are a fallback.
+    """
+
+    def __init__(self, formats, convert, kind, sample_size=SAMPLE_SIZE):
+        self.formats = [_Format(fmt, convert) for fmt in formats]
+        self.kind = kind
+        self.sample_size = sample_size
+        self.candidates = None
+        self._seen_skeletons = set()
+        self._samples = 0
+        self.parse = lru_cache(maxsize=CACHE_SIZE)(self._parse)
+
+    def _observe(self, matched):
+        """Record a sampled match and narrow the candidates once sampling ends"""
+        self._seen_skeletons.add(matched.skeleton)
+        self._samples += 1
+        if self._samples >= self.sample_size:
+            self.candidates = [fmt for fmt in self.formats if fmt.skeleton in self._seen_skeletons]
+
+    def _parse(self, value):
+        stripped = value.strip()
+        candidates = self.candidates
+        if candidates is not None:
+            for fmt in candidates:
+                result = fmt.parse(stripped)
+                if result is not None:
+                    return result
+
+        for fmt in self.formats:
+            if candidates is not None and fmt in candidates:
+                continue
+            result = fmt.parse(stripped)
+            if result is not None:
+                if candidates is None:
+                    self._observe(fmt)
+                return result
+
+        raise ValueError(f"Could not parse {self.kind}: {value}")
+
+class DateTimeParser:
+    """Date/time parser for the rows of a single CSV file"""
+
+    def __init__(self, sample_size=SAMPLE_SIZE):
+        self.dates = ColumnParser(DATETIME_DATE_FORMATS, _date_from_match, 'date', sample_size)
+        self.times = ColumnParser(TIME_FORMATS, _time_from_match, 'time', sample_size)
+
+    def parse_datetime(self, date_str, time_str):
+        """Convert date and time strings to datetime object"""
+        return datetime.combine(self.dates.parse(date_str), self.times.parse(time_str))
+
+_date_parser = ColumnParser(DATE_FORMATS, _date_from_match, 'date')
+_datetime_parser = DateTimeParser()
+
+def parse_date(date_str):
+    """Parse date string in various formats"""
+    return _date_parser.parse(date_str)
 
 def parse_datetime(date_str, time_str):
     """Convert date and time strings to datetime object"""
-    # Try different date formats
-    date_formats = ['%m/%d/%Y', '%Y-%m-%d', '%m-%d-%Y', '%d/%m/%Y', '%d-%m-%Y']
-    time_formats = ['%H:%M', '%I:%M %p', '%H:%M:%S', '%I:%M:%S %p']
-    
-    parsed_date = None
-    for date_format in date_formats:
-        try:
-            parsed_date = datetime.strptime(date_str.strip(), date_format).date()
-            break
-        except ValueError:
-            continue
-    
-    if not parsed_date:
-        raise ValueError(f"Could not parse date: {date_str}")
-    
-    parsed_time = None
-    for time_format in time_formats:
-        try:
-            parsed_time = datetime.strptime(time_str.strip(), time_format).time()
-            break
-        except ValueError:
-            continue
-    
-    if not parsed_time:
-        raise ValueError(f"Could not parse time: {time_str}")
-    
-    return datetime.combine(parsed_date, parsed_time)
\ No newline at end of file
+    return _datetime_parser.parse_datetime(date_str, time_str)
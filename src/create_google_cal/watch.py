@@ -0,0 +1,267 @@
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import signal
+import struct
+import tempfile
+import threading
+import time
+from .calendar_manager import BATCH_SIZE
+from .pipeline import data_offset, read_events
+
+WATCH_STATE = os.path.join('..', 'config', 'watch_state.json')
+# Seconds between directory scans when inotify is unavailable
+POLL_INTERVAL = 1.0
+# Seconds to wait for more writes to a file before importing it
+SETTLE_TIME = 0.05
+# Seconds before retrying a file whose rows failed to import
+RETRY_INTERVAL = 60
+
+# inotify event bits (see inotify(7))
+IN_MODIFY = 0x2
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_TO = 0x80
+_EVENT_HEADER = struct.Struct('iIII')
+
+class InotifyWatcher:
+    """Wait for files in a directory to be written, using Linux inotify through libc
+
+    Raises OSError where inotify is not available.
+    """
+
+    name = 'inotify'
+
+    def __init__(self, directory):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError("inotify is not available")
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"Cannot watch {directory}")
+
+    def _read(self, names):
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if name:
+                names.add(os.fsdecode(name))
+
+    def wait(self, timeout):
+        """Return the names of the files written within timeout seconds
+
+        Once a write arrives, keeps reading until the directory has been
+        quiet for SETTLE_TIME, so a burst of writes is handled once.
+        """
+        names = set()
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        deadline = time.monotonic() + timeout
+        while ready:
+            self._read(names)
+            if time.monotonic() >= deadline:
+                break
+            ready, _, _ = select.select([self.fd], [], [], SETTLE_TIME)
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+class PollingWatcher:
+    """Find written files by comparing the size and modification time of a directory's files"""
+
+    name = 'polling'
+
+    def __init__(self, directory, interval=POLL_INTERVAL):
+        self.directory = directory
+        self.interval = interval
+        self.seen = self._scan()
+
+    def _scan(self):
+        with os.scandir(self.directory) as entries:
+            return {entry.name: (entry.stat().st_size, entry.stat().st_mtime_ns)
+                    for entry in entries if entry.is_file()}
+
+    def wait(self, timeout):
+        """Return the names of the files that changed after sleeping up to timeout seconds"""
+        time.sleep(min(timeout, self.interval))
+        current = self._scan()
+        names = {name for name, signature in current.items() if self.seen.get(name) != signature}
+        self.seen = current
+        return names
+
+    def close(self):
+        pass
+
+def _complete_end(path, size, start=0):
+    """Return the offset after the last newline in a file between start and size, or start if there is none"""
+    with open(path, 'rb') as f:
+        end = size
+        while end > start:
+            position = max(start, end - 65536)
+            f.seek(position)
+            newline = f.read(end - position).rfind(b'\n')
+            if newline >= 0:
+                return position + newline + 1
+            end = position
+    return start
+
+def open_watcher(directory, poll=False):
+    """Return an InotifyWatcher for directory, or a PollingWatcher if inotify is unavailable or poll is set"""
+    if not poll:
+        try:
+            return InotifyWatcher(directory)
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable ({e}); polling every {POLL_INTERVAL:g}s")
+    return PollingWatcher(directory)
+
+class FolderImporter:
+    """Import the rows appended to the CSV files of a directory as they arrive
+
+    The byte offset and row number reached in each file are kept in a
+    JSON state file, so only rows written since the last import are read,
+    across restarts too. A file that is replaced or truncated is read
+    again from the start; with an ImportIndex its unchanged rows are
+    skipped. A last line that is still being written waits for the rest
+    of it. With an index, if any row fails the file's offset is left
+    where it was and the file is retried after RETRY_INTERVAL seconds;
+    without one, failed rows are reported and not retried, since the
+    rows that succeeded would be created twice. A file that cannot be
+    read, such as one with a bad header or encoding, is reported and
+    skipped until it is written again; other errors reading a file are
+    retried after RETRY_INTERVAL seconds.
+    """
+
+    def __init__(self, manager, directory, index=None, calendars=None, default_calendar='primary',
+                 batch_size=BATCH_SIZE, state_path=WATCH_STATE, poll=False):
+        self.manager = manager
+        self.directory = os.path.abspath(directory)
+        self.index = index
+        self.calendars = calendars
+        self.default_calendar = default_calendar
+        self.batch_size = batch_size
+        self.state_path = state_path
+        self.poll = poll
+        # Position reached in each file, as saved in the state file
+        self.offsets = {}
+        if os.path.exists(state_path):
+            with open(state_path, 'r', encoding='utf-8') as f:
+                self.offsets = json.load(f)
+        # Rows per (calendar, date, title) read from each file, for index keys
+        self.occurrences = {path: {tuple(group[:3]): group[3] for group in entry.get('occurrences', ())}
+                            for path, entry in self.offsets.items()}
+        # Files to try again, by the monotonic time they are due
+        self.retries = {}
+        self.stopping = threading.Event()
+
+    def _save(self):
+        """Write the state file atomically through a temporary file in the same directory"""
+        directory = os.path.dirname(self.state_path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.watch-', suffix='.json')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.offsets, f, indent=2)
+            os.replace(temp_path, self.state_path)
+        except Exception:
+            os.remove(temp_path)
+            raise
+
+    def import_new_rows(self, path):
+        """Import the complete rows appended to path since its last import; returns the events created"""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self.offsets.pop(path, None)
+            return 0
+        entry = self.offsets.get(path)
+        if entry is not None and (entry['inode'] != stat.st_ino or stat.st_size < entry['offset']):
+            print(f"{path} was replaced; reading it from the start")
+            entry = None
+        # Rows after the last newline are still being written
+        end = _complete_end(path, stat.st_size, entry['offset'] if entry else 0)
+        if end == 0 or (entry is not None and end == entry['offset']):
+            return 0
+
+        start_offset = entry['offset'] if entry else None
+        start_row = entry['row'] if entry else 0
+        items = []
+        for item in read_events(path, self.calendars, self.default_calendar, start_offset, start_row):
+            if item.next_offset > end:
+                break
+            items.append(item)
+        if items:
+            print(f"\n{path}: {len(items)} new rows")
+            # Counted on a copy so a retry starts from the same counts
+            occurrences = dict(self.occurrences.get(path, {})) if entry else {}
+            stats = self.manager.create_events_from_rows(path, items, self.batch_size, self.index,
+                                                         self.calendars, self.default_calendar, occurrences)
+            if stats['failed'] and self.index is not None:
+                self.retries[path] = time.monotonic() + RETRY_INTERVAL
+                print(f"{stats['failed']} rows of {path} failed; retrying in {RETRY_INTERVAL}s")
+                return stats['created']
+            created = stats['created']
+            offset, row = items[-1].next_offset, items[-1].row_num
+            self.occurrences[path] = occurrences
+        else:
+            created = 0
+            offset, row = (start_offset, start_row) if entry else (data_offset(path), 1)
+        self.retries.pop(path, None)
+        self.offsets[path] = {'offset': offset, 'row': row, 'inode': stat.st_ino,
+                              'occurrences': [list(group) + [count]
+                                              for group, count in self.occurrences.get(path, {}).items()]}
+        self._save()
+        return created
+
+    def import_file(self, path):
+        """Import path's new rows as import_new_rows does, reporting read errors instead of raising them"""
+        try:
+            return self.import_new_rows(path)
+        except ValueError as e:
+            # A bad header or encoding stays bad until the file is rewritten
+            self.retries.pop(path, None)
+            print(f"Error reading {path}: {e}; skipping it until it changes")
+        except OSError as e:
+            self.retries[path] = time.monotonic() + RETRY_INTERVAL
+            print(f"Error reading {path}: {e}; retrying in {RETRY_INTERVAL}s")
+        return 0
+
+    def stop(self, *args):
+        """Finish the import in progress, then return from run; a second call exits at once"""
+        if self.stopping.is_set():
+            raise KeyboardInterrupt
+        print("\nStopping after the current import...")
+        self.stopping.set()
+
+    def run(self):
+        """Watch the directory until stop is called or SIGINT or SIGTERM arrives"""
+        handlers = {signum: signal.signal(signum, self.stop) for signum in (signal.SIGINT, signal.SIGTERM)}
+        watcher = open_watcher(self.directory, self.poll)
+        try:
+            print(f"Watching {self.directory} for CSV files ({watcher.name}); press Ctrl+C to stop")
+            # Catch up on files written while no watcher was running
+            changed = set(os.listdir(self.directory))
+            while not self.stopping.is_set():
+                now = time.monotonic()
+                due = {path for path, when in self.retries.items() if when <= now}
+                paths = {os.path.join(self.directory, name) for name in changed if name.endswith('.csv')}
+                for path in sorted(paths | due):
+                    if self.stopping.is_set():
+                        break
+                    self.import_file(path)
+                changed = watcher.wait(POLL_INTERVAL)
+        finally:
+            watcher.close()
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
@@ -1,19 +1,371 @@
 #!/usr/bin/env python3
 
 import argparse
+import glob
+import importlib
 import os.path
-from create_google_cal.calendar_manager import CalendarManager
+import re
+from create_google_cal.calendar_manager import CalendarManager, BATCH_SIZE, WORKERS
+from create_google_cal.conflicts import csv_rows, find_conflicts, report_conflicts
+from create_google_cal.event_cache import EventCache
+from create_google_cal.import_index import INDEX_PATH, ImportIndex
+from create_google_cal.journal import ImportJournal
+from create_google_cal.metrics import Metrics
+from create_google_cal.pipeline import load_calendar_map, validate_csv
+from create_google_cal.planner import plan_import, print_plan
+from create_google_cal.ratelimit import CONCURRENCY, DAILY_QUOTA, QUOTA_PER_MINUTE, RATE, QuotaScheduler
+from create_google_cal.recurrence import compression_report
 from create_google_cal.utils import parse_date
+from create_google_cal.watch import FolderImporter
 from create_google_cal.auth import setup_credentials_help, validate_credentials_file
 
+def resolve_csv_path(file_arg):
+    """Find a CSV file, looking in the data directory for relative paths"""
+    # Check if file exists - handle both absolute and relative paths
+    file_path = file_arg
+    if not os.path.isabs(file_path):
+        # If relative path, check in data directory (go up one level from src)
+        data_file_path = os.path.join('..', 'data', file_path)
+        if os.path.exists(data_file_path):
+            file_path = data_file_path
+        elif not os.path.exists(file_path):
+            print(f"Error: File {file_arg} not found")
+            return None
+    return file_path
+
+def resolve_csv_paths(file_arg):
+    """Find the CSV files named by a file, a directory or a glob pattern
+    
+    Relative paths are looked up in the data directory first, as for
+    resolve_csv_path. Returns a sorted list, or None if nothing matches.
+    """
+    candidates = [file_arg] if os.path.isabs(file_arg) else [os.path.join('..', 'data', file_arg), file_arg]
+    for candidate in candidates:
+        if os.path.isdir(candidate):
+            file_paths = sorted(glob.glob(os.path.join(candidate, '*.csv')))
+            if not file_paths:
+                print(f"Error: No CSV files in {file_arg}")
+                return None
+            return file_paths
+        if glob.escape(candidate) != candidate:
+            file_paths = sorted(path for path in glob.glob(candidate) if os.path.isfile(path))
+            if file_paths:
+                return file_paths
+    if glob.escape(file_arg) != file_arg:
+        print(f"Error: No files match {file_arg}")
+        return None
+    file_path = resolve_csv_path(file_arg)
+    return [file_path] if file_path else None
+
+def open_journal(file_path, args):
+    """Return the ImportJournal for a CSV file, loaded for --resume, or None after printing an error"""
+    journal = ImportJournal(file_path)
+    if args.resume:
+        if args.prune:
+            print("Error: --prune needs every row, so it cannot be combined with --resume")
+            return None
+        if not journal.exists():
+            print(f"Error: No interrupted import of {file_path} to resume")
+            return None
+        try:
+            journal.load()
+        except ValueError as e:
+            print(f"Error: {e}; rerun without --resume")
+            return None
+    elif journal.exists():
+        print(f"Starting over; an interrupted import of {file_path} will no longer be resumable")
+    return journal
+
+def check_rows(file_path, args):
+    """Report overlapping and inverted rows of a CSV file without calling the API"""
+    print()
+    calendars = load_calendar_map(args.calendar_map) if args.calendar_map else None
+    records, errors = csv_rows(file_path, calendars, args.calendar, bulk=args.bulk)
+    return report_conflicts(find_conflicts(records))
+
+def plan_files(file_paths, calendars, args):
+    """Add up the plan_import counts of several CSV files"""
+    # Without an index file nothing was imported before, and none is created
+    index = None if args.no_index or not os.path.exists(INDEX_PATH) else ImportIndex()
+    try:
+        total = {}
+        for file_path in file_paths:
+            plan = plan_import(file_path, calendars, args.calendar, index=index, prune=args.prune,
+                               compress=args.compress, batch_size=args.batch_size, bulk=args.bulk)
+            for name, value in plan.items():
+                total[name] = total.get(name, 0) + value
+        return total
+    finally:
+        if index is not None:
+            index.close()
+
+def load_hook(spec):
+    """Import a metrics hook given as 'module:function'"""
+    module_name, _, function_name = spec.partition(':')
+    if not module_name or not function_name:
+        raise ValueError("expected module:function")
+    return getattr(importlib.import_module(module_name), function_name)
+
+def import_files(file_paths, args, calendar_manager, scheduler=None):
+    """Import CSV files, after checking them for conflicts and printing the quota plan with a scheduler"""
+    calendars = load_calendar_map(args.calendar_map) if args.calendar_map else None
+    if args.check_conflicts:
+        conflicts = 0
+        for file_path in file_paths:
+            if len(file_paths) > 1:
+                print(f"\n== {file_path} ==")
+            conflicts += len(calendar_manager.check_conflicts(file_path, calendars, args.calendar, args.bulk))
+        if conflicts:
+            print("Not importing; fix the conflicts above or run without --check-conflicts")
+            return
+    
+    if scheduler is not None:
+        print_plan(plan_files(file_paths, calendars, args), scheduler)
+    
+    journals = {}
+    try:
+        for file_path in file_paths:
+            journal = open_journal(file_path, args)
+            if journal is None:
+                return
+            journals[file_path] = journal
+        
+        index = None if args.no_index else ImportIndex()
+        try:
+            if len(file_paths) > 1 and not args.use_async:
+                calendar_manager.create_events_from_files(file_paths, batch_size=args.batch_size,
+                                                          index=index, prune=args.prune,
+                                                          calendars=calendars, default_calendar=args.calendar,
+                                                          journals=journals, resume=args.resume,
+                                                          compress=args.compress, bulk=args.bulk,
+                                                          processes=args.processes)
+            else:
+                # The async engine already keeps every connection busy, so files go one at a time
+                for file_path in file_paths:
+                    if len(file_paths) > 1:
+                        print(f"\n== {file_path} ==")
+                    calendar_manager.create_events_from_csv(file_path, batch_size=args.batch_size,
+                                                            index=index, prune=args.prune,
+                                                            calendars=calendars,
+                                                            default_calendar=args.calendar,
+                                                            journal=journals[file_path], resume=args.resume,
+                                                            compress=args.compress, bulk=args.bulk)
+        finally:
+            if index is not None:
+                index.close()
+    finally:
+        for journal in journals.values():
+            journal.close()
+
+def run_command(args, calendar_manager, scheduler=None):
+    """Run the delete, reconcile, import or resync command selected by args"""
+    if args.delete:
+        if not args.start or not args.end:
+            print("Error: --delete requires both --start and --end dates")
+            return
+        
+        try:
+            start_date = parse_date(args.start)
+            end_date = parse_date(args.end)
+            
+            if start_date > end_date:
+                print("Error: Start date must be before end date")
+                return
+            
+            match = None
+            if args.match:
+                try:
+                    match = re.compile(args.match)
+                except re.error as e:
+                    print(f"Error: Invalid --match pattern: {e}")
+                    return
+                
+            calendar_manager.delete_events_in_range(start_date, end_date, force=args.force,
+                                                    workers=args.workers, calendar_id=args.calendar,
+                                                    query=args.query, match=match)
+            
+        except ValueError as e:
+            print(f"Error parsing dates: {e}")
+            return
+    
+    elif args.delete_ids:
+        try:
+            with open(args.delete_ids, 'r') as f:
+                event_ids = [line.strip() for line in f if line.strip()]
+        except OSError as e:
+            print(f"Error: Could not read {args.delete_ids}: {e}")
+            return
+        calendar_manager.delete_events_by_id(event_ids, calendar_id=args.calendar,
+                                             batch_size=args.batch_size, force=args.force)
+    
+    elif args.export:
+        if not args.start or not args.end or not args.output:
+            print("Error: --export requires --start, --end and --output")
+            return
+        try:
+            start_date = parse_date(args.start)
+            end_date = parse_date(args.end)
+        except ValueError as e:
+            print(f"Error parsing dates: {e}")
+            return
+        if start_date > end_date:
+            print("Error: Start date must be before end date")
+            return
+        
+        match = None
+        if args.match:
+            try:
+                match = re.compile(args.match)
+            except re.error as e:
+                print(f"Error: Invalid --match pattern: {e}")
+                return
+        try:
+            calendar_manager.export_csv(start_date, end_date, args.output, calendar_id=args.calendar,
+                                        query=args.query, match=match)
+        except OSError as e:
+            print(f"Error: Could not write {args.output}: {e}")
+    
+    elif args.reconcile:
+        file_paths = resolve_csv_paths(args.file)
+        if not file_paths:
+            return
+        if len(file_paths) > 1:
+            print("Error: --reconcile takes a single CSV file")
+            return
+        file_path = file_paths[0]
+        
+        start_date = end_date = None
+        if args.start or args.end:
+            if not args.start or not args.end:
+                print("Error: --reconcile needs both --start and --end, or neither")
+                return
+            try:
+                start_date = parse_date(args.start)
+                end_date = parse_date(args.end)
+            except ValueError as e:
+                print(f"Error parsing dates: {e}")
+                return
+            if start_date > end_date:
+                print("Error: Start date must be before end date")
+                return
+        
+        try:
+            calendars = load_calendar_map(args.calendar_map) if args.calendar_map else None
+            calendar_manager.reconcile_csv(file_path, start_date, end_date, calendars=calendars,
+                                           default_calendar=args.calendar, batch_size=args.batch_size,
+                                           force=args.force, dry_run=args.dry_run, bulk=args.bulk)
+        except ValueError as e:
+            print(f"Error: {e}")
+    
+    elif args.file:
+        file_paths = resolve_csv_paths(args.file)
+        if not file_paths:
+            return
+        try:
+            import_files(file_paths, args, calendar_manager, scheduler)
+        except ValueError as e:
+            print(f"Error: {e}")
+    
+    elif args.watch:
+        directory = args.watch
+        if not os.path.isdir(directory) and not os.path.isabs(directory):
+            # A relative path may name the data directory itself or a directory inside it
+            directory = next((candidate for candidate in (os.path.join('..', directory),
+                                                          os.path.join('..', 'data', directory))
+                              if os.path.isdir(candidate)), directory)
+        if not os.path.isdir(directory):
+            print(f"Error: Directory {args.watch} not found")
+            return
+        
+        calendars = load_calendar_map(args.calendar_map) if args.calendar_map else None
+        index = None if args.no_index else ImportIndex()
+        try:
+            FolderImporter(calendar_manager, directory, index=index, calendars=calendars,
+                           default_calendar=args.calendar, batch_size=args.batch_size, poll=args.poll).run()
+        finally:
+            if index is not None:
+                index.close()
+    
+    elif args.resync:
+        calendar_manager.sync_cache(args.calendar)
+
 def main():
     parser = argparse.ArgumentParser(description='Manage Google Calendar events from CSV')
-    parser.add_argument('-f', '--file', help='CSV file to import events from')
-    parser.add_argument('-s', '--start', help='Start date for deletion (e.g., 28-7-2025)')
-    parser.add_argument('-e', '--end', help='End date for deletion (e.g., 1-8-2025)')
+    parser.add_argument('-f', '--file',
+                        help='CSV file to import events from, or a directory or glob pattern of CSV files')
+    parser.add_argument('-s', '--start', help='Start date for deletion or export (e.g., 28-7-2025)')
+    parser.add_argument('-e', '--end', help='End date for deletion or export (e.g., 1-8-2025)')
     parser.add_argument('--delete', action='store_true', help='Delete events in date range')
+    parser.add_argument('--delete-ids', metavar='FILE',
+                        help='Delete the events whose IDs are listed in FILE, one per line')
+    parser.add_argument('--reconcile', action='store_true',
+                        help='Make the calendar match the CSV between --start and --end (default: the CSV dates), '
+                             'creating and deleting only what differs')
+    parser.add_argument('--export', action='store_true',
+                        help='Write the events between --start and --end to a CSV file in the import format')
+    parser.add_argument('-o', '--output', help='CSV file to write with --export')
+    parser.add_argument('--query',
+                        help='Only delete or export events containing this text (matched by Google Calendar)')
+    parser.add_argument('--match',
+                        help='Only delete or export events whose title matches this regular expression')
     parser.add_argument('--force', action='store_true', help='Skip confirmation prompt')
     parser.add_argument('--setup', action='store_true', help='Show Google API setup instructions')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help=f'Events per batch request when importing (1 disables batching, max {BATCH_SIZE})')
+    parser.add_argument('--validate-only', action='store_true',
+                        help='Check every CSV row and report errors without importing')
+    parser.add_argument('--compress', action='store_true',
+                        help='Create rows repeating on a regular schedule as one recurring event')
+    parser.add_argument('--bulk', action='store_true',
+                        help='Parse the CSV in large column-wise chunks (faster for very large files)')
+    parser.add_argument('--check-conflicts', action='store_true',
+                        help='Before importing, report rows that overlap each other or existing events, or end '
+                             'before they start, and import nothing if there are any')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Report the events an import would create without calling the API')
+    parser.add_argument('--no-index', action='store_true',
+                        help='Import every row, even if it was imported before')
+    parser.add_argument('--prune', action='store_true',
+                        help='Delete previously imported events whose rows were removed from the CSV')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue an interrupted import of the CSV file where it stopped')
+    parser.add_argument('--processes', type=int,
+                        help='Worker processes parsing files when importing several (default: one per CPU)')
+    parser.add_argument('--watch', metavar='DIR',
+                        help='Keep running and import the rows added to CSV files in DIR as they are written')
+    parser.add_argument('--poll', action='store_true',
+                        help='With --watch, scan the directory every second instead of using inotify')
+    parser.add_argument('--workers', type=int, default=WORKERS,
+                        help=f'Concurrent delete requests (default {WORKERS})')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='Import or delete with many requests in flight on one asyncio event loop')
+    parser.add_argument('--concurrency', type=int, default=CONCURRENCY,
+                        help=f'Requests in flight with --async (default {CONCURRENCY})')
+    parser.add_argument('--rate', type=float, default=RATE,
+                        help=f'Requests per second with --async, matching your API quota '
+                             f'(default {RATE:g}, 0 for no limit)')
+    parser.add_argument('--quota', type=float, metavar='N',
+                        help=f'Pace API requests to N per minute (the default API quota is {QUOTA_PER_MINUTE}); '
+                             f'with --async this replaces --rate')
+    parser.add_argument('--daily-quota', type=int, metavar='N',
+                        help='Send at most N API requests per quota day (midnight Pacific time), then wait '
+                             'for the next day; the count is shared by every run')
+    parser.add_argument('--calendar', default='primary',
+                        help='Calendar ID to delete from or export, and for CSV rows without a calendar column')
+    parser.add_argument('--calendar-map',
+                        help='JSON file mapping names in the CSV calendar column to calendar IDs')
+    parser.add_argument('--quiet', action='store_true',
+                        help='Do not print a line for every created, updated or deleted event')
+    parser.add_argument('--progress', action='store_true',
+                        help='Show a live progress line with rates, API calls and retries (implies --quiet)')
+    parser.add_argument('--metrics-json', metavar='PATH',
+                        help='Write API latency histograms, retries, row rates and bytes to a JSON file')
+    parser.add_argument('--metrics-hook', metavar='MODULE:FUNCTION',
+                        help='Call FUNCTION(event) from MODULE for every API call, retry and row counted')
+    parser.add_argument('--cache', action='store_true',
+                        help='Answer range scans from a local event cache kept in sync incrementally')
+    parser.add_argument('--resync', action='store_true',
+                        help='Discard the local event cache and download it again (implies --cache)')
     
     args = parser.parse_args()
     
@@ -29,48 +381,117 @@ def main():
             print(f"❌ {message}")
         return
     
-    # Initialize calendar manager for other operations
-    calendar_manager = CalendarManager()
+    if args.validate_only:
+        if not args.file:
+            print("Error: --validate-only requires --file")
+            return
+        file_paths = resolve_csv_paths(args.file) or []
+        for file_path in file_paths:
+            if len(file_paths) > 1:
+                print(f"\n== {file_path} ==")
+            try:
+                validate_csv(file_path, bulk=args.bulk)
+                if args.check_conflicts:
+                    check_rows(file_path, args)
+            except ValueError as e:
+                print(f"Error: {e}")
+        return
     
-    if args.delete:
-        if not args.start or not args.end:
-            print("Error: --delete requires both --start and --end dates")
+    if args.dry_run and not args.reconcile:
+        if not args.file:
+            print("Error: --dry-run requires --file")
+            return
+        file_paths = resolve_csv_paths(args.file)
+        if not file_paths:
             return
-        
         try:
-            start_date = parse_date(args.start)
-            end_date = parse_date(args.end)
-            
-            if start_date > end_date:
-                print("Error: Start date must be before end date")
-                return
-                
-            calendar_manager.delete_events_in_range(start_date, end_date, force=args.force)
-            
+            calendars = load_calendar_map(args.calendar_map) if args.calendar_map else None
+            rows = events = 0
+            for file_path in file_paths:
+                if len(file_paths) > 1:
+                    print(f"\n== {file_path} ==")
+                file_rows, file_events = compression_report(file_path, calendars, args.calendar, bulk=args.bulk)
+                if args.check_conflicts:
+                    check_rows(file_path, args)
+                rows += file_rows
+                events += file_events
+            if not args.compress and events < rows:
+                print("Run with --compress to create the recurring events above")
+            scheduler = QuotaScheduler(args.quota or QUOTA_PER_MINUTE, args.daily_quota or DAILY_QUOTA)
+            print_plan(plan_files(file_paths, calendars, args), scheduler)
         except ValueError as e:
-            print(f"Error parsing dates: {e}")
-            return
+            print(f"Error: {e}")
+        return
     
-    elif args.file:
-        # Check if file exists - handle both absolute and relative paths
-        file_path = args.file
-        if not os.path.isabs(file_path):
-            # If relative path, check in data directory (go up one level from src)
-            data_file_path = os.path.join('..', 'data', file_path)
-            if os.path.exists(data_file_path):
-                file_path = data_file_path
-            elif not os.path.exists(file_path):
-                print(f"Error: File {args.file} not found")
-                return
-        
-        calendar_manager.create_events_from_csv(file_path)
+    if args.reconcile and not args.file:
+        print("Error: --reconcile requires --file")
+        return
     
-    else:
+    if not (args.delete or args.delete_ids or args.export or args.file or args.watch or args.resync):
         print("Usage examples:")
         print("  Show setup instructions: python gcal.py --setup")
         print("  Create events from CSV: python gcal.py -f july28.csv")
         print("  Delete events in range: python gcal.py --delete -s 28-7-2025 -e 1-8-2025")
+        print("  Import CSV files as they arrive: python gcal.py --watch data/")
+        print("  Export events in range: python gcal.py --export -s 28-7-2025 -e 1-8-2025 -o backup.csv")
         print("  Delete events without confirmation: python gcal.py --delete -s 28-7-2025 -e 1-8-2025 --force")
+        return
+    
+    if args.use_async:
+        unsupported = [flag for flag, used in (('--reconcile', args.reconcile), ('--delete-ids', args.delete_ids),
+                                               ('--export', args.export), ('--watch', args.watch),
+                                               ('--compress', args.compress), ('--prune', args.prune),
+                                               ('--cache', args.cache), ('--resync', args.resync),
+                                               ('--check-conflicts', args.check_conflicts),
+                                               ('--daily-quota', args.daily_quota)) if used]
+        if unsupported:
+            print(f"Error: --async cannot be combined with {', '.join(unsupported)}")
+            return
+    
+    cache = None
+    if args.cache or args.resync:
+        cache = EventCache()
+        if args.resync:
+            cache.invalidate(args.calendar)
+    
+    metrics = Metrics()
+    if args.metrics_hook:
+        try:
+            metrics.add_hook(load_hook(args.metrics_hook))
+        except (ImportError, AttributeError, ValueError) as e:
+            print(f"Error: Could not load --metrics-hook {args.metrics_hook}: {e}")
+            return
+    
+    # Initialize calendar manager for other operations
+    scheduler = None
+    if args.use_async:
+        # asyncio alone takes longer to import than the rest of the CLI
+        from create_google_cal import async_manager
+        if async_manager.httpx is None:
+            print(f"Error: {async_manager.INSTALL_HINT}")
+            return
+        calendar_manager = async_manager.AsyncCalendarManager(concurrency=args.concurrency,
+                                                rate=args.quota / 60 if args.quota else args.rate,
+                                                metrics=metrics, quiet=args.quiet or args.progress)
+    else:
+        if args.quota or args.daily_quota:
+            scheduler = QuotaScheduler(args.quota, args.daily_quota)
+        calendar_manager = CalendarManager(cache=cache, metrics=metrics, quiet=args.quiet or args.progress,
+                                           scheduler=scheduler)
+    if args.progress:
+        metrics.start_progress()
+    try:
+        run_command(args, calendar_manager, scheduler)
+    finally:
+        metrics.stop_progress()
+        if scheduler is not None:
+            scheduler.close()
+        if args.metrics_json:
+            metrics.write_json(args.metrics_json)
+            print(f"Metrics written to {args.metrics_json}")
+    
+    if cache is not None:
+        cache.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,20 @@
+import pytest
+
+from create_google_cal.calendar_manager import CalendarManager
+from fake_calendar_server import FakeCalendarServer, fake_credentials
+
+@pytest.fixture
+def server():
+    with FakeCalendarServer() as server:
+        yield server
+
+@pytest.fixture
+def manager(server):
+    return CalendarManager(creds=fake_credentials(), root_url=server.root_url, quiet=True)
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    """Retry throttled requests at once instead of sleeping"""
+    monkeypatch.setattr('create_google_cal.retry.backoff_delay', lambda attempt, **options: 0)
+    monkeypatch.setattr('create_google_cal.calendar_manager.backoff_delay', lambda attempt, **options: 0)
+    monkeypatch.setattr('create_google_cal.async_manager.backoff_delay', lambda attempt, **options: 0)
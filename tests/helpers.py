@@ -0,0 +1,44 @@
+import csv
+import json
+
+HEADER = ['date', 'start time', 'end time', 'event name']
+
+def write_csv(path, rows, header=HEADER):
+    """Write rows of (date, start, end, name[, calendar]) to a CSV file and return its path as a string"""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+    return str(path)
+
+def add_events(server, count, calendar_id='primary', day='2025-03-10'):
+    """Store count half-hour events directly in the fake server, returning them"""
+    calendar = server.api.calendar(calendar_id)
+    events = []
+    for n in range(count):
+        hour, half = divmod(n % 48, 2)
+        start = f"{day}T{hour:02d}:{30 * half:02d}:00Z"
+        end = f"{day}T{hour:02d}:{30 * half + 29:02d}:00Z"
+        event = {'id': f"event{n}", 'summary': f"Event {n}", 'start': {'dateTime': start},
+                 'end': {'dateTime': end}, 'status': 'confirmed'}
+        calendar.add(event)
+        events.append(event)
+    return events
+
+def intercept(server, reject=None):
+    """Record the method of every API call the fake server handles, returning the list
+
+    reject(body) may return True for an insert or update body to refuse it with a 400.
+    """
+    from fake_calendar_server import _error
+    calls = []
+    handle = server.api.handle
+
+    def wrapped(method, path, body):
+        calls.append(method)
+        if reject is not None and body and reject(json.loads(body)):
+            return _error(400, 'invalid', 'Rejected by test')
+        return handle(method, path, body)
+
+    server.api.handle = wrapped
+    return calls
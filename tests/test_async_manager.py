@@ -0,0 +1,31 @@
+from datetime import date
+
+import pytest
+
+from create_google_cal.async_manager import AsyncCalendarManager
+from create_google_cal.import_index import ImportIndex
+from fake_calendar_server import fake_credentials
+
+from .helpers import add_events, write_csv
+
+pytest.importorskip('httpx')
+
+def test_async_import_is_idempotent(server, tmp_path):
+    rows = [('2025-03-10', f"{hour:02d}:00", f"{hour:02d}:30", 'On-call') for hour in range(8, 18)]
+    path = write_csv(tmp_path / 'roster.csv', rows)
+    manager = AsyncCalendarManager(creds=fake_credentials(), root_url=server.root_url, rate=0, quiet=True)
+    index = ImportIndex(str(tmp_path / 'index.db'))
+    assert manager.create_events_from_csv(path, index=index) == 10
+    assert manager.create_events_from_csv(path, index=index) == 0
+    assert server.api.stats['requests'] == 10
+    assert server.api.event_count() == 10
+    index.close()
+
+def test_async_range_delete_retries_throttled_requests(server, no_backoff):
+    add_events(server, 120)
+    server.api.throttle_rate = 0.1
+    manager = AsyncCalendarManager(creds=fake_credentials(), root_url=server.root_url, concurrency=20, rate=0,
+                                   quiet=True)
+    assert manager.delete_events_in_range(date(2025, 3, 10), date(2025, 3, 10), force=True) == 120
+    assert server.api.stats['throttled'] > 0
+    assert server.api.event_count() == 0
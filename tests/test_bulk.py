@@ -0,0 +1,47 @@
+import pytest
+
+from create_google_cal import bulk
+from create_google_cal.bulk import read_events_bulk
+from create_google_cal.pipeline import read_events
+
+ROSTER = (
+    'date,start time,end time,event name,calendar\n'
+    '2025-03-10,09:00,17:00,Day shift,team\n'
+    '03/11/2025,9:00 AM,5:00 PM,Day shift,\n'
+    '\n'
+    '2025-03-12,22:00,23:30:15,Late shift,other\n'
+    '2025-03-13,25:00,26:00,Bad time,team\n'
+    'not a date,09:00,10:00,Bad date,team\n'
+    '2025-03-14,09:00\n'
+    '2025-03-15,08:00,09:00,"Stand-up\nwith notes",team\n'
+    '2025-03-16,08:00,09:00,Café meeting,team\n'
+    '\n'
+    '\n'
+    '2025-03-17,12:00,13:00,Lunch,team\n'
+)
+
+@pytest.fixture
+def roster(tmp_path):
+    path = tmp_path / 'roster.csv'
+    path.write_bytes((ROSTER * 5).encode('utf-8'))
+    return str(path)
+
+@pytest.fixture(params=[(7, 64), (3, 1 << 20), (50000, 1 << 20)], ids=['tiny', 'small-chunks', 'default'])
+def chunking(request, monkeypatch):
+    chunk_rows, block_bytes = request.param
+    monkeypatch.setattr(bulk, 'CHUNK_ROWS', chunk_rows)
+    monkeypatch.setattr(bulk, 'BLOCK_BYTES', block_bytes)
+
+def test_bulk_reader_matches_streaming_reader(roster, chunking):
+    calendars = {'team': 'team@example.com'}
+    expected = list(read_events(roster, calendars, 'default'))
+    assert list(read_events_bulk(roster, calendars, 'default')) == expected
+    assert {type(item).__name__ for item in expected} == {'EventRecord', 'RowError'}
+
+def test_bulk_reader_matches_streaming_reader_from_an_offset(roster, chunking):
+    items = list(read_events(roster))
+    middle = items[len(items) // 2]
+    previous = items[len(items) // 2 - 1]
+    expected = list(read_events(roster, start_offset=middle.offset, start_row=previous.row_num))
+    assert list(read_events_bulk(roster, start_offset=middle.offset, start_row=previous.row_num)) == expected
+    assert expected == items[len(items) // 2:]
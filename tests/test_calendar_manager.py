@@ -0,0 +1,252 @@
+import csv
+from datetime import date, datetime, timedelta
+
+from googleapiclient.errors import HttpError
+
+from create_google_cal import calendar_manager
+from create_google_cal.import_index import ImportIndex
+from create_google_cal.journal import ImportJournal
+from create_google_cal.pipeline import read_events
+
+from .helpers import add_events, intercept, write_csv
+
+def shifts(count, day='2025-03-10', title=None):
+    """Rows of consecutive 15-minute shifts from 08:00, all with the same title if given"""
+    rows = []
+    for n in range(count):
+        start = datetime(2025, 1, 1, 8) + timedelta(minutes=15 * n)
+        end = start + timedelta(minutes=15)
+        rows.append((day, f"{start:%H:%M}", f"{end:%H:%M}", title or f"Shift {n + 1}"))
+    return rows
+
+def stored(server, calendar_id='primary'):
+    """The (start, end, summary) of every event in a fake calendar"""
+    return sorted((event['start']['dateTime'], event['end']['dateTime'], event['summary'])
+                  for event in server.api.calendar(calendar_id).events.values())
+
+def test_delete_stream_with_workers_deletes_every_event(server, manager):
+    events = add_events(server, 60)
+    results = list(manager._delete_stream(iter(events), workers=4))
+    assert sorted(event['id'] for event, _ in results) == sorted(event['id'] for event in events)
+    assert all(error is None for _, error in results)
+    assert server.api.event_count() == 0
+
+def test_delete_stream_reports_each_failure(server, manager):
+    events = add_events(server, 5) + [{'id': 'missing', 'summary': 'Gone'}]
+    results = dict((event['id'], error) for event, error in manager._delete_stream(events, workers=3))
+    assert isinstance(results.pop('missing'), HttpError)
+    assert all(error is None for error in results.values())
+    assert server.api.event_count() == 0
+
+def test_delete_stream_retries_throttled_deletes(server, manager, no_backoff):
+    server.api.throttle_rate = 0.3
+    events = add_events(server, 40)
+    results = list(manager._delete_stream(events, workers=4))
+    assert all(error is None for _, error in results)
+    assert server.api.stats['throttled'] > 0
+    assert server.api.event_count() == 0
+
+def test_delete_stream_bounds_requests_in_flight(server, manager):
+    events = add_events(server, 50)
+    pulled = []
+
+    def source():
+        for event in events:
+            pulled.append(event)
+            yield event
+
+    workers = 3
+    finished = 0
+    for _ in manager._delete_stream(source(), workers=workers):
+        finished += 1
+        assert len(pulled) - finished < workers * 2
+    assert finished == len(events)
+
+def test_batch_results_map_to_their_rows(server, manager, tmp_path, capsys):
+    rows = shifts(12)
+    path = write_csv(tmp_path / 'roster.csv', rows)
+    intercept(server, reject=lambda body: body['summary'] in ('Shift 3', 'Shift 8'))
+    index = ImportIndex(str(tmp_path / 'index.db'))
+    assert manager.create_events_from_csv(path, batch_size=5, index=index) == 10
+    assert server.api.stats['batches'] == 3
+
+    # Every failure is reported against its own row; row numbers are CSV line numbers
+    errors = [line for line in capsys.readouterr().out.splitlines() if line.startswith('Error creating')]
+    assert sorted(line.split(':')[0] for line in errors) == ['Error creating event for row 4',
+                                                            'Error creating event for row 9']
+    # Every created event is recorded against its own row
+    events = server.api.calendar('primary').events
+    recorded = index.conn.execute('SELECT event_id FROM events').fetchall()
+    assert len(recorded) == 10
+    records = {record.summary: record for record in read_events(path)}
+    for (event_id,) in recorded:
+        record = records[events[event_id]['summary']]
+        assert events[event_id]['start']['dateTime'] == record.start.isoformat()
+    index.close()
+
+def test_rows_left_when_sending_fails_count_as_failed(server, manager, tmp_path, monkeypatch, capsys):
+    path = write_csv(tmp_path / 'roster.csv', shifts(12))
+    flush = manager._flush
+    batches = []
+
+    def broken_after_first_batch(pending, batch_size, http=None):
+        batches.append(len(pending))
+        if len(batches) == 1:
+            return flush(pending, batch_size, http=http)
+        # The connection drops part way through the second batch
+        flush(pending[:2], batch_size, http=http)
+        raise ConnectionError("connection reset")
+
+    monkeypatch.setattr(manager, '_flush', broken_after_first_batch)
+    assert manager.create_events_from_csv(path, batch_size=5) == 7
+    out = capsys.readouterr().out
+    assert "Error sending requests: connection reset" in out
+    assert "Failed: 5, invalid rows: 0" in out
+    assert server.api.event_count() == 7
+
+def test_multi_file_import_streams_rows_in_chunks(server, manager, tmp_path, monkeypatch):
+    monkeypatch.setattr(calendar_manager, 'PARSE_CHUNK_ROWS', 4)
+    # Repeated titles, so index keys depend on occurrences counted across chunks
+    files = {'a.csv': shifts(10, title='On-call'), 'b.csv': shifts(3),
+             'c.csv': shifts(4, title='Desk') + [('2025-03-10', '25:00', '26:00', 'Bad')] + shifts(4, '2025-03-11')}
+    paths = [write_csv(tmp_path / name, rows) for name, rows in files.items()]
+    index = ImportIndex(str(tmp_path / 'index.db'))
+    results = manager.create_events_from_files(paths, batch_size=3, index=index, processes=2)
+    assert [results[path]['created'] for path in paths] == [10, 3, 8]
+    assert results[paths[2]]['invalid'] == 1
+    assert server.api.event_count() == 21
+
+    requests_before = server.api.stats['requests']
+    results = manager.create_events_from_files(paths, index=index, processes=2)
+    assert [results[path]['unchanged'] for path in paths] == [10, 3, 8]
+    assert server.api.stats['requests'] == requests_before
+    index.close()
+
+def test_range_delete_spans_pages(server, manager):
+    add_events(server, 620)
+    calls = intercept(server)
+    assert manager.delete_events_in_range(date(2025, 3, 10), date(2025, 3, 10), force=True) == 620
+    assert server.api.event_count() == 0
+    # At 250 events a page the first scan needs three pages
+    assert calls.count('GET') >= 3
+    assert calls.count('DELETE') == 620
+
+def test_delete_by_id_reports_ids_not_found(server, manager, capsys):
+    add_events(server, 3)
+    ids = ['event0', 'nope', 'event2', 'event0', 'gone']
+    assert manager.delete_events_by_id(ids, force=True) == 2
+    out = capsys.readouterr().out
+    assert "Not found (already deleted or wrong calendar): 2" in out
+    assert "  nope\n  gone\n" in out
+    assert "Total events deleted: 2 of 4" in out
+    assert server.api.event_count() == 1
+
+def test_resume_continues_from_the_first_unfinished_row(server, manager, tmp_path):
+    # One title repeated through the day, so index keys depend on each row's occurrence
+    rows = shifts(10, title='On-call')
+    path = write_csv(tmp_path / 'roster.csv', rows)
+    failing = {rows[2][1], rows[6][1]}
+    intercept(server, reject=lambda body: body['start']['dateTime'][11:16] in failing)
+    index = ImportIndex(str(tmp_path / 'index.db'))
+    journal = ImportJournal(path, directory=str(tmp_path / 'journals'))
+    assert manager.create_events_from_csv(path, batch_size=3, index=index, journal=journal) == 8
+    assert journal.exists()
+
+    failing.clear()
+    requests_before = server.api.stats['requests']
+    journal = ImportJournal(path, directory=str(tmp_path / 'journals'))
+    assert journal.load() == 8
+    # Reading restarts at the first failed row, counting the two before it as occurrences
+    offset, chain = journal.resume_point(next(read_events(path)).offset)
+    assert [entry['row'] for entry in chain] == [2, 3]
+    assert manager.create_events_from_csv(path, batch_size=3, index=index, journal=journal, resume=True) == 2
+    assert server.api.stats['requests'] - requests_before == 2
+    assert not journal.exists()
+    assert stored(server) == sorted((f"{day}T{start}:00", f"{day}T{end}:00", title)
+                                    for day, start, end, title in rows)
+
+    # The resumed rows got the same index keys as a full import would
+    assert manager.create_events_from_csv(path, index=index) == 0
+    assert server.api.stats['requests'] - requests_before == 2
+    index.close()
+
+def test_resume_skips_to_the_saved_offset(server, manager, tmp_path):
+    rows = shifts(10)
+    path = write_csv(tmp_path / 'roster.csv', rows)
+    failing = {'Shift 7'}
+    intercept(server, reject=lambda body: body['summary'] in failing)
+    journal = ImportJournal(path, directory=str(tmp_path / 'journals'))
+    manager.create_events_from_csv(path, batch_size=1, journal=journal)
+
+    failing.clear()
+    journal = ImportJournal(path, directory=str(tmp_path / 'journals'))
+    journal.load()
+    records = list(read_events(path))
+    offset, chain = journal.resume_point(records[0].offset)
+    assert offset == records[6].offset
+    assert [entry['row'] for entry in chain] == [record.row_num for record in records[:6]]
+    assert manager.create_events_from_csv(path, journal=journal, resume=True) == 1
+    assert server.api.event_count() == 10
+
+def test_reconcile_sends_only_the_differences(server, manager, tmp_path):
+    rows = shifts(40)
+    path = write_csv(tmp_path / 'roster.csv', rows)
+    manager.create_events_from_csv(path)
+    for n in (4, 17, 30):
+        day, start, end, title = rows[n]
+        rows[n] = (day, start, end, title + ' (moved)')
+    write_csv(tmp_path / 'roster.csv', rows)
+
+    calls = intercept(server)
+    batches_before = server.api.stats['batches']
+    stats = manager.reconcile_csv(path, force=True)
+    assert stats == {'created': 3, 'deleted': 3, 'unchanged': 37}
+    # One list page, then one batch of inserts and one of deletes
+    assert calls == ['GET'] + ['POST'] * 3 + ['DELETE'] * 3
+    assert server.api.stats['batches'] - batches_before == 2
+    assert len(stored(server)) == 40
+
+    calls.clear()
+    assert manager.reconcile_csv(path, force=True) == {'created': 0, 'deleted': 0, 'unchanged': 40}
+    assert calls == ['GET']
+
+def test_check_conflicts_matches_imported_rows_to_their_events(server, manager, tmp_path):
+    rows = shifts(6)
+    path = write_csv(tmp_path / 'roster.csv', rows)
+    manager.create_events_from_csv(path)
+    server.api.calendar('primary').add({'id': 'allday', 'summary': 'Holiday', 'start': {'date': '2025-03-10'},
+                                        'end': {'date': '2025-03-11'}})
+    calls = intercept(server)
+    assert manager.check_conflicts(path) == []
+    assert calls == ['GET']
+
+    # A second copy of a row's event is an existing event overlapping that row
+    day, start, end, title = rows[2]
+    server.api.calendar('primary').add({'id': 'copy', 'summary': title, 'start': {'dateTime': f"{day}T{start}:00"},
+                                        'end': {'dateTime': f"{day}T{end}:00"}})
+    [conflict] = manager.check_conflicts(path)
+    assert {conflict.first.row_num, conflict.second.row_num} == {None, 4}
+
+def test_export_round_trip(server, manager, tmp_path):
+    rows = shifts(30) + shifts(5, day='2025-03-11') + [('2025-03-12', '09:00:30', '17:15', 'Seconds, and a comma')]
+    path = write_csv(tmp_path / 'roster.csv', rows)
+    manager.create_events_from_csv(path)
+    server.api.calendar('primary').add({'id': 'allday', 'summary': 'Holiday', 'start': {'date': '2025-03-11'},
+                                        'end': {'date': '2025-03-12'}})
+
+    exported = str(tmp_path / 'export.csv')
+    assert manager.export_csv(date(2025, 3, 10), date(2025, 3, 12), exported) == len(rows)
+    with open(exported, newline='', encoding='utf-8') as f:
+        assert next(csv.reader(f)) == ['date', 'start time', 'end time', 'event name']
+
+    def key(record):
+        return record.start, record.end, record.summary
+    assert sorted(map(key, read_events(exported))) == sorted(map(key, read_events(path)))
+
+    # Importing the export into an empty calendar recreates the same events
+    server.api.calendar('primary').remove('allday')
+    original = stored(server)
+    for event_id in list(server.api.calendar('primary').events):
+        server.api.calendar('primary').remove(event_id)
+    manager.create_events_from_csv(exported)
+    assert stored(server) == original
@@ -0,0 +1,81 @@
+import sys
+
+import pytest
+
+import gcal
+from create_google_cal import async_manager
+from create_google_cal.calendar_manager import CalendarManager
+from create_google_cal.event_cache import EventCache
+from fake_calendar_server import fake_credentials
+
+from .helpers import write_csv
+
+@pytest.fixture
+def run_gcal(server, tmp_path, monkeypatch):
+    """Run gcal.py with arguments from a src/ directory of its own, against the fake server"""
+    (tmp_path / 'src').mkdir()
+    (tmp_path / 'config').mkdir()
+    monkeypatch.chdir(tmp_path / 'src')
+    monkeypatch.setattr(gcal, 'CalendarManager', lambda **options: CalendarManager(
+        creds=fake_credentials(), root_url=server.root_url, **options))
+    async_manager_class = async_manager.AsyncCalendarManager
+    monkeypatch.setattr(async_manager, 'AsyncCalendarManager', lambda **options: async_manager_class(
+        creds=fake_credentials(), root_url=server.root_url, **options))
+
+    def run(*argv):
+        monkeypatch.setattr(sys, 'argv', ['gcal.py', *argv])
+        gcal.main()
+    return run
+
+@pytest.fixture
+def bad_header(tmp_path):
+    return write_csv(tmp_path / 'bad.csv', [('2025-03-10', '09:00', '10:00', 'Shift')],
+                     header=['date', 'start', 'end time', 'event name'])
+
+@pytest.mark.parametrize('options', [['--validate-only'], ['--dry-run'], [], ['--reconcile', '--force'],
+                                     ['--check-conflicts'], ['--quota', '6000']])
+def test_missing_column_is_reported(run_gcal, bad_header, capsys, options):
+    run_gcal('-f', bad_header, *options)
+    assert "Error: CSV file is missing column(s): start time" in capsys.readouterr().out
+
+def test_import_creates_events(run_gcal, server, tmp_path, capsys):
+    good = write_csv(tmp_path / 'good.csv', [('2025-03-10', '09:00', '10:00', 'Shift')])
+    run_gcal('-f', good)
+    assert server.api.event_count() == 1
+    assert "Total events created: 1" in capsys.readouterr().out
+
+needs_httpx = pytest.mark.skipif(async_manager.httpx is None, reason="the async extra is not installed")
+
+@pytest.mark.parametrize('options', [pytest.param(['--async'], marks=needs_httpx),
+                                     pytest.param(['--async', '--quota', '6000'], marks=needs_httpx),
+                                     ['--quota', '6000']])
+def test_import_with_engine_options(run_gcal, server, tmp_path, capsys, options):
+    good = write_csv(tmp_path / 'good.csv', [('2025-03-10', f"{hour:02d}:00", f"{hour:02d}:30", 'Shift')
+                                             for hour in range(9, 14)])
+    run_gcal('-f', good, *options)
+    assert server.api.event_count() == 5
+    assert "Error" not in capsys.readouterr().out
+
+def test_async_without_httpx_prints_how_to_install_it(run_gcal, server, tmp_path, capsys, monkeypatch):
+    monkeypatch.setattr(async_manager, 'httpx', None)
+    good = write_csv(tmp_path / 'good.csv', [('2025-03-10', '09:00', '10:00', 'Shift')])
+    run_gcal('-f', good, '--async')
+    assert "Error: --async needs httpx; install the async extra with: uv sync --extra async" in capsys.readouterr().out
+    assert server.api.event_count() == 0
+
+def test_resync_rebuilds_the_selected_calendar(run_gcal, tmp_path, monkeypatch):
+    cache = EventCache(str(tmp_path / 'config' / 'event_cache.db'))
+    with cache.conn:
+        cache.conn.executemany('INSERT INTO sync_state (calendar_id, sync_token) VALUES (?, ?)',
+                               [('primary', 'primary-token'), ('team', 'team-token')])
+    cache.close()
+    synced = []
+    monkeypatch.setattr(CalendarManager, 'sync_cache',
+                        lambda self, calendar_id: synced.append((calendar_id, self.cache.sync_token(calendar_id))))
+    run_gcal('--resync', '--calendar', 'team')
+
+    # The sync that follows starts without a token, so it is a full one
+    assert synced == [('team', None)]
+    cache = EventCache(str(tmp_path / 'config' / 'event_cache.db'))
+    assert cache.sync_token('primary') == 'primary-token'
+    cache.close()
@@ -0,0 +1,77 @@
+from datetime import date, datetime
+
+import pytest
+
+from create_google_cal.calendar_manager import CalendarManager
+from create_google_cal.event_cache import EventCache
+from fake_calendar_server import fake_credentials
+
+from .helpers import add_events, intercept
+
+DAY = (datetime(2025, 3, 10), datetime(2025, 3, 11))
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = EventCache(str(tmp_path / 'cache.db'))
+    yield cache
+    cache.close()
+
+def cached_ids(cache):
+    return sorted(event['id'] for event in cache.events_in_range(*DAY))
+
+def test_first_sync_is_full_and_later_ones_fetch_nothing(server, manager, cache):
+    add_events(server, 30)
+    assert cache.sync(manager.service) == 30
+    assert cache.sync_token() is not None
+    assert len(cached_ids(cache)) == 30
+
+    calls = intercept(server)
+    assert cache.sync(manager.service) == 0
+    assert calls == ['GET']
+    assert len(cached_ids(cache)) == 30
+
+def test_incremental_sync_applies_changes_and_removes_cancelled_events(server, manager, cache, monkeypatch):
+    monkeypatch.setattr('create_google_cal.event_cache.SYNC_PAGE_SIZE', 4)
+    events = add_events(server, 10)
+    cache.sync(manager.service)
+    first_token = cache.sync_token()
+
+    calendar = server.api.calendar('primary')
+    calendar.remove('event3')
+    calendar.remove('event7')
+    moved = dict(calendar.remove('event5'), summary='Moved')
+    calendar.add(moved)
+    calendar.add(dict(events[0], id='extra'))
+    # Four changes, over two pages
+    assert cache.sync(manager.service) == 4
+    assert cache.sync_token() != first_token
+    assert cached_ids(cache) == sorted({event['id'] for event in events} - {'event3', 'event7'} | {'extra'})
+    summaries = {event['id']: event['summary'] for event in cache.events_in_range(*DAY)}
+    assert summaries['event5'] == 'Moved'
+
+def test_expired_token_falls_back_to_a_full_resync(server, manager, cache, capsys):
+    add_events(server, 12)
+    cache.sync(manager.service)
+    server.api.calendar('primary').remove('event0')
+    server.api.expire_sync_tokens()
+
+    calls = intercept(server)
+    assert cache.sync(manager.service) == 11
+    assert "full resync" in capsys.readouterr().out
+    # The refused incremental sync, then the full one
+    assert calls == ['GET', 'GET']
+    assert len(cached_ids(cache)) == 11
+    assert cache.sync(manager.service) == 0
+
+def test_range_delete_with_the_cache(server, cache):
+    add_events(server, 20)
+    for n in range(5):
+        server.api.calendar('primary').add({'id': f"later{n}", 'summary': 'Later',
+                                            'start': {'dateTime': f"2025-03-12T0{n}:00:00Z"},
+                                            'end': {'dateTime': f"2025-03-12T0{n}:30:00Z"}})
+    manager = CalendarManager(cache=cache, creds=fake_credentials(), root_url=server.root_url, quiet=True)
+    assert manager.delete_events_in_range(date(2025, 3, 10), date(2025, 3, 10), force=True) == 20
+    assert server.api.event_count() == 5
+    # Deleted events leave the cache too, so a new run finds nothing to delete
+    manager = CalendarManager(cache=cache, creds=fake_credentials(), root_url=server.root_url, quiet=True)
+    assert manager.delete_events_in_range(date(2025, 3, 10), date(2025, 3, 10), force=True) == 0
@@ -0,0 +1,61 @@
+import sqlite3
+
+from create_google_cal.import_index import SCHEMA_VERSION, ImportIndex, _digest, row_key
+
+from .helpers import write_csv
+
+EVENT = {'summary': 'On-call', 'start': {'dateTime': '2025-03-10T09:00:00'}}
+
+def summaries(server):
+    return sorted((event['summary'], event['start']['dateTime'])
+                  for event in server.api.calendar('primary').events.values())
+
+def test_keys_are_per_source():
+    assert row_key('/data/a.csv', 'primary', EVENT, 1) != row_key('/data/b.csv', 'primary', EVENT, 1)
+
+def test_files_with_the_same_rows_keep_their_own_events(server, manager, tmp_path):
+    team_a = write_csv(tmp_path / 'teamA.csv', [('2025-03-10', '09:00', '10:00', 'On-call')])
+    team_b = write_csv(tmp_path / 'teamB.csv', [('2025-03-10', '13:00', '14:00', 'On-call')])
+    index = ImportIndex(str(tmp_path / 'index.db'))
+    assert manager.create_events_from_csv(team_a, index=index) == 1
+    assert manager.create_events_from_csv(team_b, index=index) == 1
+    assert summaries(server) == [('On-call', '2025-03-10T09:00:00'), ('On-call', '2025-03-10T13:00:00')]
+
+    # Re-running either file changes nothing
+    assert manager.create_events_from_csv(team_a, index=index) == 0
+    assert manager.create_events_from_csv(team_b, index=index) == 0
+    assert server.api.stats['requests'] == 2
+    index.close()
+
+def test_multi_file_import_is_idempotent(server, manager, tmp_path):
+    paths = [write_csv(tmp_path / f'team{n}.csv', [('2025-03-10', f'{9 + n}:00', f'{10 + n}:00', 'On-call')])
+             for n in range(3)]
+    index = ImportIndex(str(tmp_path / 'index.db'))
+    results = manager.create_events_from_files(paths, index=index, processes=2)
+    assert [results[path]['created'] for path in paths] == [1, 1, 1]
+    results = manager.create_events_from_files(paths, index=index, processes=2)
+    assert [results[path]['unchanged'] for path in paths] == [1, 1, 1]
+    assert server.api.stats['requests'] == 3
+    assert len(summaries(server)) == 3
+    index.close()
+
+def test_old_index_is_rekeyed_by_source(tmp_path):
+    path = str(tmp_path / 'index.db')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE events (row_key TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, '
+                 'event_id TEXT NOT NULL, calendar_id TEXT NOT NULL, source TEXT NOT NULL)')
+    old_key = _digest('primary', '2025-03-10', 'On-call', '1')
+    conn.execute('INSERT INTO events VALUES (?, ?, ?, ?, ?)', (old_key, 'fp', 'event1', 'primary', '/data/a.csv'))
+    conn.commit()
+    conn.close()
+
+    index = ImportIndex(path)
+    assert index.lookup(row_key('/data/a.csv', 'primary', EVENT, 1)) == ('fp', 'event1')
+    assert index.lookup(old_key) is None
+    index.close()
+
+    # Opening it again does not rekey twice
+    index = ImportIndex(path)
+    assert index.conn.execute('PRAGMA user_version').fetchone()[0] == SCHEMA_VERSION
+    assert index.lookup(row_key('/data/a.csv', 'primary', EVENT, 1)) == ('fp', 'event1')
+    index.close()
@@ -0,0 +1,123 @@
+import json
+import multiprocessing
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from create_google_cal import ratelimit
+from create_google_cal.calendar_manager import CalendarManager
+from create_google_cal.event_cache import EventCache
+from create_google_cal.ratelimit import QUOTA_TIME_ZONE, QuotaScheduler
+
+from fake_calendar_server import _error, fake_credentials
+
+from .helpers import add_events
+
+def saved(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['used']
+
+def fake_clock(scheduler, start=datetime(2025, 3, 10, 12, tzinfo=ZoneInfo(QUOTA_TIME_ZONE))):
+    """Drive scheduler's quota day from a clock that its sleeps move forward; returns the sleeps"""
+    now = [start]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += timedelta(seconds=seconds)
+    scheduler._now = lambda: now[0]
+    scheduler.sleep = sleep
+    scheduler.day = start.date().isoformat()
+    return sleeps
+
+def test_runs_add_up_their_requests(tmp_path):
+    path = str(tmp_path / 'quota.json')
+    first = QuotaScheduler(per_minute=None, state_path=path)
+    second = QuotaScheduler(per_minute=None, state_path=path)
+    first.acquire(150)
+    second.acquire(30)
+    second.close()
+    assert saved(path) == 180
+    first.acquire(10)
+    first.close()
+    assert saved(path) == 190
+    # Each save takes up the requests other runs saved
+    assert first.used == 190
+
+def _spend(path, requests):
+    scheduler = QuotaScheduler(per_minute=None, state_path=path)
+    for _ in range(requests):
+        scheduler.acquire()
+    scheduler.close()
+
+def test_concurrent_processes_share_the_count(tmp_path):
+    path = str(tmp_path / 'quota.json')
+    processes = [multiprocessing.Process(target=_spend, args=(path, 450)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert saved(path) == 1800
+
+def test_corrupted_state_is_reported_and_replaced(tmp_path, capsys):
+    path = tmp_path / 'quota.json'
+    path.write_text('{"day": "2025-03-10", "us')
+    scheduler = QuotaScheduler(per_minute=None, state_path=str(path))
+    assert "Could not read" in capsys.readouterr().out
+    assert scheduler.used == 0
+    scheduler.acquire(5)
+    scheduler.close()
+    assert saved(path) == 5
+
+def test_daily_quota_waits_for_the_next_day(tmp_path, monkeypatch):
+    monkeypatch.setattr(ratelimit, 'SAVE_INTERVAL', 1)
+    scheduler = QuotaScheduler(per_minute=None, per_day=10, state_path=str(tmp_path / 'quota.json'))
+    sleeps = fake_clock(scheduler)
+    for _ in range(25):
+        scheduler.acquire()
+    assert len(sleeps) == 2
+    assert scheduler.used == 5
+
+def test_range_delete_waits_out_the_daily_limit(server, manager, tmp_path):
+    add_events(server, 5)
+    scheduler = QuotaScheduler(per_minute=None, state_path=str(tmp_path / 'quota.json'))
+    sleeps = fake_clock(scheduler)
+    manager.scheduler = scheduler
+    refused = set()
+    handle = server.api.handle
+
+    def daily_limit_once(method, path, body):
+        # The first list and the first delete are refused for the daily quota
+        if method not in refused:
+            refused.add(method)
+            return _error(403, 'dailyLimitExceeded', 'Daily Limit Exceeded')
+        return handle(method, path, body)
+    server.api.handle = daily_limit_once
+
+    assert manager.delete_events_in_range(date(2025, 3, 10), date(2025, 3, 10), force=True, workers=1) == 5
+    assert server.api.event_count() == 0
+    assert refused == {'GET', 'DELETE'}
+    assert len(sleeps) == 2
+
+def test_cache_sync_is_paced_counted_and_held(server, tmp_path):
+    add_events(server, 5)
+    scheduler = QuotaScheduler(per_minute=None, state_path=str(tmp_path / 'quota.json'))
+    sleeps = fake_clock(scheduler)
+    cache = EventCache(str(tmp_path / 'cache.db'))
+    manager = CalendarManager(cache=cache, creds=fake_credentials(), root_url=server.root_url, quiet=True,
+                              scheduler=scheduler)
+    handle = server.api.handle
+    refused = []
+
+    def daily_limit_once(method, path, body):
+        if not refused:
+            refused.append(path)
+            return _error(403, 'dailyLimitExceeded', 'Daily Limit Exceeded')
+        return handle(method, path, body)
+    server.api.handle = daily_limit_once
+
+    assert manager.sync_cache() == 5
+    assert len(sleeps) == 1
+    # The list sent again counts against the next quota day
+    assert scheduler.used == 1
+    assert manager.metrics.requests['list'] == {'count': 1, 'errors': 0}
+    cache.close()
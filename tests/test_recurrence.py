@@ -0,0 +1,121 @@
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from create_google_cal.import_index import ImportIndex
+from create_google_cal.pipeline import EventRecord
+from create_google_cal.planner import plan_import
+from create_google_cal.recurrence import find_series, recurrence_lines, series_pattern
+
+from .helpers import write_csv
+
+MONDAY = date(2025, 1, 6)
+
+def records(days, title='Standup', start=time(9), minutes=30, calendar_id='primary'):
+    """EventRecords for title on each of days (offsets from MONDAY), in file order"""
+    result = []
+    for row_num, offset in enumerate(days, start=2):
+        begin = datetime.combine(MONDAY + timedelta(days=offset), start)
+        result.append(EventRecord(row_num, title, begin, begin + timedelta(minutes=minutes), title, calendar_id,
+                                  row_num * 100, row_num * 100 + 100))
+    return result
+
+def test_weekly_series_counts_its_exceptions():
+    weeks = [0, 1, 2, 4, 5, 6, 8, 9, 10, 11]
+    [series], singles = find_series(records([7 * week for week in weeks]))
+    assert singles == []
+    assert (series.freq, series.interval, series.count) == ('WEEKLY', 1, 12)
+    assert series.exdates == [datetime(2025, 1, 27, 9), datetime(2025, 2, 24, 9)]
+    # COUNT includes the excluded dates, as RRULE does
+    assert recurrence_lines(series, 'Europe/Paris') == [
+        'RRULE:FREQ=WEEKLY;COUNT=12', 'EXDATE;TZID=Europe/Paris:20250127T090000,20250224T090000']
+    assert series_pattern(series) == 'WEEKLY;1;MO'
+
+@pytest.mark.parametrize('step, freq, interval, rule', [
+    (1, 'DAILY', 1, 'RRULE:FREQ=DAILY;COUNT=6'),
+    (3, 'DAILY', 3, 'RRULE:FREQ=DAILY;INTERVAL=3;COUNT=6'),
+    (14, 'WEEKLY', 2, 'RRULE:FREQ=WEEKLY;INTERVAL=2;COUNT=6'),
+])
+def test_interval(step, freq, interval, rule):
+    [series], singles = find_series(records([step * n for n in range(6)]))
+    assert (series.freq, series.interval) == (freq, interval)
+    assert recurrence_lines(series, 'UTC') == [rule]
+    assert singles == []
+
+def test_several_weekdays_become_one_series_per_weekday():
+    days = sorted([7 * week for week in range(6)] + [7 * week + 3 for week in range(6)])
+    series, singles = find_series(records(days))
+    assert singles == []
+    assert sorted(series_pattern(item) for item in series) == ['WEEKLY;1;MO', 'WEEKLY;1;TH']
+    assert all(item.count == 6 and not item.exdates for item in series)
+
+@pytest.mark.parametrize('present, is_series', [(9, True), (8, False)])
+def test_exception_cap(present, is_series):
+    # Dates over twelve weeks; a series may miss at most a quarter of them
+    weeks = [0, 11] + list(range(1, present - 1))
+    series, singles = find_series(records(sorted(7 * week for week in weeks)))
+    assert bool(series) == is_series
+    assert len(singles) == (0 if is_series else present)
+
+def test_rows_that_do_not_repeat_enough_stay_single():
+    rows = records([0, 7]) + records([0, 7, 14], start=time(10)) + records([1], title='Review')
+    series, singles = find_series(rows)
+    assert [len(item.records) for item in series] == [3]
+    assert sorted((record.summary, record.start.day) for record in singles) == [
+        ('Review', 7), ('Standup', 6), ('Standup', 13)]
+
+def test_a_second_row_on_the_same_day_stays_single():
+    rows = records([0, 7, 14, 21, 7])
+    [series], singles = find_series(rows)
+    assert len(series.records) == 4
+    assert [record.row_num for record in singles] == [6]
+
+class TestToggleCompress:
+    """Importing a file with and without --compress keeps one event per row"""
+
+    @pytest.fixture
+    def roster(self, tmp_path):
+        rows = [((MONDAY + timedelta(weeks=week)).isoformat(), '09:00', '09:30', 'Standup') for week in range(12)]
+        rows += [('2025-01-07', '14:00', '15:00', 'Review'), ('2025-01-20', '09:00', '09:30', 'Standup')]
+        return write_csv(tmp_path / 'roster.csv', rows)
+
+    @pytest.fixture
+    def index(self, tmp_path):
+        index = ImportIndex(str(tmp_path / 'index.db'))
+        yield index
+        index.close()
+
+    def run(self, server, manager, roster, index, compress):
+        """Import roster, checking the dry-run plan against the requests sent"""
+        plan = plan_import(roster, index=index, compress=compress)
+        before = server.api.stats['requests']
+        manager.create_events_from_csv(roster, index=index, compress=compress)
+        assert server.api.stats['requests'] - before == plan['requests']
+        return plan['requests']
+
+    def recurring(self, server):
+        return sum(1 for event in server.api.calendar('primary').events.values() if 'recurrence' in event)
+
+    def test_compressed_then_single(self, server, manager, roster, index):
+        self.run(server, manager, roster, index, compress=True)
+        # The series, the Review row and the second Standup on 2025-01-20
+        assert server.api.event_count() == 3
+        assert self.recurring(server) == 1
+
+        self.run(server, manager, roster, index, compress=False)
+        assert server.api.event_count() == 14
+        assert self.recurring(server) == 0
+        assert self.run(server, manager, roster, index, compress=False) == 0
+
+    def test_single_then_compressed(self, server, manager, roster, index):
+        self.run(server, manager, roster, index, compress=False)
+        assert server.api.event_count() == 14
+
+        self.run(server, manager, roster, index, compress=True)
+        assert server.api.event_count() == 3
+        assert self.recurring(server) == 1
+        assert self.run(server, manager, roster, index, compress=True) == 0
+
+        self.run(server, manager, roster, index, compress=False)
+        assert server.api.event_count() == 14
+        assert self.recurring(server) == 0
@@ -0,0 +1,78 @@
+import json
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from create_google_cal.retry import MAX_RETRIES, backoff_delay, execute_with_retry, is_daily_limit, is_retryable
+
+def http_error(status, reason=None):
+    body = {'error': {'code': status, 'message': 'error',
+                      'errors': [{'reason': reason}] if reason else []}}
+    return HttpError(httplib2.Response({'status': status}), json.dumps(body).encode('utf-8'))
+
+class FakeRequest:
+    """Raise the given errors from successive execute() calls, then return response"""
+
+    def __init__(self, *errors, response=None):
+        self.errors = list(errors)
+        self.response = response if response is not None else {'id': 'event1'}
+        self.calls = 0
+
+    def execute(self, http=None):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.response
+
+class Recorder:
+    def __init__(self):
+        self.delays = []
+
+    def __call__(self, seconds):
+        self.delays.append(seconds)
+
+@pytest.mark.parametrize('error', [
+    http_error(403, 'rateLimitExceeded'),
+    http_error(403, 'userRateLimitExceeded'),
+    http_error(429),
+    http_error(500, 'backendError'),
+    http_error(503),
+])
+def test_retries_throttling_and_server_errors(error):
+    request = FakeRequest(error, error)
+    sleep = Recorder()
+    assert execute_with_retry(request, sleep=sleep, rng=lambda: 0.0) == {'id': 'event1'}
+    assert request.calls == 3
+    assert sleep.delays == [1.0, 2.0]
+
+@pytest.mark.parametrize('error', [http_error(404, 'notFound'), http_error(403, 'forbidden'),
+                                   http_error(403, 'dailyLimitExceeded'), http_error(400, 'badRequest')])
+def test_does_not_retry_other_errors(error):
+    request = FakeRequest(error)
+    sleep = Recorder()
+    with pytest.raises(HttpError):
+        execute_with_retry(request, sleep=sleep)
+    assert request.calls == 1
+    assert sleep.delays == []
+
+def test_gives_up_after_max_retries():
+    request = FakeRequest(*[http_error(429)] * (MAX_RETRIES + 1))
+    sleep = Recorder()
+    retried = []
+    with pytest.raises(HttpError):
+        execute_with_retry(request, sleep=sleep, rng=lambda: 0.5, on_retry=retried.append)
+    assert request.calls == MAX_RETRIES + 1
+    assert len(retried) == MAX_RETRIES
+    assert sleep.delays == [1.5, 2.5, 4.5, 8.5, 16.5]
+
+def test_backoff_is_capped():
+    assert backoff_delay(10, rng=lambda: 0.9) == 32.0
+    assert backoff_delay(0, rng=lambda: 0.25) == 1.25
+
+def test_error_classification():
+    assert is_retryable(http_error(403, 'rateLimitExceeded'))
+    assert not is_retryable(http_error(404))
+    assert not is_retryable(ValueError('not an API error'))
+    assert is_daily_limit(http_error(403, 'dailyLimitExceeded'))
+    assert not is_daily_limit(http_error(403, 'rateLimitExceeded'))
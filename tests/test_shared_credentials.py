@@ -0,0 +1,83 @@
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from create_google_cal import shared_credentials
+from create_google_cal.shared_credentials import SharedCredentials
+
+SCOPES = ['https://www.googleapis.com/auth/calendar']
+
+class TokenEndpoint:
+    """Stand-in for the OAuth token endpoint, passed to refresh() as its request"""
+
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, url, method='GET', body=None, headers=None, **kwargs):
+        with self.lock:
+            self.calls += 1
+            token = f"fresh-{self.calls}"
+        # Hold the refresh open long enough for the other threads to queue behind it
+        threading.Event().wait(self.delay)
+        return Response({'access_token': token, 'expires_in': 3600, 'token_type': 'Bearer'})
+
+class Response:
+    status = 200
+    headers = {}
+
+    def __init__(self, payload):
+        self.data = json.dumps(payload).encode()
+
+@pytest.fixture
+def token_path(tmp_path):
+    """A token.json whose access token expired a minute ago"""
+    expiry = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(minutes=1)
+    path = tmp_path / 'token.json'
+    path.write_text(json.dumps({'token': 'stale', 'refresh_token': 'refresh', 'client_id': 'client',
+                                'client_secret': 'secret', 'token_uri': 'https://oauth2.example/token',
+                                'expiry': expiry.isoformat() + 'Z'}))
+    return str(path)
+
+def test_threads_refreshing_at_once_make_one_request(token_path):
+    creds = SharedCredentials.load(token_path, SCOPES)
+    endpoint = TokenEndpoint(delay=0.1)
+    threads = [threading.Thread(target=creds.refresh, args=(endpoint,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert endpoint.calls == 1
+    assert creds.token == 'fresh-1'
+    with open(token_path) as f:
+        assert json.load(f)['token'] == 'fresh-1'
+
+def test_a_second_instance_adopts_the_saved_token(token_path):
+    first = SharedCredentials.load(token_path, SCOPES)
+    # Loaded before the first one refreshes, like a second gcal process
+    second = SharedCredentials.load(token_path, SCOPES)
+    endpoint = TokenEndpoint()
+    first.refresh(endpoint)
+    second.refresh(endpoint)
+    assert endpoint.calls == 1
+    assert second.token == first.token == 'fresh-1'
+    # token.json keeps whole seconds
+    assert second.expiry == first.expiry.replace(microsecond=0)
+
+def test_a_failed_save_leaves_no_temporary_file(token_path, monkeypatch):
+    creds = SharedCredentials.load(token_path, SCOPES)
+
+    def full_disk(source, destination):
+        raise OSError(28, 'No space left on device')
+
+    monkeypatch.setattr(shared_credentials.os, 'replace', full_disk)
+    with pytest.raises(OSError):
+        creds.refresh(TokenEndpoint())
+    directory = os.path.dirname(token_path)
+    assert sorted(os.listdir(directory)) == ['token.json', 'token.json.lock']
+    with open(token_path) as f:
+        assert json.load(f)['token'] == 'stale'
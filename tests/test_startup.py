@@ -0,0 +1,21 @@
+import statistics
+
+import pytest
+
+from bench_startup import COMMANDS, STARTUP_BUDGET_MS, heavy_imports, run
+
+RUNS = 3
+
+@pytest.fixture(scope='module')
+def baseline():
+    return statistics.median(run(['-c', 'pass'])[0] for _ in range(RUNS))
+
+@pytest.mark.parametrize('command', COMMANDS, ids=' '.join)
+def test_command_skips_google_client_stack(command):
+    _, output = run(command)
+    assert heavy_imports(output) == []
+
+@pytest.mark.parametrize('command', COMMANDS, ids=' '.join)
+def test_command_starts_within_budget(command, baseline):
+    elapsed = statistics.median(run(command)[0] for _ in range(RUNS))
+    assert (elapsed - baseline) * 1000 <= STARTUP_BUDGET_MS
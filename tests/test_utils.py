@@ -0,0 +1,83 @@
+from datetime import datetime
+
+import pytest
+
+from create_google_cal.utils import DateTimeParser, parse_date
+
+# The strptime cascades the precompiled parsers replaced, in their original order
+LEGACY_DATE_FORMATS = ['%d-%m-%Y', '%m-%d-%Y', '%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%Y/%m/%d']
+LEGACY_DATETIME_DATE_FORMATS = ['%m/%d/%Y', '%Y-%m-%d', '%m-%d-%Y', '%d/%m/%Y', '%d-%m-%Y']
+LEGACY_TIME_FORMATS = ['%H:%M', '%I:%M %p', '%H:%M:%S', '%I:%M:%S %p']
+
+def legacy(value, formats, kind):
+    for fmt in formats:
+        try:
+            return datetime.strptime(value.strip(), fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"Could not parse {kind}: {value}")
+
+def outcome(parse, *args):
+    """The value parse returns, or the message of the ValueError it raises"""
+    try:
+        return parse(*args)
+    except ValueError as e:
+        return str(e)
+
+def legacy_parse_date(date_str):
+    return legacy(date_str, LEGACY_DATE_FORMATS, 'date').date()
+
+def legacy_parse_datetime(date_str, time_str):
+    parsed_date = legacy(date_str, LEGACY_DATETIME_DATE_FORMATS, 'date').date()
+    return datetime.combine(parsed_date, legacy(time_str, LEGACY_TIME_FORMATS, 'time').time())
+
+DATES = [
+    # Ambiguous: the first format in each list wins
+    '05/07/2025', '05-07-2025', '5/7/2025', '13/07/2025', '07/13/2025', '07-13-2025',
+    '2025-07-05', '2025/07/05', '2025-7-5',
+    # Space-padded days, as strptime's %d allows
+    '07/ 5/2025', ' 5-07-2025', '2025-07- 5',
+    # Surrounding whitespace
+    '  05/07/2025\t', '\n2025-07-05 ',
+    # Invalid
+    '31/02/2025', '2025-13-01', '00/07/2025', '5/7/25', '05/07/2025x', '05.07.2025', 'tomorrow', '',
+]
+TIMES = [
+    '9:00', '09:00', '23:59', '9:5', '00:00',
+    '9:00 AM', '09:00 pm', '12:00 AM', '12:00 PM', '9:00 Pm', '9:00 aM',
+    '09:05:07', '9:5:7', '12:30:15 PM', '12:30:15 am', '1:02:03 pM',
+    # Whitespace inside and around the value
+    '  9:00  PM ', '9:00\tam', ' 17:45 ',
+    # Invalid
+    '24:00', '13:00 PM', '00:00 AM', '9:60', '9:00:61', '9', '9:00 XM', '9:00PM', '9.00', '',
+]
+
+@pytest.mark.parametrize('value', DATES)
+def test_parse_date_matches_strptime(value):
+    assert outcome(parse_date, value) == outcome(legacy_parse_date, value)
+
+@pytest.mark.parametrize('date_str', DATES)
+def test_parse_datetime_dates_match_strptime(date_str):
+    assert outcome(DateTimeParser().parse_datetime, date_str, '9:00') == \
+        outcome(legacy_parse_datetime, date_str, '9:00')
+
+@pytest.mark.parametrize('time_str', TIMES)
+def test_parse_datetime_times_match_strptime(time_str):
+    assert outcome(DateTimeParser().parse_datetime, '2025-07-05', time_str) == \
+        outcome(legacy_parse_datetime, '2025-07-05', time_str)
+
+@pytest.mark.parametrize('date_format, time_format', [('2025-07-{:02d}', '9:{:02d}'),
+                                                      ('05/{:02d}/2025', '9:{:02d} PM'),
+                                                      ('{}-7-2025', '9:00:{:02d}')])
+def test_values_after_the_sample_match_strptime(date_format, time_format):
+    parser = DateTimeParser(sample_size=3)
+    # Distinct values, as repeated ones are memoized and sampled once
+    for n in range(1, 4):
+        parser.parse_datetime(date_format.format(n), time_format.format(n))
+    # Sampling narrowed both columns to the formats of the sampled rows
+    assert len(parser.dates.candidates) < len(LEGACY_DATETIME_DATE_FORMATS)
+    assert len(parser.times.candidates) < len(LEGACY_TIME_FORMATS)
+    for date_str in DATES:
+        for time_str in TIMES:
+            assert outcome(parser.parse_datetime, date_str, time_str) == \
+                outcome(legacy_parse_datetime, date_str, time_str), (date_str, time_str)
@@ -0,0 +1,57 @@
+import pytest
+
+from create_google_cal import watch
+from create_google_cal.import_index import ImportIndex
+from create_google_cal.watch import FolderImporter
+
+from .helpers import write_csv
+
+@pytest.fixture
+def importer(manager, tmp_path):
+    (tmp_path / 'inbox').mkdir()
+    index = ImportIndex(str(tmp_path / 'index.db'))
+    yield FolderImporter(manager, str(tmp_path / 'inbox'), index=index, state_path=str(tmp_path / 'watch.json'))
+    index.close()
+
+def test_bad_header_is_skipped_until_the_file_changes(server, importer, tmp_path, capsys):
+    path = write_csv(tmp_path / 'inbox' / 'bad.csv', [('2025-03-10', '09:00', '10:00', 'Shift')],
+                     header=['date', 'start', 'end time', 'event name'])
+    assert importer.import_file(path) == 0
+    assert "Error reading" in capsys.readouterr().out
+    assert path not in importer.retries
+
+    write_csv(path, [('2025-03-10', '09:00', '10:00', 'Shift')])
+    assert importer.import_file(path) == 1
+    assert server.api.event_count() == 1
+
+def test_bad_encoding_is_reported(importer, tmp_path, capsys):
+    path = tmp_path / 'inbox' / 'latin1.csv'
+    path.write_bytes('date,start time,end time,event name\n2025-03-10,09:00,10:00,Caf\xe9\n'.encode('latin-1'))
+    assert importer.import_file(str(path)) == 0
+    assert "Error reading" in capsys.readouterr().out
+
+def test_unreadable_file_is_retried(importer, tmp_path, monkeypatch):
+    path = write_csv(tmp_path / 'inbox' / 'roster.csv', [('2025-03-10', '09:00', '10:00', 'Shift')])
+
+    def refuse(*args, **kwargs):
+        raise PermissionError("Permission denied")
+    monkeypatch.setattr(watch, 'read_events', refuse)
+    assert importer.import_file(path) == 0
+    assert path in importer.retries
+
+def test_run_keeps_going_after_a_bad_file(server, importer, tmp_path, monkeypatch):
+    write_csv(tmp_path / 'inbox' / 'a.csv', [('2025-03-10', '09:00', '10:00', 'Shift')], header=['date'])
+    write_csv(tmp_path / 'inbox' / 'b.csv', [('2025-03-10', '11:00', '12:00', 'Shift')])
+
+    class OneScan:
+        name = 'test'
+
+        def wait(self, timeout):
+            importer.stopping.set()
+            return set()
+
+        def close(self):
+            pass
+    monkeypatch.setattr(watch, 'open_watcher', lambda directory, poll: OneScan())
+    importer.run()
+    assert server.api.event_count() == 1